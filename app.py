@@ -2,17 +2,14 @@ import os
 import streamlit as st
 from dotenv import load_dotenv
 
-# Import components from modular structure
-from src.config.llm_config import configure_llm
-from src.database.vector_db import setup_chromadb
-from src.models.query_processor import process_query, session_id
+# Import components from modular structure. Only light modules are imported
+# here; the database, models and LLM client load in the warm-up thread.
+from src.config.warmup import Warmup
+from src.models.conversation_history import generate_session_id
 
 # Load environment variables
 load_dotenv()
 
-# Configure LLM
-configure_llm()
-
 # Set page config
 st.set_page_config(
     page_title="Restaurant Assistant",
@@ -60,6 +57,11 @@ st.markdown("""
 if not os.environ.get('STREAMLIT_SERVER_FILE_WATCHER_TYPE'):
     os.environ['STREAMLIT_SERVER_FILE_WATCHER_TYPE'] = 'none'
 
+# One warm-up per server process, started by the first script run
+@st.cache_resource
+def get_warmup():
+    return Warmup().start()
+
 # Main Streamlit UI
 def main():
     st.markdown('<p class="restaurant-header" style="font-size: 2.5rem;">֎🇦🇮 Restaurant Assistant</p>', unsafe_allow_html=True)
@@ -69,8 +71,12 @@ def main():
     if "messages" not in st.session_state:
         st.session_state.messages = [{"role": "assistant", "content": "Hi! I'm your restaurant assistant. Ask me about restaurants in Delhi and Mumbai, specific cuisines, dishes, or any dining recommendations you need!"}]
     
-    # Initialize or get the ChromaDB collection
-    collection = setup_chromadb()
+    # Each browser session gets its own conversation
+    if "session_id" not in st.session_state:
+        st.session_state.session_id = generate_session_id()
+    
+    # The database and models load in the background while the page renders
+    warmup = get_warmup()
     
     # Display sidebar information
     with st.sidebar:
@@ -82,8 +88,12 @@ def main():
         )
         
         st.sidebar.divider()
-        st.sidebar.caption(f"Session ID: {session_id}")
+        st.sidebar.caption(f"Session ID: {st.session_state.session_id}")
         st.sidebar.caption("Your conversation is saved automatically")
+        if not warmup.ready.is_set():
+            st.sidebar.caption("Loading the restaurant database...")
+        elif warmup.error is not None:
+            st.sidebar.error(f"The assistant failed to start: {warmup.error}")
     
     # Chat interface
     # Display chat messages
@@ -101,8 +111,15 @@ def main():
         # Display assistant response
         with st.chat_message("assistant"):
             with st.spinner("Finding the best answers for you..."):
-                response = process_query(user_query, collection)
-                st.markdown(response)
+                # The first question may arrive before the warm-up has finished
+                collection = warmup.wait()
+                if warmup.error is not None:
+                    st.error(f"The assistant failed to start: {warmup.error}")
+                    st.stop()
+                from src.models.query_processor import process_query_stream
+                response_stream = process_query_stream(user_query, collection, st.session_state.session_id)
+            # Show the answer as it is generated instead of waiting for all of it
+            response = st.write_stream(response_stream)
         
         # Add assistant response to chat history
         st.session_state.messages.append({"role": "assistant", "content": response})
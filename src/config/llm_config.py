@@ -1,11 +1,15 @@
 import os
-import google.generativeai as genai
+import logging
 from dotenv import load_dotenv
 import streamlit as st
 
 # Load environment variables
 load_dotenv()
 
+GEMINI_MODEL_NAME = 'gemini-2.0-flash'
+# Seconds to wait for the token count used to calibrate prompt size estimates
+TOKEN_CALIBRATION_TIMEOUT = 10
+
 # Configure Google gen AI with API key from .env file.
 def configure_llm():
 
@@ -13,15 +17,57 @@ def configure_llm():
     if not GOOGLE_API_KEY:
         raise ValueError("GOOGLE_API_KEY environment variable is not set")
     
+    # Imported here because the SDK takes over a second to import
+    import google.generativeai as genai
     genai.configure(api_key=GOOGLE_API_KEY)
 
 # Initialize and return the Gemini model.
 # Caches the model to avoid reloading.
 @st.cache_resource
 def get_gemini_model():
-    return genai.GenerativeModel('gemini-2.0-flash')
+    import google.generativeai as genai
+    return genai.GenerativeModel(GEMINI_MODEL_NAME)
 
 def generate_response(prompt):
     model = get_gemini_model()
     response = model.generate_content(prompt)
-    return response.text 
\ No newline at end of file
+    return response.text
+
+# Async variant of generate_response, so many requests can wait on Gemini
+# at once without holding a thread each.
+async def generate_response_async(prompt):
+    model = get_gemini_model()
+    response = await model.generate_content_async(prompt)
+    return response.text
+
+# Stream the response as it is generated, yielding text chunks.
+# Chunks without text (e.g. the final safety/finish chunk) are skipped.
+def generate_response_stream(prompt):
+    model = get_gemini_model()
+    response = model.generate_content(prompt, stream=True)
+    for chunk in response:
+        try:
+            text = chunk.text
+        except ValueError:
+            continue
+        if text:
+            yield text
+
+# Measure the model's characters per token on a real retrieval context, so
+# the context packer's token estimates match the model's tokenizer. Runs once
+# per model (the ratio is cached on disk) and never fails the caller.
+def calibrate_token_counter(collection):
+    from src.models.token_counter import is_calibrated, calibrate
+    if is_calibrated(GEMINI_MODEL_NAME):
+        return
+    try:
+        from src.database.vector_db import query_database
+        from src.models.query_processor import build_enhanced_context
+        import google.generativeai as genai
+        sample = build_enhanced_context(query_database("restaurant", collection), "restaurant")
+        model = genai.GenerativeModel(GEMINI_MODEL_NAME)
+        calibrate(GEMINI_MODEL_NAME, sample, lambda text: model.count_tokens(
+            text, request_options={"timeout": TOKEN_CALIBRATION_TIMEOUT, "retry": None}
+        ).total_tokens)
+    except Exception as e:
+        logging.getLogger(__name__).warning(f"Could not calibrate token estimates, using the default ratio: {e}")
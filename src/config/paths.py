@@ -0,0 +1,7 @@
+"""
+This module holds the on-disk locations shared by the database and model
+modules, so reading a path does not import the ingestion pipeline.
+"""
+
+# Directory of the Chroma data and the state files kept next to it
+CHROMA_PERSIST_DIR = "chroma_db"
@@ -0,0 +1,92 @@
+"""
+This module prepares the app's heavy resources in a background thread, so
+the UI can render before the database, the embedding model and the LLM
+client are ready.
+
+Nothing heavy is imported at module level: the warm-up thread does the
+imports, so importing this module is cheap.
+"""
+import time
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+class Warmup:
+    """
+    Background warm-up with a readiness flag.
+
+    The thread opens and syncs the collection, loads the embedding model,
+    pages in the indexes and configures the LLM client last, so a missing API
+    key does not keep the rest from loading. ``ready`` is set when it
+    finishes, whether it succeeded or not; ``error`` holds the failure.
+    """
+
+    def __init__(self):
+        self.ready = threading.Event()
+        self.collection = None
+        self.error = None
+        self.timings = {}
+        self.started_at = None
+        self._thread = None
+
+    def start(self):
+        """Start the warm-up thread; later calls do nothing"""
+        if self._thread is None:
+            self.started_at = time.perf_counter()
+            self._thread = threading.Thread(target=self._run, name="warmup", daemon=True)
+            self._thread.start()
+        return self
+
+    def _run(self):
+        try:
+            self.collection = self._step("collection", self._open_collection)
+            self._step("indexes", self._warm_up_indexes)
+            self._step("llm", self._configure_llm)
+            logger.info(
+                f"Warm-up finished in {time.perf_counter() - self.started_at:.2f} seconds "
+                f"({', '.join(f'{step} {seconds:.2f}s' for step, seconds in self.timings.items())})"
+            )
+        except Exception as e:
+            logger.exception(f"Error during warm-up: {str(e)}")
+            self.error = e
+        finally:
+            self.ready.set()
+
+    def _step(self, name, func):
+        start_time = time.perf_counter()
+        result = func()
+        self.timings[name] = time.perf_counter() - start_time
+        return result
+
+    def _open_collection(self):
+        from src.database.vector_db import prepare_collection
+        return prepare_collection()
+
+    def _warm_up_indexes(self):
+        from src.database.vector_db import warm_up_collection
+        warm_up_collection(self.collection)
+        # Importing the query pipeline pulls in the remaining heavy modules
+        import src.models.query_processor
+
+    def _configure_llm(self):
+        from src.config.llm_config import configure_llm, calibrate_token_counter
+        configure_llm()
+        # Off the readiness path: the first count_tokens call can be slow
+        threading.Thread(
+            target=calibrate_token_counter, args=(self.collection,), name="token-calibration", daemon=True
+        ).start()
+
+    def wait(self, timeout=None):
+        """
+        Block until the warm-up finishes.
+
+        Args:
+            timeout (float, optional): Seconds to wait
+
+        Returns:
+            collection: The ChromaDB collection, or None if the warm-up failed
+                or did not finish in time
+        """
+        self.ready.wait(timeout)
+        return self.collection if self.ready.is_set() and self.error is None else None
@@ -0,0 +1,201 @@
+"""
+This module keeps an inverted BM25 keyword index over the collection's
+documents, so exact dish and restaurant names can be matched alongside the
+vector search.
+"""
+import os
+import json
+import math
+import heapq
+import logging
+import threading
+from collections import Counter
+from src.models.text_processing import preprocess_text, preprocess_texts
+
+logger = logging.getLogger(__name__)
+
+# BM25 parameters: term frequency saturation and document length normalization
+BM25_K1 = 1.5
+BM25_B = 0.75
+# Documents fetched from the collection per request when syncing
+SYNC_BATCH_SIZE = 1000
+# Missing documents normalized and added per batch when syncing; large
+# enough for preprocess_texts to use several processes, small enough to
+# keep memory bounded
+SYNC_ADD_BATCH_SIZE = int(os.getenv("BM25_SYNC_ADD_BATCH_SIZE", "20000"))
+
+def tokenize_for_search(text):
+    """Split text into the normalized terms the index is built from"""
+    return preprocess_text(text).split()
+
+class BM25Index:
+    """
+    Inverted index from terms to the documents containing them, persisted as
+    JSON with the term frequencies of every document.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.doc_terms = {}
+        self._postings = {}
+        self._doc_lengths = {}
+        self._total_length = 0
+        self._mtime = None
+        self._lock = threading.Lock()
+
+    def load(self):
+        """Load the index from disk if it changed since the last load"""
+        if not os.path.exists(self.path):
+            return self
+        mtime = os.path.getmtime(self.path)
+        if mtime == self._mtime:
+            return self
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                doc_terms = json.load(f)["documents"]
+            with self._lock:
+                self.doc_terms = {}
+                self._postings = {}
+                self._doc_lengths = {}
+                self._total_length = 0
+                for doc_id, terms in doc_terms.items():
+                    self._add_terms(doc_id, terms)
+                self._mtime = mtime
+        except Exception as e:
+            logger.error(f"Error loading BM25 index: {str(e)}")
+        return self
+
+    def save(self):
+        """Atomically write the index to disk"""
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_file = f"{self.path}.tmp"
+        with self._lock:
+            with open(tmp_file, "w", encoding="utf-8") as f:
+                json.dump({"documents": self.doc_terms}, f, ensure_ascii=False)
+            os.replace(tmp_file, self.path)
+            self._mtime = os.path.getmtime(self.path)
+
+    def add(self, doc_id, text):
+        with self._lock:
+            if doc_id in self.doc_terms:
+                self._remove_terms(doc_id)
+            self._add_terms(doc_id, dict(Counter(tokenize_for_search(text))))
+
+    def add_many(self, doc_ids, texts):
+        """Add or replace several documents, normalizing their text as one batch"""
+        term_lists = [text.split() for text in preprocess_texts(texts)]
+        with self._lock:
+            for doc_id, terms in zip(doc_ids, term_lists):
+                if doc_id in self.doc_terms:
+                    self._remove_terms(doc_id)
+                self._add_terms(doc_id, dict(Counter(terms)))
+
+    def remove(self, doc_id):
+        with self._lock:
+            if doc_id in self.doc_terms:
+                self._remove_terms(doc_id)
+
+    def _add_terms(self, doc_id, terms):
+        self.doc_terms[doc_id] = terms
+        length = sum(terms.values())
+        self._doc_lengths[doc_id] = length
+        self._total_length += length
+        for term, tf in terms.items():
+            self._postings.setdefault(term, {})[doc_id] = tf
+
+    def _remove_terms(self, doc_id):
+        for term in self.doc_terms.pop(doc_id):
+            postings = self._postings[term]
+            del postings[doc_id]
+            if not postings:
+                del self._postings[term]
+        self._total_length -= self._doc_lengths.pop(doc_id)
+
+    def search(self, query, k=20):
+        """
+        Rank documents by BM25 score for a query.
+
+        Args:
+            query (str): The user query
+            k (int): Number of documents to return
+
+        Returns:
+            list: (doc_id, score) pairs, best first
+        """
+        terms = set(tokenize_for_search(query))
+        with self._lock:
+            doc_count = len(self.doc_terms)
+            if not doc_count or not terms:
+                return []
+            avg_length = self._total_length / doc_count
+            scores = {}
+            for term in terms:
+                postings = self._postings.get(term)
+                if not postings:
+                    continue
+                idf = math.log(1 + (doc_count - len(postings) + 0.5) / (len(postings) + 0.5))
+                for doc_id, tf in postings.items():
+                    norm = BM25_K1 * (1 - BM25_B + BM25_B * self._doc_lengths[doc_id] / avg_length)
+                    scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (BM25_K1 + 1) / (tf + norm)
+        return heapq.nlargest(k, scores.items(), key=lambda item: item[1])
+
+    def sync(self, collection):
+        """
+        Bring the index in line with the documents stored in a collection.
+
+        Documents missing from the index are tokenized from the collection and
+        documents no longer in the collection are dropped, so the index also
+        recovers from interrupted ingestion runs.
+
+        Args:
+            collection: ChromaDB collection
+
+        Returns:
+            bool: Whether the index changed
+        """
+        # Page through the stored IDs instead of loading them all at once
+        present = 0
+        missing_ids = []
+        added = 0
+        for offset in range(0, collection.count(), SYNC_BATCH_SIZE):
+            page_ids = collection.get(limit=SYNC_BATCH_SIZE, offset=offset, include=[])['ids']
+            for doc_id in page_ids:
+                if doc_id in self.doc_terms:
+                    present += 1
+                else:
+                    missing_ids.append(doc_id)
+            # Normalize missing documents in large batches, so big syncs can
+            # use several processes without holding every document in memory
+            if len(missing_ids) >= SYNC_ADD_BATCH_SIZE:
+                added += self._add_stored(collection, missing_ids)
+                missing_ids = []
+        if missing_ids:
+            added += self._add_stored(collection, missing_ids)
+
+        # Every indexed document was seen in the collection unless some are gone
+        stale_ids = []
+        if present + added < len(self.doc_terms):
+            indexed_ids = list(self.doc_terms)
+            for i in range(0, len(indexed_ids), SYNC_BATCH_SIZE):
+                batch_ids = indexed_ids[i:i + SYNC_BATCH_SIZE]
+                stored_ids = set(collection.get(ids=batch_ids, include=[])['ids'])
+                stale_ids.extend(doc_id for doc_id in batch_ids if doc_id not in stored_ids)
+            for doc_id in stale_ids:
+                self.remove(doc_id)
+
+        if stale_ids or added:
+            logger.info(f"BM25 index synced: {added} documents added, {len(stale_ids)} removed")
+        return bool(stale_ids or added)
+
+    def _add_stored(self, collection, doc_ids):
+        """Tokenize and add documents fetched from the collection; returns how many"""
+        batch_ids, batch_documents = [], []
+        for i in range(0, len(doc_ids), SYNC_BATCH_SIZE):
+            batch = collection.get(ids=doc_ids[i:i + SYNC_BATCH_SIZE], include=["documents"])
+            batch_ids.extend(batch['ids'])
+            batch_documents.extend(document or "" for document in batch['documents'])
+        self.add_many(batch_ids, batch_documents)
+        return len(batch_ids)
+
+    def __len__(self):
+        return len(self.doc_terms)
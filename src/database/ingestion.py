@@ -0,0 +1,989 @@
+"""
+This module builds restaurant documents and ingests them into ChromaDB.
+
+It is shared by the app's startup indexing and the utility scripts, and does
+not import Streamlit, so it can also run as a headless command:
+
+    python -m src.database.ingestion [--data-file PATH] [--full-rebuild] [--compact]
+"""
+import os
+import re
+import json
+import time
+import hashlib
+import logging
+import argparse
+from contextlib import nullcontext
+import chromadb
+from src.config.paths import CHROMA_PERSIST_DIR
+from src.models.encoding import get_embedding_function, document_encoder
+from src.database.restaurant_table import RestaurantTable
+from src.database.bm25_index import BM25Index
+from src.models.text_processing import download_nltk_resources
+
+logger = logging.getLogger(__name__)
+
+# Database settings
+COLLECTION_NAME = "restaurant_data"
+BATCH_SIZE = 100
+DATA_FILE = "data/1combined_restaurants.json"
+# Embed all documents up front with the bulk encoder instead of letting
+# Chroma embed each BATCH_SIZE chunk on a single core
+PRECOMPUTE_EMBEDDINGS = os.getenv("PRECOMPUTE_EMBEDDINGS", "true").lower() == "true"
+# Per-source record of restaurant content hashes
+MANIFEST_FILE = os.path.join(CHROMA_PERSIST_DIR, "index_manifest.json")
+MANIFEST_VERSION = 2
+# Restaurant attributes stored once and joined onto results at retrieval time
+RESTAURANT_TABLE_FILE = os.path.join(CHROMA_PERSIST_DIR, "restaurant_table.json")
+# Keyword index over the same documents, for hybrid retrieval
+BM25_INDEX_FILE = os.path.join(CHROMA_PERSIST_DIR, "bm25_index.json")
+# Compact mode keeps restaurant details out of menu item, cuisine, location
+# and menu section documents and refers to the restaurant table instead
+COMPACT_DOCUMENTS = os.getenv("COMPACT_DOCUMENTS", "false").lower() == "true"
+# Bump when the document layout changes so a refresh rebuilds every restaurant
+DOCUMENT_SCHEMA_VERSION = 2
+# Documents buffered per flush while streaming restaurants into the collection
+INGEST_BATCH_SIZE = int(os.getenv("INGEST_BATCH_SIZE", "4096"))
+# Spellings of the cities we cover, mapped to the value stored in metadata
+CITY_ALIASES = {
+    "mumbai": "Mumbai",
+    "bombay": "Mumbai",
+    "delhi": "Delhi",
+    "new delhi": "Delhi"
+}
+VEG_FOOD_TYPES = {"veg", "vegetarian", "pure veg"}
+
+_restaurant_table = RestaurantTable(RESTAURANT_TABLE_FILE)
+_bm25_index = BM25Index(BM25_INDEX_FILE)
+
+def open_collection(persist_dir=CHROMA_PERSIST_DIR, collection_name=COLLECTION_NAME):
+    """
+    Open the persistent restaurant collection, creating it if needed.
+    
+    Args:
+        persist_dir (str): Chroma data directory
+        collection_name (str): Name of the collection
+        
+    Returns:
+        collection: ChromaDB collection
+    """
+    client = chromadb.PersistentClient(path=persist_dir)
+    return client.get_or_create_collection(
+        name=collection_name,
+        embedding_function=get_embedding_function()
+    )
+
+def refresh_restaurant_data(collection, data_file=DATA_FILE,
+                            precompute_embeddings=PRECOMPUTE_EMBEDDINGS, full_rebuild=False,
+                            compact=COMPACT_DOCUMENTS, resume=True):
+    """
+    Sync the collection with a restaurant data file using the index manifest.
+    
+    Restaurants are streamed from the file one at a time and their documents
+    are flushed to the collection in fixed-size batches, so memory grows only
+    with the manifest's one hash per restaurant (and the restaurant table in
+    compact mode), not with the number of documents. Only restaurants whose content hash changed
+    since the last sync are rebuilt, and of their documents only the ones with
+    new content IDs are embedded and upserted. Documents of restaurants that
+    disappeared from the file are deleted.
+    
+    Every flushed batch is recorded in a checkpoint file; if the run dies, the
+    next run over the same file skips straight past the committed restaurants.
+    
+    Args:
+        collection: ChromaDB collection to update
+        data_file (str): Path to the restaurant JSON array or JSON Lines file
+        precompute_embeddings (bool): Embed with the bulk encoder before upserting
+        full_rebuild (bool): Ignore the manifest, rebuild every restaurant and
+            delete stored documents of restaurants not in any indexed file
+        compact (bool): Build compact documents that reference the restaurant table
+        resume (bool): Continue from a matching checkpoint if one exists
+        
+    Returns:
+        dict: Counts of added and deleted documents and unchanged restaurants
+    """
+    start_time = time.time()
+    # Setup happens here, so queries never wait for NLTK data to download
+    download_nltk_resources()
+    # Ingestion keeps its state next to the Chroma data, never in a snapshot
+    use_state_dir(CHROMA_PERSIST_DIR)
+    logger.info(f"Streaming restaurants from {data_file}...")
+    
+    manifest = load_manifest()
+    source = os.path.basename(data_file)
+    # Nothing to look up or clean up in a collection that started out empty
+    started_empty = collection.count() == 0
+    # State files without stored documents (e.g. left by an older version
+    # that served a snapshot) describe nothing; build everything again
+    if started_empty and not full_rebuild and \
+            (manifest["sources"].get(source) or load_checkpoint(source)):
+        logger.warning(f"Collection is empty but the index state lists {source}; rebuilding it")
+        full_rebuild = True
+        resume = False
+    previous = {} if full_rebuild else manifest["sources"].get(source, {})
+    current = {}
+    # Only compact documents need the restaurant table
+    restaurant_table = get_restaurant_table()
+    if not compact and len(restaurant_table):
+        # Left by a compact build; full documents carry their own details
+        restaurant_table.records.clear()
+        restaurant_table.save()
+    # Changing the document layout must invalidate every restaurant hash
+    layout = f"v{DOCUMENT_SCHEMA_VERSION}{'-compact' if compact else ''}"
+    stats = {"added": 0, "deleted": 0, "unchanged": 0}
+    
+    # Resume only if the checkpoint was written for this exact file and layout
+    header = {
+        "source": source,
+        "fingerprint": file_fingerprint(data_file),
+        "layout": layout
+    }
+    checkpoint = load_checkpoint(source) if resume else None
+    if checkpoint and checkpoint["header"] != header:
+        logger.info(f"Discarding checkpoint for {source}: data file or settings changed")
+        checkpoint = None
+    resume_position = checkpoint["position"] if checkpoint else 0
+    committed = checkpoint["committed"] if checkpoint else {}
+    if resume_position:
+        logger.info(f"Resuming {source} after {resume_position} committed restaurants")
+    checkpoint_file = start_checkpoint(header, checkpoint)
+    
+    # Pending batch, flushed every INGEST_BATCH_SIZE documents
+    ids = []
+    documents = []
+    metadatas = []
+    pending = {}
+    
+    with document_encoder() if precompute_embeddings else nullcontext() as encode:
+        
+        def flush(position):
+            embeddings = encode(documents) if encode else None
+            for i in range(0, len(ids), BATCH_SIZE):
+                end_idx = min(i + BATCH_SIZE, len(ids))
+                collection.upsert(
+                    ids=ids[i:end_idx],
+                    documents=documents[i:end_idx],
+                    metadatas=metadatas[i:end_idx],
+                    embeddings=embeddings[i:end_idx] if embeddings is not None else None
+                )
+            stats["added"] += len(ids)
+            ids.clear()
+            documents.clear()
+            metadatas.clear()
+            
+            # Everything up to this restaurant is now stored; record it
+            append_checkpoint(checkpoint_file, position, pending)
+            committed.update(pending)
+            pending.clear()
+            
+            elapsed_time = time.time() - start_time
+            logger.info(
+                f"Committed {position} restaurants, {stats['added']} documents upserted "
+                f"({stats['added'] / max(elapsed_time, 1e-9):.1f} docs/sec)"
+            )
+        
+        position = 0
+        for position, restaurant in enumerate(iter_restaurants(data_file), start=1):
+            key = restaurant_key(restaurant)
+            # Disambiguate repeated entries for the same restaurant in one file
+            if key in current:
+                suffix = 2
+                while f"{key}_{suffix}" in current:
+                    suffix += 1
+                key = f"{key}_{suffix}"
+            
+            if compact:
+                restaurant_table.upsert(key, restaurant)
+            if position <= resume_position:
+                # Already stored by the interrupted run
+                current[key] = committed.get(key, previous.get(key))
+                continue
+            
+            restaurant_hash = content_hash(layout + json.dumps(restaurant, sort_keys=True, ensure_ascii=False))
+            current[key] = restaurant_hash
+            if previous.get(key) == restaurant_hash:
+                stats["unchanged"] += 1
+                continue
+            
+            # A full rebuild ignores the manifest, but not what is stored
+            stored = not started_empty and (full_rebuild or key in previous)
+            old_ids = set(get_restaurant_document_ids(collection, key)) if stored else set()
+            new_ids = set()
+            for doc_id, document, metadata in build_restaurant_documents(restaurant, key, compact):
+                new_ids.add(doc_id)
+                # Content-addressed IDs: an ID we already stored has identical content
+                if doc_id not in old_ids:
+                    ids.append(doc_id)
+                    documents.append(document)
+                    metadatas.append(metadata)
+            
+            stale_ids = list(old_ids - new_ids)
+            if stale_ids:
+                collection.delete(ids=stale_ids)
+                stats["deleted"] += len(stale_ids)
+            pending[key] = restaurant_hash
+            
+            if len(ids) >= INGEST_BATCH_SIZE:
+                flush(position)
+        
+        if ids or pending:
+            flush(position)
+    
+    # Restaurants that are no longer in the file
+    for key in previous:
+        if key not in current:
+            restaurant_table.remove(key)
+            stale_ids = get_restaurant_document_ids(collection, key)
+            if stale_ids:
+                collection.delete(ids=stale_ids)
+                stats["deleted"] += len(stale_ids)
+    
+    if full_rebuild:
+        # Without a manifest to diff against, drop every document and table
+        # entry of a restaurant that no indexed file contains any more
+        indexed = set(current)
+        for other_source, hashes in manifest["sources"].items():
+            if other_source != source:
+                indexed.update(hashes)
+        if not started_empty:
+            stats["deleted"] += delete_orphaned_documents(collection, indexed)
+        for key in list(restaurant_table.records):
+            if key not in indexed:
+                restaurant_table.remove(key)
+    
+    sync_bm25_index(collection)
+    
+    # Leave the manifest untouched when nothing changed, so its modification
+    # time keeps identifying the index version for caches built on top of it
+    if current != manifest["sources"].get(source) or stats["added"] or stats["deleted"]:
+        manifest["sources"][source] = current
+        save_manifest(manifest)
+        if compact:
+            restaurant_table.save()
+    os.remove(checkpoint_file)
+    
+    elapsed_time = time.time() - start_time
+    logger.info(
+        f"Indexed {source}: {stats['added']} documents upserted, {stats['deleted']} deleted, "
+        f"{stats['unchanged']} restaurants unchanged in {elapsed_time:.2f} seconds "
+        f"({stats['added'] / max(elapsed_time, 1e-9):.1f} docs/sec)"
+    )
+    
+    return stats
+
+def file_fingerprint(path):
+    """Identify a version of a file by its size and modification time"""
+    file_stat = os.stat(path)
+    return f"{file_stat.st_size}-{file_stat.st_mtime_ns}"
+
+def checkpoint_path(source):
+    return os.path.join(CHROMA_PERSIST_DIR, f"ingest_checkpoint_{source}.jsonl")
+
+def load_checkpoint(source):
+    """
+    Load the checkpoint of an interrupted ingestion run.
+    
+    The checkpoint is a JSON Lines file: a header describing the run, then one
+    line per committed batch with the stream position reached and the content
+    hashes of the restaurants committed in that batch.
+    
+    Args:
+        source (str): Data file name
+        
+    Returns:
+        dict: Header, last committed position and committed hashes, or None
+    """
+    path = checkpoint_path(source)
+    if not os.path.exists(path):
+        return None
+    
+    checkpoint = None
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                # A line cut short by the crash was never committed
+                break
+            if checkpoint is None:
+                checkpoint = {"header": record, "position": 0, "committed": {}}
+            else:
+                checkpoint["position"] = record["position"]
+                checkpoint["committed"].update(record["committed"])
+    return checkpoint
+
+def start_checkpoint(header, checkpoint=None):
+    """
+    Start a checkpoint file for a run, keeping the batches of a resumed run.
+    
+    Args:
+        header: Description of the run
+        checkpoint: Checkpoint being resumed, if any
+        
+    Returns:
+        str: Path of the checkpoint file
+    """
+    path = checkpoint_path(header["source"])
+    os.makedirs(CHROMA_PERSIST_DIR, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(json.dumps(header) + "\n")
+        if checkpoint:
+            record = {"position": checkpoint["position"], "committed": checkpoint["committed"]}
+            f.write(json.dumps(record) + "\n")
+    return path
+
+def append_checkpoint(path, position, committed):
+    """
+    Record a committed batch in the checkpoint file.
+    
+    Args:
+        path (str): Checkpoint file path
+        position (int): Number of restaurants fully stored so far
+        committed: Content hashes of the restaurants stored in this batch
+    """
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(json.dumps({"position": position, "committed": committed}) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+
+def use_state_dir(state_dir):
+    """
+    Read the restaurant table and BM25 index from another directory.
+    
+    An attached snapshot serves its own copies read-only; ingestion switches
+    back to CHROMA_PERSIST_DIR before it writes.
+    
+    Args:
+        state_dir (str): Directory holding restaurant_table.json and bm25_index.json
+    """
+    global _restaurant_table, _bm25_index
+    table_file = os.path.join(state_dir, os.path.basename(RESTAURANT_TABLE_FILE))
+    index_file = os.path.join(state_dir, os.path.basename(BM25_INDEX_FILE))
+    if _restaurant_table.path != table_file:
+        _restaurant_table = RestaurantTable(table_file)
+    if _bm25_index.path != index_file:
+        _bm25_index = BM25Index(index_file)
+
+def get_restaurant_table():
+    """
+    Return the shared restaurant table, reloaded if it changed on disk.
+    
+    Returns:
+        RestaurantTable: Restaurant attributes keyed by restaurant_id
+    """
+    return _restaurant_table.load()
+
+def get_bm25_index():
+    """
+    Return the shared BM25 keyword index, reloaded if it changed on disk.
+    
+    Returns:
+        BM25Index: Keyword index over the collection's documents
+    """
+    return _bm25_index.load()
+
+def sync_bm25_index(collection):
+    """
+    Update the BM25 index to match the collection and save it if it changed.
+    
+    Keyword search is an addition to the vector search, so a failure here is
+    logged instead of failing the ingestion run.
+    
+    Args:
+        collection: ChromaDB collection the index covers
+    """
+    try:
+        bm25_index = get_bm25_index()
+        if bm25_index.sync(collection) or not os.path.exists(bm25_index.path):
+            bm25_index.save()
+    except Exception as e:
+        logger.error(f"Error updating BM25 index: {str(e)}")
+
+def get_restaurant_document_ids(collection, key):
+    """
+    Look up the IDs of every stored document belonging to one restaurant.
+    
+    Args:
+        collection: ChromaDB collection to search
+        key (str): Restaurant identifier from restaurant_key
+        
+    Returns:
+        list: Document IDs
+    """
+    return collection.get(where={"restaurant_id": key}, include=[])["ids"]
+
+def delete_orphaned_documents(collection, restaurant_keys):
+    """
+    Delete every stored document that belongs to none of the given restaurants.
+    
+    Args:
+        collection: ChromaDB collection to clean up
+        restaurant_keys (set): Restaurant identifiers to keep
+        
+    Returns:
+        int: Number of deleted documents
+    """
+    # Collect first: deleting while paging would shift the offsets
+    orphaned_ids = []
+    for offset in range(0, collection.count(), BATCH_SIZE):
+        batch = collection.get(limit=BATCH_SIZE, offset=offset, include=["metadatas"])
+        orphaned_ids.extend(
+            doc_id for doc_id, metadata in zip(batch['ids'], batch['metadatas'])
+            if (metadata or {}).get("restaurant_id") not in restaurant_keys
+        )
+    for i in range(0, len(orphaned_ids), BATCH_SIZE):
+        collection.delete(ids=orphaned_ids[i:i + BATCH_SIZE])
+    if orphaned_ids:
+        logger.info(f"Deleted {len(orphaned_ids)} documents of restaurants no longer indexed")
+    return len(orphaned_ids)
+
+def iter_restaurants(data_file):
+    """
+    Stream restaurants from a data file without loading it all into memory.
+    
+    Files ending in .jsonl hold one restaurant per line; anything else is
+    parsed incrementally as a JSON array of restaurant objects.
+    
+    Args:
+        data_file (str): Path to the restaurant data file
+        
+    Yields:
+        dict: Restaurant data dictionary
+    """
+    with open(data_file, "r", encoding="utf-8") as f:
+        if data_file.endswith(".jsonl"):
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            yield from _iter_json_array(f)
+
+def _iter_json_array(f, chunk_size=1 << 16):
+    # Decode the objects of a top-level JSON array one at a time, reading the
+    # file in chunks and only keeping the unparsed remainder in memory
+    decoder = json.JSONDecoder()
+    buffer = ""
+    pos = 0
+    eof = False
+    started = False
+    
+    while True:
+        # Skip whitespace and separators between elements
+        while pos < len(buffer) and (buffer[pos].isspace() or (started and buffer[pos] == ",")):
+            pos += 1
+        
+        if pos < len(buffer):
+            if not started:
+                if buffer[pos] != "[":
+                    raise ValueError("Expected a JSON array of restaurants")
+                started = True
+                pos += 1
+                continue
+            if buffer[pos] == "]":
+                return
+            try:
+                restaurant, pos = decoder.raw_decode(buffer, pos)
+                yield restaurant
+                continue
+            except json.JSONDecodeError:
+                # Object continues past the end of the buffer; read more below
+                if eof:
+                    raise
+        elif eof:
+            if started:
+                raise ValueError("Unterminated JSON array")
+            return
+        
+        chunk = f.read(chunk_size)
+        buffer = buffer[pos:] + chunk
+        pos = 0
+        eof = not chunk
+
+def load_manifest():
+    """
+    Load the index manifest mapping each data source to its restaurants'
+    content hashes.
+    
+    Returns:
+        dict: Manifest with a "sources" mapping
+    """
+    if os.path.exists(MANIFEST_FILE):
+        try:
+            with open(MANIFEST_FILE, "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+            # Version 1 manifests also listed document IDs per restaurant
+            for entries in manifest["sources"].values():
+                for key, entry in entries.items():
+                    if isinstance(entry, dict):
+                        entries[key] = entry["hash"]
+            manifest["version"] = MANIFEST_VERSION
+            return manifest
+        except Exception as e:
+            logger.error(f"Error loading index manifest: {str(e)}")
+    return {"version": MANIFEST_VERSION, "sources": {}}
+
+def save_manifest(manifest):
+    """
+    Atomically write the index manifest next to the Chroma data.
+    
+    Args:
+        manifest: Manifest dictionary to save
+    """
+    os.makedirs(os.path.dirname(MANIFEST_FILE), exist_ok=True)
+    tmp_file = f"{MANIFEST_FILE}.tmp"
+    with open(tmp_file, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False)
+    os.replace(tmp_file, MANIFEST_FILE)
+
+def index_version():
+    """
+    Identify the current version of the index.
+    
+    The manifest is rewritten whenever an ingestion run changes the index, so
+    its modification time changes with every rebuild or delta update.
+    
+    Returns:
+        int: Manifest modification time in nanoseconds, or None if there is no index
+    """
+    try:
+        return os.stat(MANIFEST_FILE).st_mtime_ns
+    except OSError:
+        return None
+
+def content_hash(text):
+    """
+    Return a short, stable hash of a piece of text.
+    
+    Args:
+        text (str): Text to hash
+        
+    Returns:
+        str: Hex digest prefix
+    """
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()[:16]
+
+def restaurant_key(restaurant):
+    """
+    Return a stable identifier for a restaurant that survives content edits.
+    
+    Args:
+        restaurant: Restaurant data dictionary
+        
+    Returns:
+        str: Restaurant identifier
+    """
+    identity = restaurant.get('url') or f"{restaurant.get('name', '')}|{restaurant.get('address', '')}"
+    return content_hash(identity)
+
+def build_restaurant_documents(restaurant, key, compact=False):
+    """
+    Build every searchable document for one restaurant.
+    
+    Document IDs combine the document type, the restaurant key and a hash of
+    the document content, so unchanged documents keep their IDs across rebuilds.
+    A menu that lists the same item twice yields one document for it, since
+    both copies would get the same ID.
+    In compact mode only the restaurant overview carries the restaurant's
+    details; the other documents hold their own text plus the restaurant_id,
+    and the details are joined back on from the restaurant table at query time.
+    
+    Args:
+        restaurant: Restaurant data dictionary
+        key (str): Restaurant identifier from restaurant_key
+        compact (bool): Build compact documents
+        
+    Returns:
+        list: (doc_id, document, metadata) tuples
+    """
+    built = []
+    seen_ids = set()
+    # Typed fields on every document so queries can filter them in Chroma
+    filter_fields = restaurant_filter_metadata(restaurant)
+    
+    def add(prefix, document, metadata):
+        # The typed rating replaces the raw rating string
+        metadata.pop("rating", None)
+        metadata = {**filter_fields, **metadata, "restaurant_id": key}
+        if compact and metadata["type"] != "restaurant_info":
+            metadata["compact"] = True
+        fingerprint = content_hash(document + json.dumps(metadata, sort_keys=True, ensure_ascii=False))
+        doc_id = f"{prefix}_{key}_{fingerprint}"
+        # Identical IDs carry identical content; upserting both would fail
+        if doc_id not in seen_ids:
+            seen_ids.add(doc_id)
+            built.append((doc_id, document, metadata))
+    
+    def restaurant_metadata(**fields):
+        # Restaurant-level fields are only repeated in full documents
+        if compact:
+            return fields
+        return {
+            **fields,
+            "location": restaurant.get('location', 'Unknown'),
+            "cuisines": ",".join(restaurant.get('cuisines', [])),
+            "rating": restaurant.get('rating', 'Unknown'),
+            "cost": restaurant.get('cost_for_two', 'Unknown'),
+            "url": restaurant.get('url', 'Unknown')
+        }
+    
+    # 1. Create a document for the restaurant overview
+    add("restaurant", create_restaurant_document(restaurant), {
+        "type": "restaurant_info",
+        "name": restaurant.get('name', 'Unknown'),
+        "location": restaurant.get('location', 'Unknown'),
+        "rating": restaurant.get('rating', 'Unknown'),
+        "cuisines": ",".join(restaurant.get('cuisines', [])),
+        "cost": restaurant.get('cost_for_two', 'Unknown'),
+        "url": restaurant.get('url', 'Unknown'),
+        "contact": restaurant.get('contact', 'Unknown'),
+        "address": restaurant.get('address', 'Unknown')
+    })
+    
+    # 2. Add all menu items individually for better search coverage
+    menu_items = restaurant.get('menu_items', [])
+    for item in menu_items:
+        metadata = {
+            "type": "menu_item",
+            "restaurant": restaurant.get('name', 'Unknown'),
+            "food_type": item.get('food_type', 'Unknown'),
+            "item_name": item.get('name', 'Unknown'),
+            "price": item.get('price', 'Unknown'),
+            "is_veg": is_veg_food_type(item.get('food_type'))
+        }
+        if (price := parse_inr(item.get('price'))) is not None:
+            metadata["price_inr"] = price
+        if not compact:
+            metadata.update({
+                "restaurant_location": restaurant.get('location', 'Unknown'),
+                "restaurant_cuisines": ",".join(restaurant.get('cuisines', [])),
+                "restaurant_rating": restaurant.get('rating', 'Unknown'),
+                "restaurant_url": restaurant.get('url', 'Unknown')
+            })
+        add("item", create_menu_item_document(restaurant, item, compact), metadata)
+    
+    # 3. Create searchable cuisine documents for each restaurant
+    cuisines = restaurant.get('cuisines', [])
+    if cuisines:
+        add("cuisine", create_cuisine_document(restaurant, cuisines, compact), {
+            **restaurant_metadata(
+                type="cuisine_info",
+                restaurant=restaurant.get('name', 'Unknown')
+            ),
+            "cuisines": ",".join(cuisines)
+        })
+    
+    # 4. Create searchable location documents
+    add("location", create_location_document(restaurant, compact), {
+        **restaurant_metadata(
+            type="location_info",
+            restaurant=restaurant.get('name', 'Unknown')
+        ),
+        "location": restaurant.get('location', 'Unknown'),
+        "address": restaurant.get('address', 'Unknown')
+    })
+    
+    # 5. Group menu items by food type for categorized searching
+    menu_by_type = {}
+    for item in menu_items:
+        food_type = item.get('food_type', 'Other')
+        if food_type not in menu_by_type:
+            menu_by_type[food_type] = []
+        menu_by_type[food_type].append(item)
+    
+    # Create a document for each food type
+    for food_type, items in menu_by_type.items():
+        add("menu", create_menu_section_document(restaurant, food_type, items, compact), restaurant_metadata(
+            type="menu_section",
+            restaurant=restaurant.get('name', 'Unknown'),
+            food_type=food_type,
+            item_count=len(items),
+            is_veg=is_veg_food_type(food_type)
+        ))
+    
+    return built
+
+def restaurant_filter_metadata(restaurant):
+    """
+    Extract typed, filterable restaurant attributes from the raw strings.
+    
+    Args:
+        restaurant: Restaurant data dictionary
+        
+    Returns:
+        dict: rating, cost_for_two_inr, city and is_veg where they can be parsed
+    """
+    fields = {}
+    if (rating := parse_rating(restaurant.get('rating'))) is not None:
+        fields["rating"] = rating
+    if (cost := parse_inr(restaurant.get('cost_for_two'))) is not None:
+        fields["cost_for_two_inr"] = cost
+    if city := parse_city(restaurant.get('location') or restaurant.get('address')):
+        fields["city"] = city
+    # A restaurant counts as vegetarian when its whole menu is
+    if menu_items := restaurant.get('menu_items', []):
+        fields["is_veg"] = all(is_veg_food_type(item.get('food_type')) for item in menu_items)
+    return fields
+
+def parse_inr(value):
+    """Parse an amount such as "₹420" or "Cost for two: ₹1,000" into a float"""
+    if value is None:
+        return None
+    match = re.search(r'(\d[\d,]*(?:\.\d+)?)', str(value))
+    return float(match.group(1).replace(",", "")) if match else None
+
+def parse_rating(value):
+    """Parse a rating such as "4.5" into a float"""
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+def parse_city(location):
+    """Find the city in a location string such as "Bandra West, Mumbai." """
+    if not location:
+        return None
+    for part in reversed(location.split(",")):
+        city = CITY_ALIASES.get(part.strip(" .").lower())
+        if city:
+            return city
+    return None
+
+def is_veg_food_type(food_type):
+    return (food_type or "").strip().lower() in VEG_FOOD_TYPES
+
+def create_restaurant_document(restaurant):
+    """
+    Create a document for restaurant overview information.
+    
+    Args:
+        restaurant: Restaurant data dictionary
+        
+    Returns:
+        str: Formatted document text
+    """
+    # Format hours of operation if available
+    hours_info = ""
+    if operational_hours := restaurant.get('operational_hours'):
+        hours_info = "Hours of Operation:\n"
+        for day, hours in operational_hours.items():
+            hours_info += f"  {day}: {hours}\n"
+    
+    # Format cuisines if available
+    cuisines_text = ", ".join(restaurant.get('cuisines', []))
+    
+    # Format photos if available
+    photos_info = ""
+    if photos := restaurant.get('photos', []):
+        photos_info = "Photos:\n"
+        for photo_url in photos:
+            photos_info += f"  {photo_url}\n"
+    
+    # Format menu items summary
+    menu_summary = ""
+    if menu_items := restaurant.get('menu_items', []):
+        menu_summary = f"Menu Items: {len(menu_items)} items available\n"
+    
+    # Create a more searchable document with clear field markers
+    return (
+        f"Restaurant Name: {restaurant.get('name', '')}\n"
+        f"Location: {restaurant.get('location', '')}\n"
+        f"Cost for Two: {restaurant.get('cost_for_two', '')}\n"
+        f"Rating: {restaurant.get('rating', '')}\n"
+        f"Website URL: {restaurant.get('url', '')}\n"
+        f"Address: {restaurant.get('address', '')}\n"
+        f"Contact: {restaurant.get('contact', '')}\n"
+        f"Cuisines: {cuisines_text}\n"
+        f"{hours_info}\n"
+        f"{photos_info}\n"
+        f"{menu_summary}\n"
+        f"Description: {restaurant.get('description', '')}\n"
+    )
+
+def create_menu_section_document(restaurant, food_type, menu_items, compact=False):
+    """
+    Create a document for a menu section grouped by food type.
+    
+    Args:
+        restaurant: Restaurant data dictionary
+        food_type: Type of food for this section
+        menu_items: List of menu items in this section
+        compact (bool): Leave out the restaurant details block
+        
+    Returns:
+        str: Formatted document text
+    """
+    # Format menu items with detailed information
+    items_text = "\n".join([
+        f"  • Item: {item.get('name', '')}\n    Price: {item.get('price', '')}\n    Description: {item.get('description', '')}"
+        for item in menu_items
+    ])
+    
+    if compact:
+        return (
+            f"Restaurant: {restaurant.get('name', '')}\n"
+            f"Food Category: {food_type}\n"
+            f"\nMenu Items ({len(menu_items)} items in {food_type} category):\n{items_text}\n"
+        )
+    
+    # Create document with comprehensive restaurant information
+    return (
+        f"Restaurant: {restaurant.get('name', '')}\n"
+        f"Food Category: {food_type}\n"
+        f"Restaurant Details:\n"
+        f"  - Location: {restaurant.get('location', '')}\n"
+        f"  - Address: {restaurant.get('address', '')}\n"
+        f"  - Cuisines: {', '.join(restaurant.get('cuisines', []))}\n"
+        f"  - Rating: {restaurant.get('rating', '')}\n"
+        f"  - Cost for Two: {restaurant.get('cost_for_two', '')}\n"
+        f"  - Website: {restaurant.get('url', '')}\n"
+        f"  - Contact: {restaurant.get('contact', '')}\n"
+        f"\nMenu Items ({len(menu_items)} items in {food_type} category):\n{items_text}\n"
+    )
+
+def create_menu_item_document(restaurant, item, compact=False):
+    """
+    Create a document for an individual menu item.
+    
+    Args:
+        restaurant: Restaurant data dictionary
+        item: Menu item dictionary
+        compact (bool): Leave out the restaurant details block
+        
+    Returns:
+        str: Formatted document text
+    """
+    if compact:
+        return (
+            f"Restaurant: {restaurant.get('name', '')}\n"
+            f"Menu Item: {item.get('name', '')}\n"
+            f"Price: {item.get('price', '')}\n"
+            f"Food Type: {item.get('food_type', '')}\n"
+            f"Description: {item.get('description', '')}\n"
+        )
+    
+    return (
+        f"Restaurant: {restaurant.get('name', '')}\n"
+        f"Menu Item: {item.get('name', '')}\n"
+        f"Price: {item.get('price', '')}\n"
+        f"Food Type: {item.get('food_type', '')}\n"
+        f"Description: {item.get('description', '')}\n"
+        f"Restaurant Info:\n"
+        f"  - Cuisines: {', '.join(restaurant.get('cuisines', []))}\n"
+        f"  - Location: {restaurant.get('location', '')}\n"
+        f"  - Address: {restaurant.get('address', '')}\n"
+        f"  - Rating: {restaurant.get('rating', '')}\n"
+        f"  - Cost for Two: {restaurant.get('cost_for_two', '')}\n"
+        f"  - Website: {restaurant.get('url', '')}\n"
+        f"  - Contact: {restaurant.get('contact', '')}\n"
+    )
+
+def create_cuisine_document(restaurant, cuisines, compact=False):
+    """
+    Create a searchable document focused on cuisines.
+    
+    Args:
+        restaurant: Restaurant data dictionary
+        cuisines: List of cuisines
+        compact (bool): Leave out the restaurant details block
+        
+    Returns:
+        str: Formatted document text
+    """
+    # Format menu items with this cuisine
+    menu_items = restaurant.get('menu_items', [])
+    matching_items = []
+    
+    for item in menu_items:
+        food_type = item.get('food_type', '').lower()
+        if any(cuisine.lower() in food_type for cuisine in cuisines):
+            matching_items.append(f"- {item.get('name', '')}: {item.get('price', '')}")
+    
+    cuisine_menu_items = "\n".join(matching_items[:10])  # Limit to avoid too large documents
+    if len(matching_items) > 10:
+        cuisine_menu_items += f"\n... and {len(matching_items) - 10} more items"
+    
+    if compact:
+        return (
+            f"Restaurant: {restaurant.get('name', '')}\n"
+            f"Cuisine Types: {', '.join(cuisines)}\n"
+            f"Restaurant serves {', '.join(cuisines)} food.\n"
+            f"\nPopular items in these cuisines:\n{cuisine_menu_items if matching_items else 'No specific items found'}\n"
+        )
+    
+    return (
+        f"Restaurant: {restaurant.get('name', '')}\n"
+        f"Cuisine Types: {', '.join(cuisines)}\n"
+        f"Restaurant serves {', '.join(cuisines)} food.\n"
+        f"Location: {restaurant.get('location', '')}\n"
+        f"Address: {restaurant.get('address', '')}\n"
+        f"Rating: {restaurant.get('rating', '')}\n"
+        f"Cost for Two: {restaurant.get('cost_for_two', '')}\n"
+        f"Website: {restaurant.get('url', '')}\n"
+        f"Contact: {restaurant.get('contact', '')}\n"
+        f"\nPopular items in these cuisines:\n{cuisine_menu_items if matching_items else 'No specific items found'}\n"
+    )
+
+def create_location_document(restaurant, compact=False):
+    """
+    Create a searchable document focused on location.
+    
+    Args:
+        restaurant: Restaurant data dictionary
+        compact (bool): Leave out details other than the location
+        
+    Returns:
+        str: Formatted document text
+    """
+    if compact:
+        return (
+            f"Restaurant: {restaurant.get('name', '')}\n"
+            f"Location: {restaurant.get('location', '')}\n"
+            f"Full Address: {restaurant.get('address', '')}\n"
+            f"This restaurant is located in {restaurant.get('location', '')}.\n"
+        )
+    
+    # Format operating hours if available
+    hours_info = ""
+    if operational_hours := restaurant.get('operational_hours'):
+        hours_info = "Hours of Operation:\n"
+        for day, hours in operational_hours.items():
+            hours_info += f"  {day}: {hours}\n"
+    
+    return (
+        f"Restaurant: {restaurant.get('name', '')}\n"
+        f"Location: {restaurant.get('location', '')}\n"
+        f"Full Address: {restaurant.get('address', '')}\n"
+        f"This restaurant is located in {restaurant.get('location', '')}.\n"
+        f"Contact: {restaurant.get('contact', '')}\n"
+        f"Website: {restaurant.get('url', '')}\n"
+        f"Cuisines: {', '.join(restaurant.get('cuisines', []))}\n"
+        f"Rating: {restaurant.get('rating', '')}\n"
+        f"Cost for Two: {restaurant.get('cost_for_two', '')}\n"
+        f"{hours_info}\n"
+    )
+
+def main():
+    """Run ingestion from the command line without the Streamlit app"""
+    parser = argparse.ArgumentParser(description="Index restaurant data into ChromaDB")
+    parser.add_argument("--data-file", default=DATA_FILE, help="Restaurant JSON or JSON Lines file")
+    parser.add_argument("--full-rebuild", action="store_true", help="Ignore the manifest and re-index everything")
+    parser.add_argument("--compact", action="store_true", default=COMPACT_DOCUMENTS, help="Build compact documents")
+    parser.add_argument("--no-resume", action="store_true", help="Ignore any checkpoint from an interrupted run")
+    parser.add_argument("--no-precompute", action="store_true", help="Let Chroma embed documents itself")
+    args = parser.parse_args()
+    
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    
+    collection = open_collection()
+    stats = refresh_restaurant_data(
+        collection,
+        data_file=args.data_file,
+        precompute_embeddings=not args.no_precompute,
+        full_rebuild=args.full_rebuild,
+        compact=args.compact,
+        resume=not args.no_resume
+    )
+    logger.info(f"Collection now holds {collection.count()} documents ({stats})")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+This module keeps restaurant-level attributes in a single in-process table so
+documents can refer to a restaurant by ID instead of repeating its details.
+"""
+import os
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Restaurant attributes shared by every document of that restaurant
+RESTAURANT_FIELDS = (
+    "name", "location", "address", "contact", "url",
+    "cuisines", "rating", "cost_for_two", "operational_hours"
+)
+
+class RestaurantTable:
+    """
+    Mapping of restaurant_id to restaurant attributes, persisted as JSON.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.records = {}
+        self._mtime = None
+
+    def load(self):
+        """Load the table from disk if it changed since the last load"""
+        if not os.path.exists(self.path):
+            return self
+        mtime = os.path.getmtime(self.path)
+        if mtime == self._mtime:
+            return self
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                self.records = json.load(f)
+            self._mtime = mtime
+        except Exception as e:
+            logger.error(f"Error loading restaurant table: {str(e)}")
+        return self
+
+    def save(self):
+        """Atomically write the table to disk"""
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_file = f"{self.path}.tmp"
+        with open(tmp_file, "w", encoding="utf-8") as f:
+            json.dump(self.records, f, ensure_ascii=False)
+        os.replace(tmp_file, self.path)
+        self._mtime = os.path.getmtime(self.path)
+
+    @property
+    def version(self):
+        """Changes whenever a different copy of the table is loaded or saved"""
+        return self._mtime
+
+    def upsert(self, restaurant_id, restaurant):
+        self.records[restaurant_id] = {field: restaurant.get(field) for field in RESTAURANT_FIELDS}
+
+    def remove(self, restaurant_id):
+        self.records.pop(restaurant_id, None)
+
+    def get(self, restaurant_id):
+        return self.records.get(restaurant_id)
+
+    def __contains__(self, restaurant_id):
+        return restaurant_id in self.records
+
+    def __len__(self):
+        return len(self.records)
+
+def format_restaurant_details(record):
+    """
+    Format a restaurant table record the way full documents describe a restaurant.
+
+    Args:
+        record: Restaurant attributes from the table
+
+    Returns:
+        str: Formatted restaurant details
+    """
+    return (
+        f"Restaurant: {record.get('name') or ''}\n"
+        f"  - Location: {record.get('location') or ''}\n"
+        f"  - Address: {record.get('address') or ''}\n"
+        f"  - Cuisines: {', '.join(record.get('cuisines') or [])}\n"
+        f"  - Rating: {record.get('rating') or ''}\n"
+        f"  - Cost for Two: {record.get('cost_for_two') or ''}\n"
+        f"  - Website: {record.get('url') or ''}\n"
+        f"  - Contact: {record.get('contact') or ''}\n"
+    )
@@ -0,0 +1,453 @@
+"""
+This module builds and restores prebuilt index snapshots, so a new app
+instance can start from a finished index instead of embedding the whole
+dataset.
+
+A snapshot is a directory named after its version with the vectors as a raw
+float32 matrix (memory-mapped when read), the IDs, documents and metadata as
+JSON Lines, the ingestion manifest, restaurant table and BM25 index, and a
+manifest with a SHA-256 checksum of every file. Snapshots are written once
+and never modified.
+
+Build one with ``python -m src.database.snapshot build`` on a machine with
+the data file. App instances whose collection is empty open the latest
+snapshot in SNAPSHOT_DIR read-only: searches run on its memory-mapped
+vectors and its restaurant table and BM25 index, and nothing is written to
+Chroma or the ingestion state files. Only a snapshot older than the
+local data file is imported into the collection, so the delta update can
+embed just what changed.
+"""
+import os
+import json
+import time
+import shutil
+import hashlib
+import logging
+import argparse
+import numpy as np
+from src.database.ingestion import (
+    BATCH_SIZE,
+    COLLECTION_NAME,
+    DATA_FILE,
+    CHROMA_PERSIST_DIR,
+    MANIFEST_FILE,
+    RESTAURANT_TABLE_FILE,
+    BM25_INDEX_FILE,
+    file_fingerprint,
+    open_collection,
+    refresh_restaurant_data,
+    use_state_dir
+)
+from src.database.vector_store import NumpyVectorStore, attach_vector_store, collection_space, read_records
+
+logger = logging.getLogger(__name__)
+
+# Directory holding one subdirectory per snapshot version
+SNAPSHOT_DIR = os.getenv("SNAPSHOT_DIR", "snapshots")
+# Version to restore; empty restores the latest
+SNAPSHOT_VERSION = os.getenv("SNAPSHOT_VERSION", "")
+# Restore a snapshot into an empty collection at startup
+SNAPSHOT_RESTORE = os.getenv("SNAPSHOT_RESTORE", "true").lower() == "true"
+# Check file checksums before restoring
+SNAPSHOT_VERIFY = os.getenv("SNAPSHOT_VERIFY", "true").lower() == "true"
+# Snapshots that passed verification, with the size and mtime of their files
+# at the time, so startup only checksums a snapshot again if its files changed
+VERIFIED_SNAPSHOTS_FILE = os.path.join(CHROMA_PERSIST_DIR, "verified_snapshots.json")
+
+SNAPSHOT_FORMAT = 1
+SNAPSHOT_MANIFEST = "manifest.json"
+LATEST_FILE = "LATEST"
+VECTORS_FILE = "vectors.f32"
+RECORDS_FILE = "records.jsonl"
+# Ingestion state restored next to the Chroma data, by snapshot file name
+STATE_FILES = {
+    "index_manifest.json": MANIFEST_FILE,
+    "restaurant_table.json": RESTAURANT_TABLE_FILE,
+    "bm25_index.json": BM25_INDEX_FILE
+}
+CHECKSUM_CHUNK_SIZE = 1 << 20
+
+class Snapshot:
+    """A snapshot on disk, with its vectors memory-mapped read-only"""
+
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, SNAPSHOT_MANIFEST), "r", encoding="utf-8") as f:
+            self.manifest = json.load(f)
+        if self.manifest.get("format") != SNAPSHOT_FORMAT:
+            raise ValueError(f"Unsupported snapshot format {self.manifest.get('format')} in {path}")
+        self.version = self.manifest["version"]
+        self.count = self.manifest["count"]
+        self.dimension = self.manifest["dimension"]
+
+    @property
+    def vectors(self):
+        """The embeddings as a read-only (count, dimension) float32 array backed by the file"""
+        if not self.count:
+            return np.zeros((0, self.dimension), dtype=np.float32)
+        return np.memmap(
+            os.path.join(self.path, VECTORS_FILE), dtype=np.float32, mode="r",
+            shape=(self.count, self.dimension)
+        )
+
+    def records(self):
+        """Yield (id, document, metadata) in the order of the vectors"""
+        return read_records(os.path.join(self.path, RECORDS_FILE))
+
+    def open_vector_store(self):
+        """Exact search over the snapshot's memory-mapped vectors, without copying them"""
+        return NumpyVectorStore(
+            self.vectors,
+            self.records(),
+            # Snapshots written before the space was recorded come from the
+            # app collection, which uses the embedding function's cosine space
+            space=self.manifest.get("space", "cosine"),
+            version=f"snapshot-{self.version}"
+        )
+
+    def is_current(self, data_file=DATA_FILE):
+        """
+        Check whether the snapshot was built from the local data file.
+
+        An instance without the data file can only serve what it was given,
+        so the snapshot counts as current there.
+        """
+        if not os.path.exists(data_file):
+            return True
+        recorded = self.manifest.get("data_files", {}).get(os.path.basename(data_file))
+        return recorded == file_checksum(data_file)
+
+    def verify(self):
+        """
+        Check every file against the checksums in the manifest.
+
+        Returns:
+            list: Names of missing or corrupted files; empty if the snapshot is intact
+        """
+        bad_files = []
+        for name, expected in self.manifest["files"].items():
+            path = os.path.join(self.path, name)
+            if not os.path.exists(path) or os.path.getsize(path) != expected["bytes"] \
+                    or file_checksum(path) != expected["sha256"]:
+                bad_files.append(name)
+        return bad_files
+
+    def fingerprint(self):
+        """Size and modification time of every file, or None if one is missing"""
+        try:
+            return {name: file_fingerprint(os.path.join(self.path, name)) for name in self.manifest["files"]}
+        except OSError:
+            return None
+
+def build_snapshot(collection, output_dir=SNAPSHOT_DIR, data_file=DATA_FILE):
+    """
+    Write the collection and the ingestion state as a new snapshot.
+
+    Args:
+        collection: ChromaDB collection to export
+        output_dir (str): Directory holding the snapshot versions
+        data_file (str): Data file the collection was indexed from; its
+            checksum tells instances whether the snapshot is current
+
+    Returns:
+        Snapshot: The written snapshot
+    """
+    from src.models.encoding import EMBEDDING_MODEL_NAME, embedding_model_id
+
+    start_time = time.time()
+    tmp_path = os.path.join(output_dir, f".building-{os.getpid()}")
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    os.makedirs(tmp_path)
+
+    count = 0
+    dimension = None
+    with open(os.path.join(tmp_path, VECTORS_FILE), "wb") as vectors_file, \
+            open(os.path.join(tmp_path, RECORDS_FILE), "w", encoding="utf-8") as records_file:
+        total = collection.count()
+        for offset in range(0, total, BATCH_SIZE):
+            batch = collection.get(
+                limit=BATCH_SIZE, offset=offset, include=["embeddings", "documents", "metadatas"]
+            )
+            embeddings = np.asarray(batch['embeddings'], dtype=np.float32)
+            if len(embeddings):
+                dimension = embeddings.shape[1]
+                vectors_file.write(embeddings.tobytes())
+            for doc_id, document, metadata in zip(batch['ids'], batch['documents'], batch['metadatas']):
+                records_file.write(json.dumps(
+                    {"id": doc_id, "document": document, "metadata": metadata}, ensure_ascii=False
+                ) + "\n")
+            count += len(batch['ids'])
+
+    for name, source_path in STATE_FILES.items():
+        if os.path.exists(source_path):
+            shutil.copyfile(source_path, os.path.join(tmp_path, name))
+
+    files = {
+        name: {"sha256": file_checksum(os.path.join(tmp_path, name)),
+               "bytes": os.path.getsize(os.path.join(tmp_path, name))}
+        for name in sorted(os.listdir(tmp_path))
+    }
+    # The version identifies the content, so rebuilding an unchanged index gives the same version
+    version = hashlib.sha256(json.dumps(files, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+    manifest = {
+        "format": SNAPSHOT_FORMAT,
+        "version": version,
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "collection": collection.name,
+        "embedding_model": EMBEDDING_MODEL_NAME,
+        "embedding_backend": embedding_model_id(),
+        "dimension": dimension or 0,
+        "count": count,
+        "space": collection_space(collection),
+        "data_files": {os.path.basename(data_file): file_checksum(data_file)} if os.path.exists(data_file) else {},
+        "files": files
+    }
+    with open(os.path.join(tmp_path, SNAPSHOT_MANIFEST), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+
+    # Snapshots are never modified after they are written
+    for name in os.listdir(tmp_path):
+        os.chmod(os.path.join(tmp_path, name), 0o444)
+
+    path = os.path.join(output_dir, version)
+    if os.path.exists(path):
+        shutil.rmtree(tmp_path)
+        logger.info(f"Snapshot {version} already exists")
+    else:
+        os.replace(tmp_path, path)
+    write_latest(output_dir, version)
+
+    logger.info(f"Wrote snapshot {version}: {count} documents in {time.time() - start_time:.2f} seconds")
+    return Snapshot(path)
+
+def restore_snapshot(collection, snapshot, verify=SNAPSHOT_VERIFY):
+    """
+    Load a snapshot into a collection with its stored vectors, without embedding.
+
+    Args:
+        collection: ChromaDB collection to restore into
+        snapshot: Snapshot to restore
+        verify (bool): Check the file checksums first
+
+    Returns:
+        bool: Whether the snapshot was restored
+    """
+    if not check_snapshot(snapshot, verify):
+        return False
+
+    start_time = time.time()
+    vectors = snapshot.vectors
+    ids, documents, metadatas = [], [], []
+
+    def flush(end):
+        start = end - len(ids)
+        collection.upsert(
+            ids=ids, documents=documents, metadatas=metadatas, embeddings=vectors[start:end]
+        )
+        ids.clear()
+        documents.clear()
+        metadatas.clear()
+
+    position = 0
+    for doc_id, document, metadata in snapshot.records():
+        ids.append(doc_id)
+        documents.append(document)
+        metadatas.append(metadata)
+        position += 1
+        if len(ids) >= BATCH_SIZE:
+            flush(position)
+    if ids:
+        flush(position)
+
+    copy_state_files(snapshot)
+
+    logger.info(
+        f"Restored snapshot {snapshot.version}: {snapshot.count} documents "
+        f"in {time.time() - start_time:.2f} seconds"
+    )
+    return True
+
+def check_snapshot(snapshot, verify=SNAPSHOT_VERIFY):
+    """
+    Check that a snapshot can be used by this instance.
+
+    Its vectors must come from the configured embedding model and backend, or
+    query embeddings would not be comparable with them, and with verify its
+    files must match their checksums.
+
+    Returns:
+        bool: Whether the snapshot is usable; problems are logged
+    """
+    from src.models.encoding import EMBEDDING_MODEL_NAME, embedding_model_id
+
+    expected = {"embedding_model": EMBEDDING_MODEL_NAME, "embedding_backend": embedding_model_id()}
+    for field, value in expected.items():
+        if snapshot.manifest.get(field) != value:
+            logger.warning(
+                f"Snapshot {snapshot.version} was built with {field} {snapshot.manifest.get(field)}, "
+                f"not {value}; ignoring it"
+            )
+            return False
+    if verify and not is_verified(snapshot):
+        if bad_files := snapshot.verify():
+            logger.error(f"Snapshot {snapshot.version} is corrupted ({', '.join(bad_files)}); ignoring it")
+            return False
+        mark_verified(snapshot)
+    return True
+
+def load_verified():
+    try:
+        with open(VERIFIED_SNAPSHOTS_FILE, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def is_verified(snapshot):
+    """Whether the snapshot passed verification and its files are unchanged since"""
+    fingerprint = snapshot.fingerprint()
+    return fingerprint is not None and load_verified().get(snapshot.version) == fingerprint
+
+def mark_verified(snapshot):
+    verified = load_verified()
+    verified[snapshot.version] = snapshot.fingerprint()
+    try:
+        os.makedirs(os.path.dirname(VERIFIED_SNAPSHOTS_FILE) or ".", exist_ok=True)
+        tmp_file = f"{VERIFIED_SNAPSHOTS_FILE}.tmp"
+        with open(tmp_file, "w", encoding="utf-8") as f:
+            json.dump(verified, f)
+        os.replace(tmp_file, VERIFIED_SNAPSHOTS_FILE)
+    except OSError as e:
+        # Only costs a checksum pass on the next start
+        logger.warning(f"Could not record snapshot verification: {str(e)}")
+
+def copy_state_files(snapshot):
+    # Copies, so later delta updates never touch the snapshot itself
+    for name, target_path in STATE_FILES.items():
+        source_path = os.path.join(snapshot.path, name)
+        if os.path.exists(source_path):
+            os.makedirs(os.path.dirname(target_path) or ".", exist_ok=True)
+            shutil.copyfile(source_path, target_path)
+
+def find_snapshot(snapshot_dir=SNAPSHOT_DIR, version=SNAPSHOT_VERSION):
+    """
+    Find the snapshot to restore.
+
+    Args:
+        snapshot_dir (str): Directory holding the snapshot versions
+        version (str): Version to use; empty for the latest
+
+    Returns:
+        Snapshot: The snapshot, or None if there is none
+    """
+    version = version or read_latest(snapshot_dir)
+    if not version:
+        return None
+    path = os.path.join(snapshot_dir, version)
+    if not os.path.isdir(path):
+        logger.warning(f"Snapshot {version} not found in {snapshot_dir}")
+        return None
+    try:
+        return Snapshot(path)
+    except Exception as e:
+        logger.error(f"Error opening snapshot {version}: {str(e)}")
+        return None
+
+def open_latest_snapshot(collection):
+    """
+    Fill an empty collection from the configured snapshot, if there is one.
+
+    A snapshot built from the current data file is opened read-only and
+    attached as the collection's vector store, and its restaurant table and
+    BM25 index are read in place, so startup only maps its files and the
+    ingestion state stays untouched.
+    An outdated snapshot is imported into the collection, so the delta update
+    that follows embeds only what changed since it was built.
+
+    Args:
+        collection: Empty ChromaDB collection
+
+    Returns:
+        str: "attached", "imported", or None if no usable snapshot was found
+    """
+    if not SNAPSHOT_RESTORE or collection.count():
+        return None
+    snapshot = find_snapshot()
+    if snapshot is None or not check_snapshot(snapshot):
+        return None
+
+    if snapshot.is_current():
+        start_time = time.time()
+        store = snapshot.open_vector_store()
+        use_state_dir(snapshot.path)
+        attach_vector_store(collection, store)
+        logger.info(
+            f"Serving snapshot {snapshot.version} read-only: {len(store)} documents "
+            f"opened in {time.time() - start_time:.2f} seconds"
+        )
+        return "attached"
+
+    logger.info(f"Snapshot {snapshot.version} is older than {os.path.basename(DATA_FILE)}; importing it")
+    return "imported" if restore_snapshot(collection, snapshot, verify=False) else None
+
+def read_latest(snapshot_dir):
+    try:
+        with open(os.path.join(snapshot_dir, LATEST_FILE), "r", encoding="utf-8") as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+def write_latest(snapshot_dir, version):
+    tmp_file = os.path.join(snapshot_dir, f"{LATEST_FILE}.tmp")
+    with open(tmp_file, "w", encoding="utf-8") as f:
+        f.write(version + "\n")
+    os.replace(tmp_file, os.path.join(snapshot_dir, LATEST_FILE))
+
+def file_checksum(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(CHECKSUM_CHUNK_SIZE):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def main():
+    """Build, verify or list index snapshots from the command line"""
+    parser = argparse.ArgumentParser(description="Build and inspect prebuilt index snapshots")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    build_parser = subparsers.add_parser("build", help="Index the data file and write a snapshot")
+    build_parser.add_argument("--output-dir", default=SNAPSHOT_DIR, help="Directory for snapshots")
+    build_parser.add_argument("--skip-refresh", action="store_true",
+                              help="Snapshot the collection as it is, without syncing the data file first")
+    verify_parser = subparsers.add_parser("verify", help="Check a snapshot's checksums")
+    verify_parser.add_argument("version", nargs="?", default=SNAPSHOT_VERSION, help="Version (default latest)")
+    verify_parser.add_argument("--snapshot-dir", default=SNAPSHOT_DIR, help="Directory with snapshots")
+    list_parser = subparsers.add_parser("list", help="List snapshots")
+    list_parser.add_argument("--snapshot-dir", default=SNAPSHOT_DIR, help="Directory with snapshots")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    if args.command == "build":
+        collection = open_collection(collection_name=COLLECTION_NAME)
+        if not args.skip_refresh:
+            refresh_restaurant_data(collection)
+        snapshot = build_snapshot(collection, output_dir=args.output_dir)
+        print(f"Snapshot {snapshot.version}: {snapshot.count} documents in {snapshot.path}")
+    elif args.command == "verify":
+        snapshot = find_snapshot(args.snapshot_dir, args.version)
+        if snapshot is None:
+            raise SystemExit("No snapshot found")
+        bad_files = snapshot.verify()
+        print(f"Snapshot {snapshot.version}: {'corrupted: ' + ', '.join(bad_files) if bad_files else 'OK'}")
+        raise SystemExit(1 if bad_files else 0)
+    else:
+        latest = read_latest(args.snapshot_dir)
+        if os.path.isdir(args.snapshot_dir):
+            for version in sorted(os.listdir(args.snapshot_dir)):
+                path = os.path.join(args.snapshot_dir, version)
+                if os.path.exists(os.path.join(path, SNAPSHOT_MANIFEST)):
+                    snapshot = Snapshot(path)
+                    print(f"{version}{' (latest)' if version == latest else ''}  "
+                          f"{snapshot.manifest['created_at']}  {snapshot.count} documents")
+
+if __name__ == "__main__":
+    main()
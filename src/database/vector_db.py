@@ -3,389 +3,299 @@ This module handles vector database operations for the agentic chatbot.
 """
 import os
 import json
-import time
 import logging
-import streamlit as st
-import chromadb
-from src.models.embeddings import get_embedding_function
+from contextlib import nullcontext
+from src.models.encoding import embed_query
+from src.database.query_cache import LRUCache
+from src.database.snapshot import open_latest_snapshot
+from src.database.vector_store import open_vector_store, attach_vector_store
+from src.database.ingestion import (
+    COLLECTION_NAME,
+    DATA_FILE,
+    CHROMA_PERSIST_DIR,
+    PRECOMPUTE_EMBEDDINGS,
+    index_version,
+    open_collection,
+    refresh_restaurant_data,
+    load_checkpoint,
+    load_manifest,
+    get_restaurant_table,
+    get_bm25_index,
+    sync_bm25_index,
+    delete_orphaned_documents,
+    use_state_dir,
+    iter_restaurants,
+    restaurant_key,
+    build_restaurant_documents,
+    create_restaurant_document,
+    create_menu_section_document,
+    create_menu_item_document,
+    create_cuisine_document,
+    create_location_document
+)
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
-# Database settings
-COLLECTION_NAME = "restaurant_data"
-BATCH_SIZE = 100
-DATA_FILE = "data/1combined_restaurants.json"
-CHROMA_PERSIST_DIR = "chroma_db"
+# Query caching: embeddings by query text, results by query, filter and index version
+QUERY_CACHE_SIZE = int(os.getenv("QUERY_CACHE_SIZE", "1024"))
+QUERY_CACHE_TTL = int(os.getenv("QUERY_CACHE_TTL", "3600"))
+_query_vectors = LRUCache(QUERY_CACHE_SIZE, QUERY_CACHE_TTL)
+_query_results = LRUCache(QUERY_CACHE_SIZE, QUERY_CACHE_TTL)
 
-@st.cache_resource
-def setup_chromadb():
+# Hybrid retrieval: BM25 keyword hits fused with the vector ranking
+HYBRID_SEARCH = os.getenv("HYBRID_SEARCH", "true").lower() == "true"
+# Reciprocal-rank fusion constant; higher values flatten the rank weights
+RRF_K = int(os.getenv("RRF_K", "60"))
+
+def prepare_collection(spinner=None):
+    """
+    Open the persistent collection and bring it up to date with the data file.
     
-    # Create a persistent client with the specified directory
-    client = chromadb.PersistentClient(path=CHROMA_PERSIST_DIR)
+    Nothing here needs a Streamlit script run, so the app can call it from its
+    warm-up thread.
     
-    # Get embedding function
-    embedding_func = get_embedding_function()
+    Args:
+        spinner (callable, optional): Takes a message and returns a context
+            manager shown while the index is built or updated
+        
+    Returns:
+        collection: ChromaDB collection
+    """
+    spinner = spinner or (lambda message: nullcontext())
     
-    # Check if collection already exists
-    try:
-        # Try to get the existing collection first
-        collection = client.get_collection(
-            name=COLLECTION_NAME,
-            embedding_function=embedding_func
-        )
+    # Open (or create) the persistent collection
+    collection = open_collection()
+    source = os.path.basename(DATA_FILE)
+    
+    # A current prebuilt snapshot is served read-only without touching
+    # Chroma; an outdated one is imported and the delta update below picks up
+    # the data changes made since it was built
+    if collection.count() == 0:
+        try:
+            with spinner("Loading the prebuilt restaurant index..."):
+                snapshot_state = open_latest_snapshot(collection)
+        except Exception as e:
+            logger.exception(f"Error loading the prebuilt index, indexing the data file instead: {str(e)}")
+            attach_vector_store(collection, None)
+            use_state_dir(CHROMA_PERSIST_DIR)
+            # Drop whatever a failed import wrote, so the build starts clean
+            delete_orphaned_documents(collection, set())
+            snapshot_state = None
+        if snapshot_state == "attached":
+            return collection
+    
+    if collection.count() == 0:
+        # Load data into a new collection
+        with spinner("Setting up database for the first time..."):
+            load_restaurant_data(collection)
+    elif source in load_manifest()["sources"] or load_checkpoint(source):
+        # Bring an existing index up to date, resuming an interrupted build
         logger.info(f"Connected to existing vector database with {collection.count()} documents")
-    except Exception:
-        # Collection doesn't exist, create it and load data
-        collection = client.create_collection(
-            name=COLLECTION_NAME,
-            embedding_function=embedding_func
+        with spinner("Updating the restaurant database..."):
+            load_restaurant_data(collection, full_rebuild=False)
+        invalidate_query_cache()
+    else:
+        logger.warning(
+            "Existing collection has no index manifest; delete the "
+            f"{CHROMA_PERSIST_DIR} directory to rebuild it with content-addressed IDs"
         )
-        
-        # Load data into collection
-        with st.spinner("Setting up database for the first time..."):
-            load_restaurant_data(collection)
+        sync_bm25_index(collection)
     
     return collection
 
-def load_restaurant_data(collection):
+def warm_up_collection(collection):
+    """
+    Load what the first query needs: the embedding model, the vector index
+    pages (exporting the NumPy index if that backend is selected), the BM25
+    index and the restaurant table.
+    
+    Args:
+        collection: ChromaDB collection
+    """
+    query_embedding = embed_query("restaurant")
+    store = open_vector_store(collection)
+    if store.count():
+        store.search(query_embedding, n_results=1)
+    get_bm25_index().search("restaurant", k=1)
+    get_restaurant_table()
+
+def load_restaurant_data(collection, precompute_embeddings=PRECOMPUTE_EMBEDDINGS, full_rebuild=True):
 
     # Load restaurant data from JSON file and add to ChromaDB collection.
+    # Progress is checkpointed per batch, so a failed build resumes from the
+    # last committed batch the next time the app starts. Errors are raised,
+    # not shown, since this runs in the warm-up thread; the app displays them.
 
-    start_time = time.time()
-    
     try:
-        # Load the data file
-        with open(DATA_FILE, "r", encoding="utf-8") as f:
-            restaurant_data = json.load(f)
-        
-        logger.info(f"Processing {len(restaurant_data)} restaurants...")
-        
-        # Initialize empty lists for batch processing
-        ids = []
-        documents = []
-        metadatas = []
-        
-        # Process each restaurant
-        for idx, restaurant in enumerate(restaurant_data):
-            # 1. Create a document for the restaurant overview
-            restaurant_info = create_restaurant_document(restaurant)
-            
-            # Add to batch
-            doc_id = f"restaurant_{idx}"
-            ids.append(doc_id)
-            documents.append(restaurant_info)
-            metadatas.append({
-                "type": "restaurant_info",
-                "name": restaurant.get('name', 'Unknown'),
-                "location": restaurant.get('location', 'Unknown'),
-                "rating": restaurant.get('rating', 'Unknown'),
-                "cuisines": ",".join(restaurant.get('cuisines', [])),
-                "cost": restaurant.get('cost_for_two', 'Unknown'),
-                "url": restaurant.get('url', 'Unknown'),
-                "contact": restaurant.get('contact', 'Unknown'),
-                "address": restaurant.get('address', 'Unknown')
-            })
-            
-            # 2. Add all menu items individually for better search coverage
-            menu_items = restaurant.get('menu_items', [])
-            for menu_idx, item in enumerate(menu_items):
-                menu_item_info = create_menu_item_document(restaurant, item)
-                
-                doc_id = f"item_{idx}_{menu_idx}"
-                ids.append(doc_id)
-                documents.append(menu_item_info)
-                metadatas.append({
-                    "type": "menu_item",
-                    "restaurant": restaurant.get('name', 'Unknown'),
-                    "food_type": item.get('food_type', 'Unknown'),
-                    "item_name": item.get('name', 'Unknown'),
-                    "price": item.get('price', 'Unknown'),
-                    "restaurant_location": restaurant.get('location', 'Unknown'),
-                    "restaurant_cuisines": ",".join(restaurant.get('cuisines', [])),
-                    "restaurant_rating": restaurant.get('rating', 'Unknown'),
-                    "restaurant_url": restaurant.get('url', 'Unknown')
-                })
-            
-            # 3. Create searchable cuisine documents for each restaurant
-            cuisines = restaurant.get('cuisines', [])
-            if cuisines:
-                cuisine_info = create_cuisine_document(restaurant, cuisines)
-                
-                doc_id = f"cuisine_{idx}"
-                ids.append(doc_id)
-                documents.append(cuisine_info)
-                metadatas.append({
-                    "type": "cuisine_info",
-                    "restaurant": restaurant.get('name', 'Unknown'),
-                    "cuisines": ",".join(cuisines),
-                    "location": restaurant.get('location', 'Unknown'),
-                    "rating": restaurant.get('rating', 'Unknown'),
-                    "cost": restaurant.get('cost_for_two', 'Unknown'),
-                    "url": restaurant.get('url', 'Unknown')
-                })
-            
-            # 4. Create searchable location documents
-            location_info = create_location_document(restaurant)
-            
-            doc_id = f"location_{idx}"
-            ids.append(doc_id)
-            documents.append(location_info)
-            metadatas.append({
-                "type": "location_info",
-                "restaurant": restaurant.get('name', 'Unknown'),
-                "location": restaurant.get('location', 'Unknown'),
-                "address": restaurant.get('address', 'Unknown'),
-                "cuisines": ",".join(restaurant.get('cuisines', [])),
-                "rating": restaurant.get('rating', 'Unknown'),
-                "cost": restaurant.get('cost_for_two', 'Unknown'),
-                "url": restaurant.get('url', 'Unknown')
-            })
-            
-            # 5. Group menu items by food type for categorized searching
-            menu_by_type = {}
-            for item in menu_items:
-                food_type = item.get('food_type', 'Other')
-                if food_type not in menu_by_type:
-                    menu_by_type[food_type] = []
-                menu_by_type[food_type].append(item)
-            
-            # Create a document for each food type
-            for food_type, items in menu_by_type.items():
-                menu_info = create_menu_section_document(restaurant, food_type, items)
-                
-                doc_id = f"menu_{idx}_{food_type}"
-                ids.append(doc_id)
-                documents.append(menu_info)
-                metadatas.append({
-                    "type": "menu_section",
-                    "restaurant": restaurant.get('name', 'Unknown'),
-                    "food_type": food_type,
-                    "item_count": len(items),
-                    "location": restaurant.get('location', 'Unknown'),
-                    "cuisines": ",".join(restaurant.get('cuisines', [])),
-                    "rating": restaurant.get('rating', 'Unknown'),
-                    "cost": restaurant.get('cost_for_two', 'Unknown'),
-                    "url": restaurant.get('url', 'Unknown')
-                })
-        
-        # Add data to collection in batches
-        total_added = 0
-        for i in range(0, len(ids), BATCH_SIZE):
-            end_idx = min(i + BATCH_SIZE, len(ids))
-            batch_ids = ids[i:end_idx]
-            batch_docs = documents[i:end_idx]
-            batch_meta = metadatas[i:end_idx]
-            
-            collection.add(
-                ids=batch_ids,
-                documents=batch_docs,
-                metadatas=batch_meta
-            )
-            total_added += len(batch_ids)
-        
-        elapsed_time = time.time() - start_time
-        logger.info(f"Vector database created with {total_added} documents in {elapsed_time:.2f} seconds")
-        
-        return total_added
+        stats = refresh_restaurant_data(
+            collection,
+            data_file=DATA_FILE,
+            precompute_embeddings=precompute_embeddings,
+            full_rebuild=full_rebuild
+        )
+        return stats["added"]
         
     except Exception as e:
-        logger.error(f"Error loading restaurant data: {str(e)}")
-        st.error("There was an error loading the restaurant data.")
-        return 0
+        logger.exception(f"Error loading restaurant data: {str(e)}")
+        raise RuntimeError(
+            "There was an error loading the restaurant data. Progress has been saved "
+            "and indexing will resume on the next start, or run `python -m src.database.ingestion`."
+        ) from e
 
-def create_restaurant_document(restaurant):
+def query_database(query, collection, n_results=20, where=None):
     """
-    Create a document for restaurant overview information.
+    Query the vector database for relevant documents.
+    
+    The vector search runs on the backend selected by VECTOR_STORE_BACKEND.
+    Query embeddings and raw results are cached; cached results are keyed by
+    the collection version, so they are dropped as soon as the index changes.
+    The returned dict may be shared with other callers and must not be modified.
     
     Args:
-        restaurant: Restaurant data dictionary
+        query (str): The user query to find relevant documents for
+        collection: ChromaDB collection to query
+        n_results (int): Number of results to return (default increased to 20)
+        where (dict, optional): Metadata filter applied before the vector search
         
     Returns:
-        str: Formatted document text
+        dict: Query results from ChromaDB
     """
-    # Format hours of operation if available
-    hours_info = ""
-    if operational_hours := restaurant.get('operational_hours'):
-        hours_info = "Hours of Operation:\n"
-        for day, hours in operational_hours.items():
-            hours_info += f"  {day}: {hours}\n"
+    normalized_query = normalize_query(query)
+    cache_key = (
+        normalized_query,
+        n_results,
+        json.dumps(where, sort_keys=True),
+        collection_version(collection)
+    )
+    if (results := _query_results.get(cache_key)) is not None:
+        return results
     
-    # Format cuisines if available
-    cuisines_text = ", ".join(restaurant.get('cuisines', []))
+    query_embedding = get_query_embedding(query)
     
-    # Format photos if available
-    photos_info = ""
-    if photos := restaurant.get('photos', []):
-        photos_info = "Photos:\n"
-        for photo_url in photos:
-            photos_info += f"  {photo_url}\n"
+    # Increased n_results to ensure comprehensive coverage and more restaurant options
+    results = open_vector_store(collection).search(query_embedding, n_results=n_results, where=where)
     
-    # Format menu items summary
-    menu_summary = ""
-    if menu_items := restaurant.get('menu_items', []):
-        menu_summary = f"Menu Items: {len(menu_items)} items available\n"
+    if HYBRID_SEARCH:
+        keyword_results = keyword_search(query, collection, n_results, where)
+        if keyword_results['ids']:
+            results = fuse_results(results, keyword_results, n_results)
     
-    # Create a more searchable document with clear field markers
-    return (
-        f"Restaurant Name: {restaurant.get('name', '')}\n"
-        f"Location: {restaurant.get('location', '')}\n"
-        f"Cost for Two: {restaurant.get('cost_for_two', '')}\n"
-        f"Rating: {restaurant.get('rating', '')}\n"
-        f"Website URL: {restaurant.get('url', '')}\n"
-        f"Address: {restaurant.get('address', '')}\n"
-        f"Contact: {restaurant.get('contact', '')}\n"
-        f"Cuisines: {cuisines_text}\n"
-        f"{hours_info}\n"
-        f"{photos_info}\n"
-        f"{menu_summary}\n"
-        f"Description: {restaurant.get('description', '')}\n"
-    )
+    _query_results.set(cache_key, results)
+    return results
 
-def create_menu_section_document(restaurant, food_type, menu_items):
+def keyword_search(query, collection, n_results=20, where=None):
     """
-    Create a document for a menu section grouped by food type.
+    Find documents matching the query's keywords with the BM25 index.
     
     Args:
-        restaurant: Restaurant data dictionary
-        food_type: Type of food for this section
-        menu_items: List of menu items in this section
+        query (str): The user query
+        collection: ChromaDB collection the index covers
+        n_results (int): Number of results to return
+        where (dict, optional): Metadata filter the results must satisfy
         
     Returns:
-        str: Formatted document text
+        dict: ids, documents and metadatas of the matches, best first
     """
-    # Format menu items with detailed information
-    items_text = "\n".join([
-        f"  • Item: {item.get('name', '')}\n    Price: {item.get('price', '')}\n    Description: {item.get('description', '')}"
-        for item in menu_items
-    ])
+    hits = get_bm25_index().search(query, k=n_results)
+    if not hits:
+        return {"ids": [], "documents": [], "metadatas": []}
     
-    # Create document with comprehensive restaurant information
-    return (
-        f"Restaurant: {restaurant.get('name', '')}\n"
-        f"Food Category: {food_type}\n"
-        f"Restaurant Details:\n"
-        f"  - Location: {restaurant.get('location', '')}\n"
-        f"  - Address: {restaurant.get('address', '')}\n"
-        f"  - Cuisines: {', '.join(restaurant.get('cuisines', []))}\n"
-        f"  - Rating: {restaurant.get('rating', '')}\n"
-        f"  - Cost for Two: {restaurant.get('cost_for_two', '')}\n"
-        f"  - Website: {restaurant.get('url', '')}\n"
-        f"  - Contact: {restaurant.get('contact', '')}\n"
-        f"\nMenu Items ({len(menu_items)} items in {food_type} category):\n{items_text}\n"
-    )
+    # Fetch the matches from the vector store, which also applies the filter
+    ranked_ids = [doc_id for doc_id, _ in hits]
+    stored = open_vector_store(collection).get(ranked_ids, where=where)
+    found = {
+        doc_id: (document, metadata)
+        for doc_id, document, metadata in zip(stored['ids'], stored['documents'], stored['metadatas'])
+    }
+    ids = [doc_id for doc_id in ranked_ids if doc_id in found]
+    return {
+        "ids": ids,
+        "documents": [found[doc_id][0] for doc_id in ids],
+        "metadatas": [found[doc_id][1] for doc_id in ids]
+    }
 
-def create_menu_item_document(restaurant, item):
+def fuse_results(vector_results, keyword_results, n_results):
     """
-    Create a document for an individual menu item.
+    Merge vector and keyword rankings with reciprocal-rank fusion.
+    
+    Every document scores 1 / (RRF_K + rank) in each ranking it appears in.
+    The fused score is reported as a distance (1 / normalized score - 1), so
+    documents ranked first by both searches get distance 0 and consumers
+    that rank by distance keep working.
     
     Args:
-        restaurant: Restaurant data dictionary
-        item: Menu item dictionary
+        vector_results (dict): Results of the vector query
+        keyword_results (dict): Results of keyword_search
+        n_results (int): Number of results to return
         
     Returns:
-        str: Formatted document text
+        dict: Fused results in the vector query's format
     """
-    return (
-        f"Restaurant: {restaurant.get('name', '')}\n"
-        f"Menu Item: {item.get('name', '')}\n"
-        f"Price: {item.get('price', '')}\n"
-        f"Food Type: {item.get('food_type', '')}\n"
-        f"Description: {item.get('description', '')}\n"
-        f"Restaurant Info:\n"
-        f"  - Cuisines: {', '.join(restaurant.get('cuisines', []))}\n"
-        f"  - Location: {restaurant.get('location', '')}\n"
-        f"  - Address: {restaurant.get('address', '')}\n"
-        f"  - Rating: {restaurant.get('rating', '')}\n"
-        f"  - Cost for Two: {restaurant.get('cost_for_two', '')}\n"
-        f"  - Website: {restaurant.get('url', '')}\n"
-        f"  - Contact: {restaurant.get('contact', '')}\n"
+    scores = {}
+    documents = {}
+    rankings = (
+        zip(vector_results['ids'][0], vector_results['documents'][0], vector_results['metadatas'][0]),
+        zip(keyword_results['ids'], keyword_results['documents'], keyword_results['metadatas'])
     )
+    for ranking in rankings:
+        for rank, (doc_id, document, metadata) in enumerate(ranking, start=1):
+            scores[doc_id] = scores.get(doc_id, 0.0) + 1.0 / (RRF_K + rank)
+            documents[doc_id] = (document, metadata)
+    
+    best_score = 2.0 / (RRF_K + 1)
+    fused_ids = sorted(scores, key=scores.get, reverse=True)[:n_results]
+    return {
+        "ids": [fused_ids],
+        "documents": [[documents[doc_id][0] for doc_id in fused_ids]],
+        "metadatas": [[documents[doc_id][1] for doc_id in fused_ids]],
+        "distances": [[best_score / scores[doc_id] - 1.0 for doc_id in fused_ids]]
+    }
 
-def create_cuisine_document(restaurant, cuisines):
+def get_query_embedding(query):
     """
-    Create a searchable document focused on cuisines.
+    Return the embedding of a query, reusing it if the query was seen recently.
     
     Args:
-        restaurant: Restaurant data dictionary
-        cuisines: List of cuisines
+        query (str): The user query
         
     Returns:
-        str: Formatted document text
+        list: Query embedding
     """
-    # Format menu items with this cuisine
-    menu_items = restaurant.get('menu_items', [])
-    matching_items = []
-    
-    for item in menu_items:
-        food_type = item.get('food_type', '').lower()
-        if any(cuisine.lower() in food_type for cuisine in cuisines):
-            matching_items.append(f"- {item.get('name', '')}: {item.get('price', '')}")
-    
-    cuisine_menu_items = "\n".join(matching_items[:10])  # Limit to avoid too large documents
-    if len(matching_items) > 10:
-        cuisine_menu_items += f"\n... and {len(matching_items) - 10} more items"
-    
-    return (
-        f"Restaurant: {restaurant.get('name', '')}\n"
-        f"Cuisine Types: {', '.join(cuisines)}\n"
-        f"Restaurant serves {', '.join(cuisines)} food.\n"
-        f"Location: {restaurant.get('location', '')}\n"
-        f"Address: {restaurant.get('address', '')}\n"
-        f"Rating: {restaurant.get('rating', '')}\n"
-        f"Cost for Two: {restaurant.get('cost_for_two', '')}\n"
-        f"Website: {restaurant.get('url', '')}\n"
-        f"Contact: {restaurant.get('contact', '')}\n"
-        f"\nPopular items in these cuisines:\n{cuisine_menu_items if matching_items else 'No specific items found'}\n"
-    )
+    normalized_query = normalize_query(query)
+    query_embedding = _query_vectors.get(normalized_query)
+    if query_embedding is None:
+        query_embedding = embed_query(normalized_query)
+        _query_vectors.set(normalized_query, query_embedding)
+    return query_embedding
+
+def normalize_query(query):
+    # The embedding model is uncased, so case and spacing don't change the vector
+    return " ".join(query.lower().split())
 
-def create_location_document(restaurant):
+def collection_version(collection):
     """
-    Create a searchable document focused on location.
+    Identify the current state of a collection for result caching.
     
-    Args:
-        restaurant: Restaurant data dictionary
-        
-    Returns:
-        str: Formatted document text
+    Any ingestion that changes the index rewrites the manifest, and partial
+    writes change the document count, so either one moving invalidates cached
+    results.
     """
-    # Format operating hours if available
-    hours_info = ""
-    if operational_hours := restaurant.get('operational_hours'):
-        hours_info = "Hours of Operation:\n"
-        for day, hours in operational_hours.items():
-            hours_info += f"  {day}: {hours}\n"
-    
-    return (
-        f"Restaurant: {restaurant.get('name', '')}\n"
-        f"Location: {restaurant.get('location', '')}\n"
-        f"Full Address: {restaurant.get('address', '')}\n"
-        f"This restaurant is located in {restaurant.get('location', '')}.\n"
-        f"Contact: {restaurant.get('contact', '')}\n"
-        f"Website: {restaurant.get('url', '')}\n"
-        f"Cuisines: {', '.join(restaurant.get('cuisines', []))}\n"
-        f"Rating: {restaurant.get('rating', '')}\n"
-        f"Cost for Two: {restaurant.get('cost_for_two', '')}\n"
-        f"{hours_info}\n"
-    )
+    return (collection.name, index_version(), open_vector_store(collection).count())
 
-def query_database(query, collection, n_results=20):
+def invalidate_query_cache():
+    """Drop cached retrieval results, e.g. after the collection was modified"""
+    _query_results.clear()
+
+def query_cache_stats():
     """
-    Query the vector database for relevant documents.
+    Report hit/miss counters of the query caches.
     
-    Args:
-        query (str): The user query to find relevant documents for
-        collection: ChromaDB collection to query
-        n_results (int): Number of results to return (default increased to 20)
-        
     Returns:
-        dict: Query results from ChromaDB
+        dict: Stats for the embedding cache and the result cache
     """
-    # Increased n_results to ensure comprehensive coverage and more restaurant options
-    results = collection.query(
-        query_texts=[query],
-        n_results=n_results,
-        include=["documents", "metadatas", "distances"]
-    )
-    return results 
\ No newline at end of file
+    return {
+        "embeddings": _query_vectors.stats(),
+        "results": _query_results.stats()
+    }
@@ -0,0 +1,432 @@
+"""
+This module puts the vector search behind a small interface, so retrieval
+can run on Chroma's HNSW index or on an exact NumPy matrix search.
+
+The NumPy backend exports the collection's vectors into a ``.npy`` matrix
+next to the Chroma data, memory-maps it and scores every candidate with one
+matrix product, so results are exact and the matrix pages are shared between
+processes. Metadata filters are evaluated on column arrays built at load, with
+the masks of low-cardinality fields (document type, city, veg) precomputed.
+The export is keyed by the index version and rebuilt when the index changes.
+A prebuilt snapshot can also be attached as a collection's store, in which
+case its memory-mapped vectors are searched directly (see snapshot.py).
+
+Select the backend with ``VECTOR_STORE_BACKEND=chroma|numpy``.
+"""
+import os
+import json
+import shutil
+import logging
+import operator
+import threading
+import numpy as np
+from src.database.ingestion import BATCH_SIZE, CHROMA_PERSIST_DIR, index_version
+
+logger = logging.getLogger(__name__)
+
+# Vector search backend: "chroma" (HNSW, approximate) or "numpy" (exact)
+VECTOR_STORE_BACKEND = os.getenv("VECTOR_STORE_BACKEND", "chroma").lower()
+# Directory of the NumPy export, one subdirectory per collection
+NUMPY_INDEX_DIR = os.getenv("NUMPY_INDEX_DIR", os.path.join(CHROMA_PERSIST_DIR, "exact_index"))
+# Storage type of the exported matrix; float16 halves its size
+NUMPY_INDEX_DTYPE = os.getenv("NUMPY_INDEX_DTYPE", "float32")
+# Rows scored per matrix product; small blocks keep the float32 copy of a float16 matrix in cache
+NUMPY_SEARCH_BLOCK = int(os.getenv("NUMPY_SEARCH_BLOCK", "4096"))
+# Fields with at most this many distinct values get precomputed equality masks
+MASK_MAX_VALUES = int(os.getenv("MASK_MAX_VALUES", "64"))
+
+MATRIX_FILE = "matrix.npy"
+NORMS_FILE = "norms.npy"
+RECORDS_FILE = "records.jsonl"
+META_FILE = "meta.json"
+RANGE_OPERATORS = {
+    "$gt": operator.gt,
+    "$gte": operator.ge,
+    "$lt": operator.lt,
+    "$lte": operator.le
+}
+
+class ChromaVectorStore:
+    """Vector search on the collection's own HNSW index"""
+
+    def __init__(self, collection):
+        self.collection = collection
+
+    def search(self, query_embedding, n_results=20, where=None):
+        """
+        Find the documents nearest to a query embedding.
+
+        Args:
+            query_embedding (list): Query embedding
+            n_results (int): Number of results to return
+            where (dict, optional): Chroma metadata filter
+
+        Returns:
+            dict: ids, documents, metadatas and distances, one list per query
+        """
+        return self.collection.query(
+            query_embeddings=[query_embedding],
+            n_results=n_results,
+            where=where,
+            include=["documents", "metadatas", "distances"]
+        )
+
+    def get(self, ids, where=None):
+        """
+        Look up documents by ID.
+
+        Args:
+            ids (list): Document IDs
+            where (dict, optional): Chroma metadata filter the documents must satisfy
+
+        Returns:
+            dict: ids, documents and metadatas of the documents found
+        """
+        return self.collection.get(ids=ids, where=where, include=["documents", "metadatas"])
+
+    def count(self):
+        return self.collection.count()
+
+class MetadataColumn:
+    """
+    One metadata field across all documents.
+
+    Values are stored as integer codes (-1 where the field is missing) plus a
+    float copy of numeric values (NaN where missing), so equality, membership
+    and range filters are single vectorized comparisons.
+    """
+
+    def __init__(self, values):
+        self.value_codes = {}
+        codes = np.full(len(values), -1, dtype=np.int32)
+        numbers = np.full(len(values), np.nan)
+        for row, value in enumerate(values):
+            if value is None:
+                continue
+            codes[row] = self.value_codes.setdefault(value_key(value), len(self.value_codes))
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                numbers[row] = value
+        self.codes = codes
+        self.numbers = numbers
+        self.masks = {}
+        if len(self.value_codes) <= MASK_MAX_VALUES:
+            self.masks = {key: codes == code for key, code in self.value_codes.items()}
+
+    def equals(self, value):
+        key = value_key(value)
+        if key in self.masks:
+            return self.masks[key]
+        code = self.value_codes.get(key)
+        return self.codes == code if code is not None else np.zeros(len(self.codes), dtype=bool)
+
+    def isin(self, values):
+        codes = [self.value_codes[key] for key in map(value_key, values) if key in self.value_codes]
+        return np.isin(self.codes, codes)
+
+    def compare(self, op, value):
+        with np.errstate(invalid="ignore"):
+            # NaN compares false, so documents without the field never match
+            return RANGE_OPERATORS[op](self.numbers, value)
+
+class NumpyVectorStore:
+    """
+    Exact vector search on a memory-mapped matrix.
+
+    Distances are computed in the collection's distance space (cosine, squared
+    L2 or inner product) the way Chroma reports them, so results from either
+    backend can be mixed and compared.
+    """
+
+    def __init__(self, matrix, records, space, version, norms=None):
+        """
+        Args:
+            matrix (np.ndarray): (count, dimension) vectors, usually memory-mapped
+            records (iterable): (id, document, metadata) in the order of the rows
+            space (str): Distance space, "cosine", "l2" or "ip"
+            version (str): Identifies the indexed content
+            norms (np.ndarray, optional): Row norms; computed when not given
+        """
+        self.matrix = matrix
+        self.space = space
+        self.version = version
+        self.norms = norms if norms is not None else row_norms(matrix)
+
+        self.ids = []
+        self.documents = []
+        self.metadatas = []
+        for doc_id, document, metadata in records:
+            self.ids.append(doc_id)
+            self.documents.append(document)
+            self.metadatas.append(metadata)
+        self.rows = {doc_id: row for row, doc_id in enumerate(self.ids)}
+
+        fields = {field for metadata in self.metadatas if metadata for field in metadata}
+        self.columns = {
+            field: MetadataColumn([(metadata or {}).get(field) for metadata in self.metadatas])
+            for field in fields
+        }
+
+    @classmethod
+    def load(cls, path):
+        """Open an export written by build_numpy_index, memory-mapping the matrix"""
+        with open(os.path.join(path, META_FILE), encoding="utf-8") as f:
+            meta = json.load(f)
+        return cls(
+            np.load(os.path.join(path, MATRIX_FILE), mmap_mode="r"),
+            read_records(os.path.join(path, RECORDS_FILE)),
+            space=meta["space"],
+            version=meta["version"],
+            norms=np.load(os.path.join(path, NORMS_FILE))
+        )
+
+    def __len__(self):
+        return len(self.ids)
+
+    def count(self):
+        return len(self)
+
+    def get(self, ids, where=None):
+        """
+        Look up documents by ID.
+
+        Args:
+            ids (list): Document IDs
+            where (dict, optional): Chroma metadata filter the documents must satisfy
+
+        Returns:
+            dict: ids, documents and metadatas of the documents found
+        """
+        rows = [self.rows[doc_id] for doc_id in ids if doc_id in self.rows]
+        if where and rows:
+            mask = self.filter_mask(where)
+            rows = [row for row in rows if mask[row]]
+        return {
+            "ids": [self.ids[row] for row in rows],
+            "documents": [self.documents[row] for row in rows],
+            "metadatas": [self.metadatas[row] for row in rows]
+        }
+
+    def search(self, query_embedding, n_results=20, where=None):
+        """
+        Find the documents nearest to a query embedding.
+
+        Args:
+            query_embedding (list): Query embedding
+            n_results (int): Number of results to return
+            where (dict, optional): Chroma metadata filter
+
+        Returns:
+            dict: ids, documents, metadatas and distances, one list per query
+        """
+        query = np.asarray(query_embedding, dtype=np.float32)
+        rows = np.flatnonzero(self.filter_mask(where)) if where else None
+        count = len(self) if rows is None else len(rows)
+        k = min(n_results, count)
+        if k == 0:
+            return {"ids": [[]], "documents": [[]], "metadatas": [[]], "distances": [[]]}
+
+        distances = self.distances(query, rows)
+        top = np.argpartition(distances, k - 1)[:k] if k < count else np.arange(count)
+        top = top[np.argsort(distances[top], kind="stable")]
+        hits = top if rows is None else rows[top]
+        return {
+            "ids": [[self.ids[row] for row in hits]],
+            "documents": [[self.documents[row] for row in hits]],
+            "metadatas": [[self.metadatas[row] for row in hits]],
+            "distances": [distances[top].tolist()]
+        }
+
+    def distances(self, query, rows=None):
+        """
+        Distances from a query to every document, or to the given rows.
+
+        Args:
+            query (np.ndarray): Query embedding
+            rows (np.ndarray, optional): Row numbers of the candidates
+
+        Returns:
+            np.ndarray: float32 distances in the collection's space
+        """
+        norms = self.norms if rows is None else self.norms[rows]
+        if rows is None:
+            # Score in blocks so a float16 matrix is never converted to float32 whole
+            scores = np.concatenate([
+                np.asarray(self.matrix[start:start + NUMPY_SEARCH_BLOCK], dtype=np.float32) @ query
+                for start in range(0, len(self), NUMPY_SEARCH_BLOCK)
+            ])
+        else:
+            scores = np.asarray(self.matrix[rows], dtype=np.float32) @ query
+
+        if self.space == "cosine":
+            query_norm = np.linalg.norm(query) or 1.0
+            return 1.0 - scores / (np.maximum(norms, 1e-12) * query_norm)
+        if self.space == "ip":
+            return 1.0 - scores
+        return norms ** 2 + float(query @ query) - 2.0 * scores
+
+    def filter_mask(self, where):
+        """
+        Evaluate a Chroma metadata filter to a boolean mask over the documents.
+
+        Supports $and, $or and the field operators $eq, $ne, $in, $nin, $gt,
+        $gte, $lt and $lte with Chroma's semantics: $ne and $nin match
+        documents without the field, the other operators do not.
+        """
+        if "$and" in where:
+            return np.logical_and.reduce([self.filter_mask(clause) for clause in where["$and"]])
+        if "$or" in where:
+            return np.logical_or.reduce([self.filter_mask(clause) for clause in where["$or"]])
+        masks = [self.field_mask(field, condition) for field, condition in where.items()]
+        return masks[0] if len(masks) == 1 else np.logical_and.reduce(masks)
+
+    def field_mask(self, field, condition):
+        if not isinstance(condition, dict):
+            condition = {"$eq": condition}
+        column = self.columns.get(field)
+        masks = []
+        for op, value in condition.items():
+            if column is None:
+                masks.append(np.full(len(self), op in ("$ne", "$nin")))
+            elif op == "$eq":
+                masks.append(column.equals(value))
+            elif op == "$ne":
+                masks.append(~column.equals(value))
+            elif op == "$in":
+                masks.append(column.isin(value))
+            elif op == "$nin":
+                masks.append(~column.isin(value))
+            elif op in RANGE_OPERATORS:
+                masks.append(column.compare(op, value))
+            else:
+                raise ValueError(f"Unsupported filter operator {op} on {field}")
+        return masks[0] if len(masks) == 1 else np.logical_and.reduce(masks)
+
+def value_key(value):
+    # True == 1 in Python, but Chroma does not match a boolean filter against numbers
+    return (isinstance(value, bool), value)
+
+def row_norms(matrix):
+    # In blocks, so a memory-mapped matrix is never copied whole
+    if not len(matrix):
+        return np.zeros(0, dtype=np.float32)
+    return np.concatenate([
+        np.linalg.norm(np.asarray(matrix[start:start + NUMPY_SEARCH_BLOCK], dtype=np.float32), axis=1)
+        for start in range(0, len(matrix), NUMPY_SEARCH_BLOCK)
+    ])
+
+def read_records(path):
+    """Yield (id, document, metadata) from a JSON Lines records file"""
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            record = json.loads(line)
+            yield record["id"], record["document"], record["metadata"]
+
+def collection_space(collection):
+    """Distance space of a collection: "cosine", "l2" or "ip" """
+    configuration = getattr(collection, "configuration", None) or {}
+    space = (configuration.get("hnsw") or {}).get("space")
+    return space or (collection.metadata or {}).get("hnsw:space", "l2")
+
+def iter_collection(collection, include, batch_size=BATCH_SIZE):
+    """Page through every document of a collection"""
+    for offset in range(0, collection.count(), batch_size):
+        yield collection.get(limit=batch_size, offset=offset, include=include)
+
+def build_numpy_index(collection, path, version, dtype=NUMPY_INDEX_DTYPE):
+    """
+    Export a collection's vectors, documents and metadata for exact search.
+
+    Args:
+        collection: ChromaDB collection to export
+        path (str): Directory to write; replaced atomically when complete
+        version (str): Index version recorded in the export
+        dtype (str): Storage type of the matrix, "float32" or "float16"
+    """
+    tmp_path = f"{path}.building-{os.getpid()}"
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    os.makedirs(tmp_path)
+
+    blocks = []
+    with open(os.path.join(tmp_path, RECORDS_FILE), "w", encoding="utf-8") as records_file:
+        for batch in iter_collection(collection, ["embeddings", "documents", "metadatas"]):
+            blocks.append(np.asarray(batch['embeddings'], dtype=np.float32))
+            for doc_id, document, metadata in zip(batch['ids'], batch['documents'], batch['metadatas']):
+                records_file.write(json.dumps(
+                    {"id": doc_id, "document": document, "metadata": metadata}, ensure_ascii=False
+                ) + "\n")
+    matrix = np.concatenate(blocks) if blocks else np.zeros((0, 0), dtype=np.float32)
+
+    # Norms come from the float32 vectors, so float16 storage only rounds the dot products
+    np.save(os.path.join(tmp_path, NORMS_FILE), row_norms(matrix))
+    np.save(os.path.join(tmp_path, MATRIX_FILE), matrix.astype(dtype))
+    with open(os.path.join(tmp_path, META_FILE), "w", encoding="utf-8") as f:
+        json.dump({
+            "version": version,
+            "collection": collection.name,
+            "space": collection_space(collection),
+            "count": len(matrix),
+            "dtype": dtype
+        }, f)
+
+    shutil.rmtree(path, ignore_errors=True)
+    os.replace(tmp_path, path)
+    logger.info(f"Exported {len(matrix)} vectors ({dtype}) for exact search to {path}")
+
+def numpy_index_version(collection):
+    return f"{collection.name}-{index_version()}-{collection.count()}-{NUMPY_INDEX_DTYPE}"
+
+_stores = {}
+_stores_lock = threading.Lock()
+# Stores that replace a collection's own index, e.g. a read-only snapshot
+_attached_stores = {}
+
+def attach_vector_store(collection, store):
+    """
+    Serve a collection's searches from the given store, or detach it with None.
+
+    Args:
+        collection: ChromaDB collection
+        store: Store to search instead of the collection, or None
+    """
+    if store is None:
+        _attached_stores.pop(collection.name, None)
+    else:
+        _attached_stores[collection.name] = store
+
+def open_vector_store(collection, backend=None):
+    """
+    Return the vector search backend for a collection.
+
+    A store attached with attach_vector_store takes precedence. Otherwise the
+    NumPy store is exported on first use after every index change and then
+    shared by all callers until the index changes again.
+
+    Args:
+        collection: ChromaDB collection
+        backend (str, optional): "chroma" or "numpy"; defaults to VECTOR_STORE_BACKEND
+
+    Returns:
+        ChromaVectorStore or NumpyVectorStore
+    """
+    if (store := _attached_stores.get(collection.name)) is not None:
+        return store
+    if (backend or VECTOR_STORE_BACKEND) != "numpy":
+        return ChromaVectorStore(collection)
+
+    version = numpy_index_version(collection)
+    store = _stores.get(collection.name)
+    if store is not None and store.version == version:
+        return store
+    with _stores_lock:
+        store = _stores.get(collection.name)
+        if store is None or store.version != version:
+            path = os.path.join(NUMPY_INDEX_DIR, collection.name)
+            try:
+                store = NumpyVectorStore.load(path)
+            except (OSError, ValueError, KeyError):
+                store = None
+            if store is None or store.version != version:
+                build_numpy_index(collection, path, version)
+                store = NumpyVectorStore.load(path)
+            _stores[collection.name] = store
+    return store
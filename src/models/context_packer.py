@@ -0,0 +1,114 @@
+"""
+This module fits retrieved documents into a token budget for the prompt,
+choosing the evidence with the most relevance per token and dropping empty
+fields, instead of cutting the context off at a fixed length.
+"""
+import os
+import re
+from src.models.token_counter import estimate_tokens
+
+# Token budget for the database context part of the prompt
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "3500"))
+# Tokens for the label and blank lines around each block
+BLOCK_OVERHEAD_TOKENS = 4
+
+# Field values that carry no information
+EMPTY_VALUES = {"", "none", "null", "unknown", "n/a", "na", "[]", "{}"}
+FIELD_PATTERN = re.compile(r'^(\s*(?:[-•*]\s*)?[^:\n]{1,40}):(.*)$')
+
+def clean_document(text):
+    """
+    Drop empty fields and blank runs from a document.
+
+    A "Field:" line is removed when its value is empty and no indented lines
+    follow it (e.g. an empty "Photos:" list); blank lines are collapsed.
+
+    Args:
+        text (str): Document text
+
+    Returns:
+        str: Cleaned document text
+    """
+    lines = text.splitlines()
+    kept = []
+    for i, line in enumerate(lines):
+        if not line.strip():
+            if kept and kept[-1] != "":
+                kept.append("")
+            continue
+        match = FIELD_PATTERN.match(line)
+        if match and match.group(2).strip().lower() in EMPTY_VALUES:
+            indent = len(line) - len(line.lstrip())
+            next_line = next((later for later in lines[i + 1:] if later.strip()), "")
+            has_children = len(next_line) - len(next_line.lstrip()) > indent
+            if not has_children:
+                continue
+        kept.append(line.rstrip())
+    return "\n".join(kept).strip()
+
+def relevance(distance):
+    """Map a vector distance (lower is better) to a relevance score in (0, 1]"""
+    return 1.0 / (1.0 + max(distance, 0.0))
+
+def context_item(section, text, score, key=None):
+    """
+    Create a candidate block for the context.
+
+    Args:
+        section (str): Section heading the block goes under
+        text (str): Block text
+        score (float): Relevance of the block
+        key (str): Identifies the block; only one block per key is included
+
+    Returns:
+        dict: The candidate
+    """
+    return {
+        "section": section,
+        "text": text,
+        "score": score,
+        "tokens": estimate_tokens(text) + BLOCK_OVERHEAD_TOKENS,
+        "key": key
+    }
+
+def pack_context(items, budget=CONTEXT_TOKEN_BUDGET):
+    """
+    Choose blocks greedily by relevance per token until the budget is spent.
+
+    Entity cards are self-contained, so every block is charged only for its
+    own tokens and, the first time its section appears, the section heading.
+
+    Args:
+        items (list): Candidates from context_item
+        budget (int): Token budget
+
+    Returns:
+        list: Selected blocks, ordered by relevance
+    """
+    sections = set()
+
+    def cost(item):
+        total = item["tokens"]
+        if item["section"] not in sections:
+            total += estimate_tokens(item["section"]) + 1
+        return total
+
+    candidates = sorted(items, key=lambda item: item["score"] / cost(item), reverse=True)
+
+    selected = []
+    included = set()
+    remaining = budget
+    for item in candidates:
+        if item["key"] is not None and item["key"] in included:
+            continue
+        item_cost = cost(item)
+        if item_cost > remaining:
+            continue
+        if item["key"] is not None:
+            included.add(item["key"])
+        selected.append(item)
+        sections.add(item["section"])
+        remaining -= item_cost
+
+    selected.sort(key=lambda item: item["score"], reverse=True)
+    return selected
@@ -1,9 +1,11 @@
 import os
-import json
 import time
+import uuid
+import atexit
 import logging
 from datetime import datetime
 from typing import List, Dict, Any
+from src.models.history_store import HistoryStore
 
 # Set up basic logging
 logger = logging.getLogger(__name__)
@@ -12,38 +14,45 @@ logger = logging.getLogger(__name__)
 HISTORY_DIR = "convo_history"
 if not os.path.exists(HISTORY_DIR):
     os.makedirs(HISTORY_DIR)
+HISTORY_DB = os.path.join(HISTORY_DIR, "conversation_history.db")
+# Whole-file JSON history written by earlier versions; imported once
 HISTORY_FILE = os.path.join(HISTORY_DIR, "conversation_history.json")
 
 # Make sure the folder exists
 os.makedirs(HISTORY_DIR, exist_ok=True)
 
+_store = None
+
+def get_history_store() -> HistoryStore:
+    """Opens the message log on first use"""
+    global _store
+    if _store is None:
+        _store = HistoryStore(HISTORY_DB)
+        _store.import_legacy_json(HISTORY_FILE)
+        # Commit queued messages before the interpreter exits
+        atexit.register(_store.flush)
+    return _store
+
 def load_conversation_history() -> Dict[str, List[Dict[str, str]]]:
-    """Loads saved conversations from our JSON file"""
-    if os.path.exists(HISTORY_FILE):
-        try:
-            with open(HISTORY_FILE, 'r', encoding='utf-8') as f:
-                history = json.load(f)
-            logger.info(f"Loaded conversation history from {HISTORY_FILE}")
-            return history
-        except Exception as e:
-            logger.error(f"Error loading conversation history: {str(e)}")
-            return {}
-    else:
-        logger.info(f"No existing conversation history found at {HISTORY_FILE}")
-        return {}
+    """
+    Opens the saved conversations.
+    
+    Sessions are read from the log when they are first used, so this only
+    returns the in-memory cache of sessions touched by this process.
+    """
+    get_history_store()
+    logger.info(f"Using conversation history from {HISTORY_DB}")
+    return {}
 
-def save_conversation_history(history: Dict[str, List[Dict[str, str]]]) -> None:
-    """Saves all conversations to our JSON file"""
-    try:
-        with open(HISTORY_FILE, 'w', encoding='utf-8') as f:
-            json.dump(history, f, indent=2, ensure_ascii=False)
-        logger.info(f"Saved conversation history to {HISTORY_FILE}")
-    except Exception as e:
-        logger.error(f"Error saving conversation history: {str(e)}")
+def flush_conversation_history() -> None:
+    """Waits until every added message is saved"""
+    get_history_store().flush()
 
 def get_session_history(session_id: str, history: Dict[str, List[Dict[str, str]]]) -> List[Dict[str, str]]:
     """Gets all messages from a specific chat session"""
-    return history.get(session_id, [])
+    if session_id not in history:
+        history[session_id] = get_history_store().load_session(session_id)
+    return history[session_id]
 
 def add_message_to_history(
     session_id: str, 
@@ -52,9 +61,8 @@ def add_message_to_history(
     history: Dict[str, List[Dict[str, str]]]
 ) -> Dict[str, List[Dict[str, str]]]:
     """Adds a new message to the chat history"""
-    # Start a new chat if needed
-    if session_id not in history:
-        history[session_id] = []
+    # Start a new chat if needed, or pick up an earlier one from the log
+    session_history = get_session_history(session_id, history)
     
     # Add the message with a timestamp
     message = {
@@ -63,17 +71,19 @@ def add_message_to_history(
         "timestamp": datetime.now().isoformat()
     }
     
-    history[session_id].append(message)
+    session_history.append(message)
     
-    # Save it to file
-    save_conversation_history(history)
+    # Append it to the log; the write happens in the background
+    get_history_store().append(session_id, message)
     
     return history
 
 def get_recent_context(session_id: str, history: Dict[str, List[Dict[str, str]]], num_messages: int = 4) -> str:
     """Gets the last few messages to help the AI remember context"""
-    session_history = get_session_history(session_id, history)
-    
+    return format_recent_context(get_session_history(session_id, history), num_messages)
+
+def format_recent_context(session_history: List[Dict[str, str]], num_messages: int = 4) -> str:
+    """Formats the last few messages of a session for the prompt"""
     # Grab recent messages
     recent_messages = session_history[-num_messages:] if len(session_history) > 0 else []
     
@@ -90,4 +100,5 @@ def get_recent_context(session_id: str, history: Dict[str, List[Dict[str, str]]]
 
 def generate_session_id() -> str:
     """Creates a unique ID for each chat session"""
-    return f"session_{int(time.time())}" 
\ No newline at end of file
+    # The random suffix keeps sessions started in the same second apart
+    return f"session_{int(time.time())}_{uuid.uuid4().hex[:8]}" 
\ No newline at end of file
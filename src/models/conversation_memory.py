@@ -0,0 +1,131 @@
+"""
+This module builds the conversation history part of prompts, either from the
+last few raw messages or from a rolling summary of older turns plus the
+latest exchange, kept within a token budget.
+"""
+import os
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from src.config.llm_config import generate_response
+from src.prompts.prompts import CONVERSATION_SUMMARY_PROMPT
+from src.models.conversation_history import format_recent_context
+from src.models.token_counter import estimate_tokens, truncate_to_tokens
+
+logger = logging.getLogger(__name__)
+
+# "recent" sends the last messages verbatim, "summary" uses the rolling summary
+CONVERSATION_MEMORY_MODE = os.getenv("CONVERSATION_MEMORY_MODE", "recent").lower()
+# Token budget for the whole conversation history section of the prompt
+HISTORY_TOKEN_BUDGET = int(os.getenv("HISTORY_TOKEN_BUDGET", "800"))
+# Part of the budget the summary may use; the rest goes to recent messages
+SUMMARY_TOKEN_BUDGET = int(os.getenv("SUMMARY_TOKEN_BUDGET", "300"))
+# Unsummarized older messages must reach this size before they are folded in,
+# so the summary is not regenerated after every short exchange
+SUMMARY_MIN_PENDING_TOKENS = int(os.getenv("SUMMARY_MIN_PENDING_TOKENS", "400"))
+# Messages of the latest exchange are always kept verbatim
+RECENT_MESSAGES = 2
+
+_summary_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="summary")
+
+def build_conversation_context(session):
+    """
+    Format the conversation so far for the prompt.
+
+    Args:
+        session: Session whose messages end with the current user query
+
+    Returns:
+        str: Conversation history section of the prompt
+    """
+    if CONVERSATION_MEMORY_MODE != "summary":
+        return format_recent_context(session.messages)
+
+    with session.lock:
+        summary = session.summary
+        pending = session.messages[session.summarized_count:]
+
+    context_parts = []
+    remaining = HISTORY_TOKEN_BUDGET - estimate_tokens("Previous conversation:\n")
+    if summary:
+        summary = truncate_to_tokens(summary, SUMMARY_TOKEN_BUDGET)
+        context_parts.append(f"Summary of earlier conversation:\n{summary}\n")
+        remaining -= estimate_tokens(context_parts[-1])
+
+    # Newest messages first; older ones that don't fit are about to be summarized
+    lines = []
+    for i, msg in enumerate(reversed(pending)):
+        role = "User" if msg["role"] == "user" else "Assistant"
+        line = f"{role}: {msg['content']}"
+        # One extra token for the line break
+        tokens = estimate_tokens(line) + 1
+        if tokens > remaining:
+            if i < RECENT_MESSAGES and remaining > 0:
+                # Keep the start of a long answer rather than dropping the latest exchange
+                lines.append(truncate_to_tokens(line, remaining - 2))
+            break
+        lines.append(line)
+        remaining -= tokens
+
+    if lines:
+        context_parts.append("Previous conversation:\n" + "\n".join(reversed(lines)) + "\n")
+    return "\n".join(context_parts)
+
+def schedule_summary_update(session):
+    """
+    Fold older messages into the session summary in the background.
+
+    Called after each answer. Messages before the latest exchange are
+    summarized once enough of them have accumulated; at most one update per
+    session runs at a time.
+
+    Args:
+        session: Session that just received an answer
+    """
+    if CONVERSATION_MEMORY_MODE != "summary":
+        return
+
+    with session.lock:
+        if session.summary_pending:
+            return
+        end = len(session.messages) - RECENT_MESSAGES
+        start = session.summarized_count
+        if end <= start:
+            return
+        pending_tokens = sum(estimate_tokens(msg["content"]) for msg in session.messages[start:end])
+        if pending_tokens < SUMMARY_MIN_PENDING_TOKENS:
+            return
+        session.summary_pending = True
+
+    _summary_executor.submit(update_summary, session, start, end)
+
+def update_summary(session, start, end):
+    """
+    Merge messages[start:end] of a session into its summary.
+
+    Args:
+        session: The session
+        start (int): First message not yet in the summary
+        end (int): Message index the summary will cover up to
+    """
+    try:
+        with session.lock:
+            summary = session.summary
+            messages = session.messages[start:end]
+
+        prompt = CONVERSATION_SUMMARY_PROMPT.format(
+            summary=summary or "(none)",
+            messages=format_recent_context(messages, num_messages=len(messages)),
+            max_words=int(SUMMARY_TOKEN_BUDGET * 0.75)
+        )
+        new_summary = generate_response(prompt).strip()
+
+        with session.lock:
+            # Only apply if nothing else changed the summary meanwhile
+            if session.summarized_count == start:
+                session.summary = new_summary
+                session.summarized_count = end
+    except Exception as e:
+        logger.error(f"Error updating conversation summary: {str(e)}")
+    finally:
+        with session.lock:
+            session.summary_pending = False
@@ -0,0 +1,106 @@
+"""
+This module provides an ONNX Runtime backend for the embedding model: the
+SentenceTransformer model exported to ONNX and quantized to int8 (see
+utils/export_onnx_model.py), for CPU inference without PyTorch.
+
+The encoder mirrors the parts of the SentenceTransformer API the app uses,
+so it can stand in for the model wherever ``encode`` is called.
+"""
+import os
+import logging
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Directory with the exported model and its tokenizer
+ONNX_MODEL_DIR = os.getenv("ONNX_MODEL_DIR", "onnx_model")
+ONNX_MODEL_FILE = os.getenv("ONNX_MODEL_FILE", "model_int8.onnx")
+ONNX_TOKENIZER_FILE = "tokenizer.json"
+# Threads per inference call; 0 lets ONNX Runtime use every core
+ONNX_THREADS = int(os.getenv("ONNX_THREADS", "0"))
+# Longest input in tokens, as in the SentenceTransformer model config
+ONNX_MAX_SEQ_LENGTH = 256
+
+class OnnxSentenceEncoder:
+    """
+    Sentence encoder running a transformer exported to ONNX, with the mean
+    pooling and normalization of the SentenceTransformer pipeline.
+    """
+
+    def __init__(self, model_name, model_dir=ONNX_MODEL_DIR, model_file=ONNX_MODEL_FILE,
+                 threads=ONNX_THREADS, max_seq_length=ONNX_MAX_SEQ_LENGTH):
+        import onnxruntime
+        from tokenizers import Tokenizer
+
+        self.model_name = model_name
+        self.model_id = f"{model_name}:onnx:{os.path.splitext(model_file)[0]}"
+        self.max_seq_length = max_seq_length
+
+        self.model_path = os.path.join(model_dir, model_file)
+
+        self.tokenizer = Tokenizer.from_file(os.path.join(model_dir, ONNX_TOKENIZER_FILE))
+        self.tokenizer.enable_truncation(max_seq_length)
+        pad_id = self.tokenizer.token_to_id("[PAD]")
+        self.tokenizer.enable_padding(pad_id=pad_id if pad_id is not None else 0, pad_token="[PAD]")
+
+        options = onnxruntime.SessionOptions()
+        options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+        options.intra_op_num_threads = threads
+        self.session = onnxruntime.InferenceSession(
+            self.model_path, options, providers=["CPUExecutionProvider"]
+        )
+        self.input_names = {model_input.name for model_input in self.session.get_inputs()}
+
+    def encode(self, sentences, batch_size=32, show_progress_bar=False, convert_to_numpy=True,
+               normalize_embeddings=True, **kwargs):
+        """
+        Embed texts like SentenceTransformer.encode.
+
+        Args:
+            sentences (str or list): Text or texts to embed
+            batch_size (int): Number of texts per inference call
+            show_progress_bar (bool): Accepted for compatibility; ignored
+            convert_to_numpy (bool): Accepted for compatibility; results are always arrays
+            normalize_embeddings (bool): Scale vectors to unit length, as the model's
+                Normalize module does
+
+        Returns:
+            np.ndarray: One embedding per text, or a single vector for a str input
+        """
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+        if not texts:
+            return np.zeros((0, self.get_sentence_embedding_dimension() or 0), dtype=np.float32)
+
+        # Batch texts of similar length together so less padding is computed
+        order = np.argsort([-len(text) for text in texts], kind="stable")
+        embeddings = [None] * len(texts)
+        for i in range(0, len(texts), batch_size):
+            batch = order[i:i + batch_size]
+            vectors = self._encode_batch([texts[j] for j in batch], normalize_embeddings)
+            for j, vector in zip(batch, vectors):
+                embeddings[j] = vector
+
+        embeddings = np.stack(embeddings)
+        return embeddings[0] if single else embeddings
+
+    def _encode_batch(self, texts, normalize_embeddings):
+        encodings = self.tokenizer.encode_batch(texts)
+        input_ids = np.asarray([encoding.ids for encoding in encodings], dtype=np.int64)
+        attention_mask = np.asarray([encoding.attention_mask for encoding in encodings], dtype=np.int64)
+        feed = {"input_ids": input_ids, "attention_mask": attention_mask}
+        if "token_type_ids" in self.input_names:
+            feed["token_type_ids"] = np.zeros_like(input_ids)
+
+        token_embeddings = self.session.run(None, {name: feed[name] for name in self.input_names})[0]
+
+        # Mean pooling over the real tokens
+        mask = attention_mask[..., None].astype(np.float32)
+        embeddings = (token_embeddings * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+        if normalize_embeddings:
+            embeddings /= np.clip(np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-12, None)
+        return embeddings.astype(np.float32)
+
+    def get_sentence_embedding_dimension(self):
+        shape = self.session.get_outputs()[0].shape
+        return shape[-1] if isinstance(shape[-1], int) else None
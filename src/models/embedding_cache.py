@@ -0,0 +1,149 @@
+"""
+This module provides a persistent on-disk cache for document embeddings.
+"""
+import os
+import re
+import json
+import hashlib
+import logging
+import threading
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Where cached vectors are stored, one subdirectory per embedding model
+EMBEDDING_CACHE_DIR = os.getenv("EMBEDDING_CACHE_DIR", "embedding_cache")
+
+class EmbeddingCache:
+    """
+    Embedding cache keyed by (model name, sha256 of the text).
+
+    Vectors live in a flat float32 file that is read through a memory map, and
+    a line-per-row index file holds the text hashes in the same order. Both
+    files are append-only, so a crash can at worst lose the last few rows.
+    """
+
+    def __init__(self, model_name, cache_dir=EMBEDDING_CACHE_DIR):
+        self.model_name = model_name
+        self.path = os.path.join(cache_dir, re.sub(r'[^\w.-]+', '_', model_name))
+        self.index_file = os.path.join(self.path, "index.txt")
+        self.vectors_file = os.path.join(self.path, "vectors.f32")
+        self.meta_file = os.path.join(self.path, "meta.json")
+
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._rows = {}
+        self._dim = None
+        self._vectors = None
+
+        os.makedirs(self.path, exist_ok=True)
+        self._load()
+
+    def _load(self):
+        if not os.path.exists(self.meta_file):
+            return
+
+        with open(self.meta_file, "r", encoding="utf-8") as f:
+            self._dim = json.load(f)["dim"]
+
+        keys = []
+        if os.path.exists(self.index_file):
+            with open(self.index_file, "r", encoding="utf-8") as f:
+                keys = f.read().split()
+
+        # An interrupted append can leave one file ahead of the other; trim
+        # both back to the rows they agree on so later appends stay aligned
+        row_bytes = self._dim * 4
+        vectors_size = os.path.getsize(self.vectors_file) if os.path.exists(self.vectors_file) else 0
+        rows = min(len(keys), vectors_size // row_bytes)
+        if vectors_size != rows * row_bytes:
+            with open(self.vectors_file, "ab") as f:
+                f.truncate(rows * row_bytes)
+        if len(keys) != rows:
+            keys = keys[:rows]
+            with open(self.index_file, "w", encoding="utf-8") as f:
+                f.write("".join(f"{key}\n" for key in keys))
+        self._rows = {key: row for row, key in enumerate(keys)}
+        logger.info(f"Loaded {len(self._rows)} cached embeddings for {self.model_name}")
+
+    def _matrix(self):
+        # Re-map the vectors file whenever rows were appended since the last map
+        if self._vectors is None or len(self._vectors) < len(self._rows):
+            self._vectors = np.memmap(
+                self.vectors_file, dtype=np.float32, mode="r", shape=(len(self._rows), self._dim)
+            )
+        return self._vectors
+
+    @staticmethod
+    def key(text):
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    def __len__(self):
+        return len(self._rows)
+
+    @property
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def get_many(self, texts):
+        """
+        Look up cached vectors for a list of texts.
+
+        Args:
+            texts (list): Texts to look up
+
+        Returns:
+            list: Vector (list of floats) for each hit, None for each miss
+        """
+        with self._lock:
+            rows = [self._rows.get(self.key(text)) for text in texts]
+            found = sum(row is not None for row in rows)
+            self.hits += found
+            self.misses += len(rows) - found
+            if not found:
+                return [None] * len(rows)
+
+            matrix = self._matrix()
+            return [matrix[row].tolist() if row is not None else None for row in rows]
+
+    def put_many(self, texts, vectors):
+        """
+        Append vectors for texts that are not cached yet.
+
+        Args:
+            texts (list): Texts that were embedded
+            vectors (list): Embedding for each text
+        """
+        with self._lock:
+            new_keys = {}
+            for text, vector in zip(texts, vectors):
+                key = self.key(text)
+                if key not in self._rows:
+                    new_keys.setdefault(key, vector)
+            if not new_keys:
+                return
+
+            matrix = np.asarray(list(new_keys.values()), dtype=np.float32)
+            if self._dim is None:
+                self._dim = matrix.shape[1]
+                with open(self.meta_file, "w", encoding="utf-8") as f:
+                    json.dump({"model": self.model_name, "dim": self._dim}, f)
+
+            with open(self.vectors_file, "ab") as f:
+                f.write(matrix.tobytes())
+            with open(self.index_file, "a", encoding="utf-8") as f:
+                f.write("".join(f"{key}\n" for key in new_keys))
+
+            start_row = len(self._rows)
+            for offset, key in enumerate(new_keys):
+                self._rows[key] = start_row + offset
+
+    def stats(self):
+        return {
+            "entries": len(self._rows),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hit_rate
+        }
@@ -1,111 +1,57 @@
+import os
 import streamlit as st
-from sentence_transformers import SentenceTransformer
-from chromadb.utils import embedding_functions
-import re
-import nltk
-from nltk.corpus import stopwords
-from nltk.tokenize import word_tokenize
-from nltk.stem import PorterStemmer, WordNetLemmatizer
 import chromadb
-import uuid
+from src.models.encoding import (
+    EMBEDDING_MODEL_NAME,
+    get_embedding_model,
+    get_embedding_function,
+    document_encoder
+)
+from src.models.text_processing import download_nltk_resources, preprocess_text, preprocess_texts
+from src.database.ingestion import CHROMA_PERSIST_DIR, content_hash
 
-# Define the embedding model name
-EMBEDDING_MODEL_NAME = 'sentence-transformers/all-MiniLM-L6-v2'
+# Directory of the general-purpose document store, kept apart from the
+# restaurant index and its state files; empty keeps it in memory
+VECTOR_STORE_DIR = os.getenv("VECTOR_STORE_DIR", os.path.join(CHROMA_PERSIST_DIR, "document_store"))
+# Documents embedded and added per request
+INDEX_BATCH_SIZE = 1000
 
 @st.cache_resource
 def load_embedding_model():
-    return SentenceTransformer(EMBEDDING_MODEL_NAME)
-
-def get_embedding_function():
-    return embedding_functions.SentenceTransformerEmbeddingFunction(
-        model_name=EMBEDDING_MODEL_NAME
-    ) 
-
-# Download required NLTK resources
-@st.cache_resource
-def download_nltk_resources():
-    try:
-        nltk.download('punkt', quiet=True)
-        nltk.download('stopwords', quiet=True)
-        nltk.download('wordnet', quiet=True)
-    except Exception as e:
-        st.warning(f"Error downloading NLTK resources: {e}")
-
-# Text preprocessing function
-def preprocess_text(text, remove_stopwords=True, stemming=False, lemmatization=True):
-    """
-    Preprocess text by cleaning, normalizing, and optionally removing stopwords and applying stemming/lemmatization
-    
-    Args:
-        text (str): Input text to preprocess
-        remove_stopwords (bool): Whether to remove stopwords
-        stemming (bool): Whether to apply stemming
-        lemmatization (bool): Whether to apply lemmatization
-        
-    Returns:
-        str: Preprocessed text
-    """
-    # Download NLTK resources if needed
-    download_nltk_resources()
-    
-    # Convert to lowercase
-    text = text.lower()
-    
-    # Remove special characters and digits
-    text = re.sub(r'[^\w\s]', '', text)
-    text = re.sub(r'\d+', '', text)
-    
-    # Tokenize
-    tokens = word_tokenize(text)
-    # tokens = [token for token in word_tokenize(text) if len(token) >= 5]
-    
-    # Remove stopwords if requested
-    if remove_stopwords:
-        stop_words = set(stopwords.words('english'))
-        tokens = [token for token in tokens if token not in stop_words]
-    
-    # Apply stemming if requested
-    if stemming:
-        stemmer = PorterStemmer()
-        tokens = [stemmer.stem(token) for token in tokens]
-    
-    # Apply lemmatization if requested
-    if lemmatization:
-        lemmatizer = WordNetLemmatizer()
-        tokens = [lemmatizer.lemmatize(token) for token in tokens]
-    
-    # Join tokens back into text
-    return ' '.join(tokens)
+    return get_embedding_model()
 
 # Initialize ChromaDB client and collection
 @st.cache_resource
-def get_vector_store(collection_name="documents"):
+def get_vector_store(collection_name="documents", persist_dir=VECTOR_STORE_DIR):
     """
     Initialize or get ChromaDB client and collection
     
     Args:
         collection_name (str): Name of the collection to use
+        persist_dir (str): Chroma data directory, or empty for an in-memory store
         
     Returns:
         collection: ChromaDB collection
     """
-    client = chromadb.Client()
-    embedding_function = get_embedding_function()
-    
-    try:
-        collection = client.get_collection(name=collection_name)
-    except:
-        collection = client.create_collection(
-            name=collection_name,
-            embedding_function=embedding_function
-        )
-    
-    return collection
+    client = chromadb.PersistentClient(path=persist_dir) if persist_dir else chromadb.Client()
+    return client.get_or_create_collection(
+        name=collection_name,
+        embedding_function=get_embedding_function()
+    )
+
+def document_id(document):
+    """Return the content-addressed ID of a (preprocessed) document"""
+    return f"doc_{content_hash(document)}"
 
 def index_documents(documents, metadatas=None, collection_name="documents", preprocess=True):
     """
     Index documents in the vector store
     
+    IDs are derived from the document content, so indexing a document that is
+    already stored does not embed it again; only its metadata is updated when
+    it changed. Duplicates within the call are stored once, with the metadata
+    of the last occurrence.
+    
     Args:
         documents (list): List of document texts
         metadatas (list, optional): List of metadata dictionaries for each document
@@ -113,23 +59,50 @@ def index_documents(documents, metadatas=None, collection_name="documents", prep
         preprocess (bool): Whether to preprocess the documents
         
     Returns:
-        list: List of document IDs
+        list: List of document IDs, one per input document
     """
     collection = get_vector_store(collection_name)
     
     # Preprocess documents if requested
     if preprocess:
-        documents = [preprocess_text(doc) for doc in documents]
-    
-    # Generate IDs if not provided
-    ids = [str(uuid.uuid4()) for _ in range(len(documents))]
-    
-    # Add documents to the collection
-    collection.add(
-        documents=documents,
-        metadatas=metadatas if metadatas else [{}] * len(documents),
-        ids=ids
-    )
+        documents = preprocess_texts(documents)
+    
+    ids = [document_id(doc) for doc in documents]
+    metadatas = metadatas if metadatas else [{}] * len(documents)
+    
+    # Deduplicate by ID, keeping the last metadata for each document
+    unique = {}
+    for doc_id, doc, metadata in zip(ids, documents, metadatas):
+        unique[doc_id] = (doc, metadata)
+    
+    unique_ids = list(unique)
+    stored = {}
+    for i in range(0, len(unique_ids), INDEX_BATCH_SIZE):
+        batch = collection.get(ids=unique_ids[i:i + INDEX_BATCH_SIZE], include=["metadatas"])
+        stored.update(zip(batch['ids'], batch['metadatas']))
+    
+    # Existing documents keep their embeddings; only changed metadata is written
+    changed_ids = [
+        doc_id for doc_id in unique_ids
+        if doc_id in stored and unique[doc_id][1] and (stored[doc_id] or {}) != unique[doc_id][1]
+    ]
+    for i in range(0, len(changed_ids), INDEX_BATCH_SIZE):
+        batch_ids = changed_ids[i:i + INDEX_BATCH_SIZE]
+        collection.update(ids=batch_ids, metadatas=[unique[doc_id][1] for doc_id in batch_ids])
+    
+    new_ids = [doc_id for doc_id in unique_ids if doc_id not in stored]
+    if new_ids:
+        with document_encoder() as encode:
+            for i in range(0, len(new_ids), INDEX_BATCH_SIZE):
+                batch_ids = new_ids[i:i + INDEX_BATCH_SIZE]
+                batch_documents = [unique[doc_id][0] for doc_id in batch_ids]
+                # Chroma rejects empty metadata dicts, so documents without any get None
+                collection.upsert(
+                    ids=batch_ids,
+                    documents=batch_documents,
+                    metadatas=[unique[doc_id][1] or None for doc_id in batch_ids],
+                    embeddings=encode(batch_documents)
+                )
     
     return ids
 
@@ -0,0 +1,147 @@
+"""
+This module loads the embedding model and encodes documents in bulk.
+
+It does not depend on Streamlit, so headless tools such as the ingestion
+command can use it directly.
+"""
+import os
+import time
+import logging
+from functools import lru_cache
+from contextlib import contextmanager
+from src.models.embedding_cache import EmbeddingCache
+from src.models.embedding_backends import OnnxSentenceEncoder
+from src.models.model_registry import ModelEmbeddingFunction, get_model_registry
+
+logger = logging.getLogger(__name__)
+
+# Define the embedding model name
+EMBEDDING_MODEL_NAME = 'sentence-transformers/all-MiniLM-L6-v2'
+# "torch" runs the SentenceTransformer model, "onnx" the exported int8 model
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "torch").lower()
+
+# Bulk encoding settings used during ingestion
+EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", "256"))
+EMBED_WORKERS = int(os.getenv("EMBED_WORKERS", str(os.cpu_count() or 1)))
+# Below this many texts the cost of spawning workers outweighs the speedup
+MIN_TEXTS_PER_WORKER = 512
+# Reuse vectors of previously embedded texts across rebuilds
+EMBEDDING_CACHE_ENABLED = os.getenv("EMBEDDING_CACHE_ENABLED", "true").lower() == "true"
+
+def get_sentence_transformer():
+    def load():
+        # Imported here so the ONNX backend never loads PyTorch
+        from sentence_transformers import SentenceTransformer
+        return SentenceTransformer(EMBEDDING_MODEL_NAME)
+    return get_model_registry().get(f"{EMBEDDING_MODEL_NAME}:torch", load)
+
+@lru_cache(maxsize=None)
+def get_onnx_encoder():
+    """Load the exported ONNX model, or return None if it is unavailable"""
+    try:
+        return get_model_registry().get(
+            f"{EMBEDDING_MODEL_NAME}:onnx", lambda: OnnxSentenceEncoder(EMBEDDING_MODEL_NAME)
+        )
+    except Exception as e:
+        logger.error(f"Error loading ONNX embedding model, falling back to PyTorch: {str(e)}")
+        return None
+
+def get_embedding_model():
+    """
+    Return the embedding model of the configured backend.
+
+    Both backends expose ``encode(texts, batch_size=..., show_progress_bar=...)``
+    returning a NumPy array.
+    """
+    if EMBEDDING_BACKEND == "onnx" and (encoder := get_onnx_encoder()) is not None:
+        return encoder
+    return get_sentence_transformer()
+
+def embedding_model_id():
+    """Identify the model and backend, so cached vectors of different backends stay apart"""
+    return getattr(get_embedding_model(), "model_id", EMBEDDING_MODEL_NAME)
+
+def get_embedding_function():
+    """Return a Chroma embedding function that embeds with the shared model"""
+    return ModelEmbeddingFunction(get_embedding_model(), EMBEDDING_MODEL_NAME)
+
+def embed_query(text):
+    """Embed a single query the same way the collection embeds documents"""
+    return get_embedding_model().encode([text], show_progress_bar=False)[0].tolist()
+
+@contextmanager
+def document_encoder(num_workers=EMBED_WORKERS, batch_size=EMBED_BATCH_SIZE, use_cache=EMBEDDING_CACHE_ENABLED):
+    """
+    Open a bulk encoder for ingestion, backed by a process pool when useful.
+
+    The yielded callable takes a list of texts and returns a list of embedding
+    vectors matching what the collection's embedding function would produce,
+    so the results can be passed straight to ``collection.add(embeddings=...)``.
+    The worker pool is started lazily on the first large enough call and
+    reused until the context exits. With use_cache, vectors are looked up in
+    the on-disk embedding cache first and only the misses are computed.
+
+    Args:
+        num_workers (int): Number of CPU worker processes (1 disables the pool)
+        batch_size (int): Number of texts per forward pass
+        use_cache (bool): Read and write the persistent embedding cache
+
+    Yields:
+        callable: encode(texts) -> list of embeddings
+    """
+    model = get_embedding_model()
+    cache = EmbeddingCache(embedding_model_id()) if use_cache else None
+    pool = None
+
+    def compute(texts):
+        nonlocal pool
+        start_time = time.time()
+        # ONNX Runtime already uses every core within a call, so only PyTorch gets a pool
+        use_pool = (num_workers > 1 and len(texts) >= MIN_TEXTS_PER_WORKER * 2
+                    and hasattr(model, "start_multi_process_pool"))
+        if use_pool:
+            if pool is None:
+                pool = model.start_multi_process_pool(target_devices=["cpu"] * num_workers)
+            chunk_size = max(batch_size, -(-len(texts) // (num_workers * 4)))
+            embeddings = model.encode(
+                texts, pool=pool, batch_size=batch_size, chunk_size=chunk_size, show_progress_bar=False
+            )
+        else:
+            embeddings = model.encode(texts, batch_size=batch_size, show_progress_bar=False)
+
+        elapsed_time = time.time() - start_time
+        logger.info(
+            f"Encoded {len(texts)} documents in {elapsed_time:.2f} seconds "
+            f"({len(texts) / max(elapsed_time, 1e-9):.1f} docs/sec, "
+            f"{num_workers if use_pool else 1} worker(s))"
+        )
+        return embeddings.tolist()
+
+    def encode(texts):
+        if not texts:
+            return []
+        if cache is None:
+            return compute(texts)
+
+        embeddings = cache.get_many(texts)
+        missing = [i for i, vector in enumerate(embeddings) if vector is None]
+        if missing:
+            # Identical texts in one batch are only embedded once
+            miss_texts = list(dict.fromkeys(texts[i] for i in missing))
+            computed = dict(zip(miss_texts, compute(miss_texts)))
+            cache.put_many(miss_texts, [computed[text] for text in miss_texts])
+            for i in missing:
+                embeddings[i] = computed[texts[i]]
+        return embeddings
+
+    try:
+        yield encode
+    finally:
+        if pool is not None:
+            model.stop_multi_process_pool(pool)
+        if cache is not None:
+            stats = cache.stats()
+            logger.info(
+                f"Embedding cache: {stats['hits']} hits, {stats['misses']} misses "
+                f"({stats['hit_rate']:.1%} hit rate), {stats['entries']} entries"
+            )
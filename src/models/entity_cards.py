@@ -0,0 +1,133 @@
+"""
+This module merges retrieval results into one card per restaurant, so the
+context states each restaurant's details once and lists what matched under it.
+"""
+import os
+import re
+from src.database.restaurant_table import format_restaurant_details
+from src.models.context_packer import EMPTY_VALUES, clean_document, relevance
+
+# Share of the other matches' relevance added to a restaurant's best match
+ENTITY_SUPPORT_WEIGHT = float(os.getenv("ENTITY_SUPPORT_WEIGHT", "0.25"))
+# Dishes listed per card, best matches first
+ENTITY_MAX_DISHES = int(os.getenv("ENTITY_MAX_DISHES", "8"))
+
+# Relevance weights by document type; restaurant overviews are the strongest
+# evidence that a restaurant matches
+DOCUMENT_TYPE_WEIGHTS = {
+    "restaurant_info": 4.0,
+    "menu_section": 2.5,
+    "cuisine_info": 1.5,
+    "location_info": 1.5,
+    "menu_item": 1.0
+}
+
+SECTION_ITEM_PATTERN = re.compile(r'• Item: (.*)\n\s*Price: (.*)\n\s*Description: (.*)')
+DESCRIPTION_PATTERN = re.compile(r'^Description: (.+)$', re.MULTILINE)
+
+def build_entity_cards(results, restaurant_table):
+    """
+    Group query results by restaurant and format one card per restaurant.
+
+    Args:
+        results: Results from ChromaDB query
+        restaurant_table: RestaurantTable with restaurant details
+
+    Returns:
+        list: Cards as dicts with restaurant_id, score and text, best first
+    """
+    documents = results['documents'][0]
+    metadatas = results['metadatas'][0]
+    distances = results['distances'][0]
+
+    entities = {}
+    for doc, meta, distance in zip(documents, metadatas, distances):
+        doc_type = meta.get('type', '')
+        if doc_type not in DOCUMENT_TYPE_WEIGHTS:
+            continue
+        # Indexes built before restaurant IDs existed are grouped by name
+        restaurant_id = meta.get('restaurant_id') or meta.get('restaurant', meta.get('name', ''))
+        entity = entities.setdefault(restaurant_id, {"restaurant_id": restaurant_id, "matches": []})
+        entity["matches"].append((relevance(distance) * DOCUMENT_TYPE_WEIGHTS[doc_type], doc_type, doc, meta))
+
+    cards = []
+    for entity in entities.values():
+        entity["matches"].sort(key=lambda match: match[0], reverse=True)
+        scores = [match[0] for match in entity["matches"]]
+        cards.append({
+            "restaurant_id": entity["restaurant_id"],
+            "score": scores[0] + ENTITY_SUPPORT_WEIGHT * sum(scores[1:]),
+            "text": format_entity_card(entity, restaurant_table.get(entity["restaurant_id"]))
+        })
+
+    cards.sort(key=lambda card: card["score"], reverse=True)
+    return cards
+
+def format_entity_card(entity, record):
+    """
+    Format the details of a restaurant and the documents that matched it.
+
+    Args:
+        entity (dict): Restaurant ID and (score, type, document, metadata) matches
+        record: Restaurant table record, or None if the restaurant is not in the table
+
+    Returns:
+        str: Card text
+    """
+    matches = entity["matches"]
+    types = {doc_type for _, doc_type, _, _ in matches}
+    overview = next((doc for _, doc_type, doc, _ in matches if doc_type == 'restaurant_info'), None)
+
+    if record is not None:
+        lines = [format_restaurant_details(record).rstrip()]
+        if ('restaurant_info' in types or 'location_info' in types) and record.get('operational_hours'):
+            lines.append(f"  - Hours: {format_hours(record['operational_hours'])}")
+        if overview and (match := DESCRIPTION_PATTERN.search(overview)):
+            lines.append(f"  - Description: {match.group(1).strip()}")
+    else:
+        # Without a table record, the best document describes the restaurant
+        lines = [overview or matches[0][2]]
+
+    # Dishes from matched menu items first, then from matched menu sections
+    dishes = []
+    seen_dishes = set()
+    for _, doc_type, doc, meta in matches:
+        if doc_type == 'menu_item':
+            description = match.group(1).strip() if (match := DESCRIPTION_PATTERN.search(doc)) else ""
+            dish = (meta.get('item_name', ''), meta.get('price', ''), meta.get('food_type', ''), description)
+        elif doc_type == 'menu_section':
+            for name, price, description in SECTION_ITEM_PATTERN.findall(doc):
+                add_dish(dishes, seen_dishes, (name, price, meta.get('food_type', ''), description))
+            continue
+        else:
+            continue
+        add_dish(dishes, seen_dishes, dish)
+
+    if dishes:
+        lines.append("  - Matching dishes:")
+        for name, price, food_type, description in dishes[:ENTITY_MAX_DISHES]:
+            line = f"    • {name}"
+            if food_type and food_type != 'Unknown':
+                line += f" ({food_type})"
+            if price and price != 'Unknown':
+                line += f" - {price}"
+            if description.strip().lower() not in EMPTY_VALUES:
+                line += f": {description}"
+            lines.append(line)
+        if len(dishes) > ENTITY_MAX_DISHES:
+            lines.append(f"    ... and {len(dishes) - ENTITY_MAX_DISHES} more matching items")
+
+    return clean_document("\n".join(lines))
+
+def add_dish(dishes, seen_dishes, dish):
+    name = dish[0].strip().lower()
+    if name and name not in seen_dishes:
+        seen_dishes.add(name)
+        dishes.append(dish)
+
+def format_hours(operational_hours):
+    """Format opening hours on one line, collapsing days with the same hours"""
+    hours = set(operational_hours.values())
+    if len(hours) == 1:
+        return f"Daily {hours.pop()}"
+    return ", ".join(f"{day.title()} {value}" for day, value in operational_hours.items())
@@ -0,0 +1,150 @@
+"""
+This module stores chat messages in an append-only SQLite log (WAL mode),
+indexed by session, with a background thread that writes them in batches.
+"""
+import os
+import json
+import queue
+import sqlite3
+import logging
+import threading
+from contextlib import closing
+
+logger = logging.getLogger(__name__)
+
+# Writer settings
+HISTORY_WRITE_BATCH_SIZE = int(os.getenv("HISTORY_WRITE_BATCH_SIZE", "256"))
+# Seconds the writer waits for more messages before committing a batch
+HISTORY_WRITE_INTERVAL = float(os.getenv("HISTORY_WRITE_INTERVAL", "0.05"))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS messages (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    session_id TEXT NOT NULL,
+    role TEXT NOT NULL,
+    content TEXT NOT NULL,
+    timestamp TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS messages_session ON messages (session_id, id);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+class HistoryStore:
+    """
+    Append-only message log.
+
+    Appending only queues the message, so it costs the same no matter how
+    much history exists; a writer thread commits queued messages in batches.
+    Reading a session uses the session index and never touches other sessions.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        # The connection's context manager only commits; closing() closes it
+        with closing(self._connect()) as conn, conn:
+            conn.executescript(SCHEMA)
+        self._queue = queue.Queue()
+        self._writer = threading.Thread(target=self._write_loop, name="history-writer", daemon=True)
+        self._writer.start()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        # WAL keeps committed transactions durable across crashes of the app
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def append(self, session_id, message):
+        """
+        Queue a message for writing.
+
+        Args:
+            session_id (str): Chat session the message belongs to
+            message (dict): Message with role, content and timestamp
+        """
+        self._queue.put((session_id, message["role"], message["content"], message["timestamp"]))
+
+    def load_session(self, session_id):
+        """
+        Read the committed messages of one session.
+
+        Messages still in the write queue are not included; callers keep the
+        sessions they append to in memory.
+
+        Args:
+            session_id (str): Chat session ID
+
+        Returns:
+            list: Messages in the order they were added
+        """
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            rows = conn.execute(
+                "SELECT role, content, timestamp FROM messages WHERE session_id = ? ORDER BY id",
+                (session_id,)
+            ).fetchall()
+        finally:
+            conn.close()
+        return [{"role": role, "content": content, "timestamp": timestamp} for role, content, timestamp in rows]
+
+    def flush(self):
+        """Block until every queued message is committed"""
+        self._queue.join()
+
+    def import_legacy_json(self, json_file):
+        """
+        Import a conversation_history.json file written by the old store once.
+
+        Args:
+            json_file (str): Path of the legacy JSON history
+
+        Returns:
+            int: Number of imported messages
+        """
+        if not os.path.exists(json_file):
+            return 0
+        with closing(self._connect()) as conn, conn:
+            if conn.execute("SELECT 1 FROM meta WHERE key = 'legacy_import'").fetchone():
+                return 0
+            try:
+                with open(json_file, "r", encoding="utf-8") as f:
+                    history = json.load(f)
+            except Exception as e:
+                logger.error(f"Error reading legacy conversation history: {str(e)}")
+                return 0
+            rows = [
+                (session_id, message["role"], message["content"], message.get("timestamp", ""))
+                for session_id, messages in history.items()
+                for message in messages
+            ]
+            conn.executemany(
+                "INSERT INTO messages (session_id, role, content, timestamp) VALUES (?, ?, ?, ?)", rows
+            )
+            conn.execute("INSERT INTO meta (key, value) VALUES ('legacy_import', ?)", (json_file,))
+        logger.info(f"Imported {len(rows)} messages from {json_file}")
+        return len(rows)
+
+    def _write_loop(self):
+        conn = self._connect()
+        while True:
+            batch = [self._queue.get()]
+            # Collect whatever else arrives shortly, up to the batch size
+            while len(batch) < HISTORY_WRITE_BATCH_SIZE:
+                try:
+                    batch.append(self._queue.get(timeout=HISTORY_WRITE_INTERVAL))
+                except queue.Empty:
+                    break
+            try:
+                with conn:
+                    conn.executemany(
+                        "INSERT INTO messages (session_id, role, content, timestamp) VALUES (?, ?, ?, ?)", batch
+                    )
+            except Exception as e:
+                logger.error(f"Error saving {len(batch)} conversation messages: {str(e)}")
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
@@ -0,0 +1,169 @@
+"""
+This module decides whether a query should go through restaurant retrieval,
+using a compiled word-boundary keyword match with an embedding fallback.
+"""
+import os
+import re
+import logging
+from functools import lru_cache
+import numpy as np
+from src.prompts.prompts import FOOD_RELATED_KEYWORDS
+
+logger = logging.getLogger(__name__)
+
+# Compare the query embedding with example centroids when no keyword matches
+INTENT_CENTROID_FALLBACK = os.getenv("INTENT_CENTROID_FALLBACK", "true").lower() == "true"
+# How much closer to the food centroid than the general one a query must be
+INTENT_CENTROID_MARGIN = float(os.getenv("INTENT_CENTROID_MARGIN", "0.0"))
+
+# Example queries the centroids are built from
+FOOD_INTENT_EXAMPLES = [
+    "where can I get good biryani",
+    "suggest a place for a birthday party in Bandra",
+    "best momos in Lajpat Nagar",
+    "I'm hungry, what's open near me",
+    "places with pasta under 500",
+    "what does KFC serve",
+    "is Project Hum pure veg",
+    "show me pizza options in Dwarka",
+    "good spots for brunch in Mumbai",
+    "which cafe has the best cheesecake",
+    "what are the timings of Subway in Delhi",
+    "cheap north indian thali nearby",
+]
+GENERAL_INTENT_EXAMPLES = [
+    "what is the capital of France",
+    "how do I reset my password",
+    "explain how a neural network works",
+    "what's the weather like today",
+    "write a short poem about the sea",
+    "who won the cricket world cup in 2011",
+    "how many planets are in the solar system",
+    "translate hello into Spanish",
+    "tell me a joke",
+    "what time zone is Mumbai in",
+    "how do I improve my resume",
+    "what is the population of Delhi",
+]
+
+# Inflections allowed after a keyword ("recommended", "recommendations",
+# "eating"); a closed list, so "tea" still doesn't match "team"
+KEYWORD_SUFFIX = r'(?:s|es|d|ed|ing|ings|er|ers|en|ations?)?'
+
+def build_keyword_pattern(keywords, suffix=KEYWORD_SUFFIX):
+    """
+    Compile keywords into one word-bounded regex for lowercase text.
+
+    The alternatives are nested as a prefix trie ("cafe|cake" becomes
+    "ca(?:fe|ke)"), so the regex engine tries each shared prefix once instead
+    of every keyword at every position. By default plurals and common
+    inflections ("restaurants", "dishes", "recommended", "eating") match
+    their keyword.
+
+    Args:
+        keywords (list): Lowercase keywords, or regex fragments for each word
+            position when given as tuples
+        suffix (str): Pattern allowed after a keyword
+
+    Returns:
+        re.Pattern: Compiled pattern
+    """
+    trie = {}
+    for keyword in keywords:
+        parts = keyword if isinstance(keyword, tuple) else tuple(re.escape(char) for char in keyword)
+        node = trie
+        for part in parts:
+            node = node.setdefault(part, {})
+        node[""] = {}
+    return re.compile(r'\b' + trie_to_regex(trie) + suffix + r'\b')
+
+def trie_to_regex(node):
+    # A "" key marks the end of a keyword; it becomes an optional remainder
+    is_end = "" in node
+    branches = [part + trie_to_regex(child) for part, child in node.items() if part]
+    if not branches:
+        return ""
+    # Longest first so the longest keyword wins at each position
+    pattern = "(?:" + "|".join(sorted(branches, key=len, reverse=True)) + ")"
+    return pattern + "?" if is_end else pattern
+
+FOOD_KEYWORD_PATTERN = build_keyword_pattern([keyword.lower() for keyword in FOOD_RELATED_KEYWORDS])
+
+_name_pattern_cache = {"version": None, "pattern": None}
+
+def is_food_related(query, embed=None, restaurant_table=None):
+    """
+    Decide whether a query is about restaurants or food.
+
+    Args:
+        query (str): The user query
+        embed (callable, optional): Returns the embedding of a text; enables
+            the centroid fallback for queries without keywords
+        restaurant_table: RestaurantTable whose restaurant names also count
+            as keywords ("Is Project Hum open?")
+
+    Returns:
+        bool: True if the query should use restaurant retrieval
+    """
+    text = query.lower()
+    if FOOD_KEYWORD_PATTERN.search(text):
+        return True
+    if restaurant_table is not None and (name_pattern := get_restaurant_name_pattern(restaurant_table)):
+        if name_pattern.search(text):
+            return True
+    if embed is None or not INTENT_CENTROID_FALLBACK:
+        return False
+
+    try:
+        food_centroid, general_centroid = get_intent_centroids(embed)
+        query_embedding = normalize(np.asarray(embed(query), dtype=np.float32))
+        return float(query_embedding @ food_centroid - query_embedding @ general_centroid) > INTENT_CENTROID_MARGIN
+    except Exception as e:
+        logger.error(f"Error in intent centroid fallback: {str(e)}")
+        return False
+
+def get_restaurant_name_pattern(restaurant_table):
+    """
+    Compile the restaurant names in the table into one regex, rebuilt when the table changes.
+
+    Punctuation inside names is optional, so "Bombay-Taco-Co." matches
+    "bombay taco co".
+    """
+    if _name_pattern_cache["version"] == restaurant_table.version and _name_pattern_cache["pattern"]:
+        return _name_pattern_cache["pattern"]
+
+    names = set()
+    for record in restaurant_table.records.values():
+        words = re.findall(r"[a-z0-9']+", (record.get("name") or "").lower())
+        if words and len("".join(words)) >= 3:
+            # Each word is matched literally, with optional punctuation between words
+            parts = []
+            for i, word in enumerate(words):
+                parts.extend(re.escape(char) for char in word)
+                if i < len(words) - 1:
+                    parts.append(r"[\s\-.&]*")
+            names.add(tuple(parts))
+
+    pattern = build_keyword_pattern(names, suffix="") if names else None
+    _name_pattern_cache["version"] = restaurant_table.version
+    _name_pattern_cache["pattern"] = pattern
+    return pattern
+
+@lru_cache(maxsize=4)
+def get_intent_centroids(embed):
+    """
+    Embed the example queries once and return the food and general centroids.
+
+    Args:
+        embed (callable): Returns the embedding of a text
+
+    Returns:
+        tuple: Normalized food and general centroid vectors
+    """
+    def centroid(examples):
+        vectors = np.asarray([normalize(np.asarray(embed(text), dtype=np.float32)) for text in examples])
+        return normalize(vectors.mean(axis=0))
+    return centroid(FOOD_INTENT_EXAMPLES), centroid(GENERAL_INTENT_EXAMPLES)
+
+def normalize(vector):
+    return vector / max(float(np.linalg.norm(vector)), 1e-12)
@@ -0,0 +1,152 @@
+"""
+This module holds the embedding models loaded in this process. Each model
+is loaded once, on first use, and shared by everything that embeds text:
+the Chroma collections, query embedding and bulk encoding.
+"""
+import os
+import sys
+import time
+import logging
+import threading
+import numpy as np
+from chromadb.api.types import EmbeddingFunction, Documents
+
+logger = logging.getLogger(__name__)
+
+class ModelRegistry:
+    """
+    Process-wide registry of loaded models, keyed by model and backend.
+
+    Loading happens outside the registry lock but under a per-key lock, so two
+    threads asking for the same model wait for one load, while different
+    models load independently.
+    """
+
+    def __init__(self):
+        self._models = {}
+        self._stats = {}
+        self._lock = threading.Lock()
+        self._key_locks = {}
+
+    def get(self, key, loader):
+        """
+        Return the model registered under a key, loading it on first use.
+
+        Args:
+            key (str): Model identifier, e.g. "<model name>:<backend>"
+            loader (callable): Loads the model; called at most once per key
+
+        Returns:
+            The loaded model
+        """
+        if (model := self._models.get(key)) is not None:
+            return model
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+        with key_lock:
+            if (model := self._models.get(key)) is not None:
+                return model
+
+            rss_before = resident_memory_bytes()
+            start_time = time.time()
+            model = loader()
+            self._stats[key] = {
+                "load_seconds": time.time() - start_time,
+                "rss_delta_bytes": resident_memory_bytes() - rss_before,
+                "weight_bytes": model_weight_bytes(model)
+            }
+            self._models[key] = model
+            logger.info(
+                f"Loaded {key} in {self._stats[key]['load_seconds']:.2f} seconds "
+                f"({self._stats[key]['weight_bytes'] / 1e6:.1f} MB weights, "
+                f"+{self._stats[key]['rss_delta_bytes'] / 1e6:.1f} MB resident)"
+            )
+            return model
+
+    def loaded(self, key):
+        return key in self._models
+
+    def memory_report(self):
+        """
+        Report the memory of every loaded model.
+
+        Returns:
+            dict: Loaded models with their load time, weight size and the
+                growth of resident memory while they loaded, plus the current
+                resident memory of the process
+        """
+        return {
+            "models": {key: dict(stats) for key, stats in self._stats.items()},
+            "resident_bytes": resident_memory_bytes()
+        }
+
+class ModelEmbeddingFunction(EmbeddingFunction[Documents]):
+    """
+    Chroma embedding function around a registry model, so collections embed
+    with the same weights as query embedding instead of loading their own copy.
+
+    It reports the name and config of Chroma's SentenceTransformer function:
+    collections record the function they were created with and refuse to open
+    with a differently named one, and every backend embeds with the same
+    model, so an index built with either backend can be queried with the other.
+    """
+
+    def __init__(self, model, model_name):
+        self.model = model
+        self.model_name = model_name
+
+    def __call__(self, input: Documents):
+        embeddings = self.model.encode(list(input), show_progress_bar=False)
+        return [np.asarray(embedding, dtype=np.float32) for embedding in embeddings]
+
+    @staticmethod
+    def name():
+        return "sentence_transformer"
+
+    def default_space(self):
+        return "cosine"
+
+    def supported_spaces(self):
+        return ["cosine", "l2", "ip"]
+
+    def get_config(self):
+        return {
+            "model_name": self.model_name,
+            "device": "cpu",
+            "normalize_embeddings": False,
+            "kwargs": {}
+        }
+
+    @staticmethod
+    def build_from_config(config):
+        from src.models.encoding import get_embedding_function
+        return get_embedding_function()
+
+    def is_legacy(self):
+        # The default check builds a second function from the config just to compare it
+        return False
+
+def model_weight_bytes(model):
+    """Size of a model's weights: PyTorch parameters and buffers, or the ONNX model file"""
+    if hasattr(model, "parameters"):
+        tensors = list(model.parameters()) + list(model.buffers())
+        return sum(tensor.numel() * tensor.element_size() for tensor in tensors)
+    if path := getattr(model, "model_path", None):
+        return os.path.getsize(path)
+    return 0
+
+def resident_memory_bytes():
+    """Current resident set size of the process, or the peak where that is unavailable"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        import resource
+        # ru_maxrss is in kilobytes on Linux and bytes on macOS
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+_registry = ModelRegistry()
+
+def get_model_registry():
+    return _registry
@@ -0,0 +1,171 @@
+"""
+This module extracts structured constraints from user queries and turns them
+into ChromaDB `where` filters over the typed metadata written at ingest.
+"""
+import re
+from src.database.ingestion import CITY_ALIASES
+
+# "veg", "pure veg", "vegetarian" - but not "non-veg" / "non veg"
+VEG_PATTERN = re.compile(r'(?<!non[- ])(?<!non)\b(?:pure[- ]?veg|vegetarian|veg)\b')
+NON_VEG_PATTERN = re.compile(r'\bnon[- ]?veg(?:etarian)?\b')
+
+# Amounts count as prices only with a currency marker ("₹500", "500 rupees")
+CURRENCY_AMOUNT = r'(?:(?:₹|\brs\.?|\binr)\s*(\d[\d,]*)|(\d[\d,]*)\s*(?:₹|rs\b\.?|rupees\b|inr\b))'
+MAX_PRICE_PATTERN = re.compile(r'\b(?:under|below|less than|upto|up to|within|max(?:imum)?|cheaper than)\s*' + CURRENCY_AMOUNT)
+MIN_PRICE_PATTERN = re.compile(r'\b(?:above|over|more than|at least|min(?:imum)?)\s*' + CURRENCY_AMOUNT)
+# ...or after a budget word, where a bare number is a price: "budget of 800"
+BUDGET_PATTERN = re.compile(
+    r'\bbudget\s*(?:of|is|around|under|below|upto|up to|max(?:imum)?)?\s*(?:₹|rs\.?|inr)?\s*(\d[\d,]*)'
+)
+
+RATING_PATTERNS = (
+    # "rated above 4", "rating of at least 4.2", "rating 4+"
+    re.compile(r'\brat(?:ed|ing|ings)\s*(?:of\s*)?(?:above|over|more than|at least|greater than|>=?)?\s*(\d(?:\.\d)?)\s*\+?'),
+    # "4.5 stars", "above 3.5 star"; a whole number of stars is more often a
+    # hotel class ("5 star dining") than a rating
+    re.compile(r'\b(\d\.\d)\s*\+?\s*stars?\b'),
+)
+# Ratings are out of 5; bigger numbers after "rated" are not ratings
+MAX_RATING = 5.0
+
+# Neighbourhoods only count after a location word: "in Bandra", "near CP"
+LOCATION_PREFIX_PATTERN = re.compile(r'\b(?:in|near|at|around)\s+(?:the\s+)?')
+# Compass suffixes dropped to form an alias ("Bandra West" -> "bandra")
+DIRECTION_WORDS = {"west", "east", "north", "south"}
+
+_area_index_cache = {"version": None, "areas": {}}
+
+def parse_query_filters(query, restaurant_table=None):
+    """
+    Build a ChromaDB `where` filter from constraints mentioned in a query.
+
+    Recognizes vegetarian / non-vegetarian requests, price limits with a
+    currency or budget word ("under ₹500", "budget of 800"), minimum ratings
+    ("rated above 4", "4.5 stars") and locations, either a city or a
+    neighbourhood known from the restaurant table after a location word
+    ("in Bandra").
+
+    Args:
+        query (str): The user query
+        restaurant_table: RestaurantTable used to resolve neighbourhoods
+
+    Returns:
+        dict: A `where` filter, or None when the query has no constraints
+    """
+    text = query.lower()
+    conditions = []
+
+    # Dietary preference
+    if NON_VEG_PATTERN.search(text):
+        conditions.append({"is_veg": False})
+    elif VEG_PATTERN.search(text):
+        conditions.append({"is_veg": True})
+
+    # Price: menu items by their own price, other documents by cost for two
+    if match := MAX_PRICE_PATTERN.search(text) or BUDGET_PATTERN.search(text):
+        conditions.append(price_condition("$lte", matched_amount(match)))
+    elif match := MIN_PRICE_PATTERN.search(text):
+        conditions.append(price_condition("$gte", matched_amount(match)))
+
+    # Rating
+    for pattern in RATING_PATTERNS:
+        if (match := pattern.search(text)) and float(match.group(1)) <= MAX_RATING:
+            conditions.append({"rating": {"$gte": float(match.group(1))}})
+            break
+
+    # Location: a known neighbourhood is more specific than the city
+    if restaurant_ids := match_areas(text, restaurant_table):
+        conditions.append({"restaurant_id": {"$in": sorted(restaurant_ids)}})
+    elif city := match_city(text):
+        conditions.append({"city": city})
+
+    if not conditions:
+        return None
+    if len(conditions) == 1:
+        return conditions[0]
+    return {"$and": conditions}
+
+def parse_amount(value):
+    return float(value.replace(",", ""))
+
+def matched_amount(match):
+    # The amount is in whichever group matched: before or after the currency
+    return parse_amount(next(group for group in match.groups() if group))
+
+def price_condition(operator, amount):
+    return {"$or": [
+        {"price_inr": {operator: amount}},
+        {"$and": [
+            {"type": {"$ne": "menu_item"}},
+            {"cost_for_two_inr": {operator: amount}}
+        ]}
+    ]}
+
+def match_city(text):
+    # Prefer the longest alias so "new delhi" wins over "delhi"
+    for alias in sorted(CITY_ALIASES, key=len, reverse=True):
+        if re.search(rf'\b{re.escape(alias)}\b', text):
+            return CITY_ALIASES[alias]
+    return None
+
+def match_areas(text, restaurant_table):
+    """
+    Find neighbourhoods mentioned in the query and return their restaurants.
+
+    An area matches only right after a location word ("in", "near", "at",
+    "around"), so words that happen to start an area name ("link", "pali")
+    elsewhere in a query don't restrict the search.
+
+    Args:
+        text (str): Lowercased query
+        restaurant_table: RestaurantTable with restaurant locations
+
+    Returns:
+        set: IDs of restaurants in the mentioned neighbourhoods
+    """
+    if restaurant_table is None:
+        return set()
+
+    areas = get_area_index(restaurant_table)
+    # Longest names first, so "bandra west" wins over "bandra"
+    names = sorted(areas, key=len, reverse=True)
+    restaurant_ids = set()
+    for match in LOCATION_PREFIX_PATTERN.finditer(text):
+        following = text[match.end():]
+        for name in names:
+            if following.startswith(name) and not following[len(name):len(name) + 1].isalnum():
+                restaurant_ids.update(areas[name])
+                break
+    return restaurant_ids
+
+def get_area_index(restaurant_table):
+    """
+    Map neighbourhood names to restaurant IDs, rebuilt when the table changes.
+
+    Each comma-separated part of a restaurant's location is an area ("Pali
+    Hill", "Bandra West"). Its aliases are an abbreviation given in
+    parentheses ("Connaught Place (Cp)" -> "cp") and the name without a
+    compass suffix ("Bandra West" -> "bandra"). City names are left to the
+    city filter.
+    """
+    if _area_index_cache["version"] == restaurant_table.version and _area_index_cache["areas"]:
+        return _area_index_cache["areas"]
+
+    areas = {}
+    for restaurant_id, record in restaurant_table.records.items():
+        for part in (record.get("location") or "").split(","):
+            part = part.strip(" .").lower()
+            area = re.sub(r'\(.*?\)', '', part).strip()
+            if not area or area in CITY_ALIASES:
+                continue
+            names = {area}
+            names.update(alias.strip() for alias in re.findall(r'\((.*?)\)', part) if alias.strip())
+            words = area.split()
+            if len(words) > 1 and words[-1] in DIRECTION_WORDS:
+                names.add(" ".join(words[:-1]))
+            for name in names - set(CITY_ALIASES):
+                areas.setdefault(name, set()).add(restaurant_id)
+
+    _area_index_cache["version"] = restaurant_table.version
+    _area_index_cache["areas"] = areas
+    return areas
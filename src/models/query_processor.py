@@ -1,41 +1,151 @@
-from src.prompts.prompts import RESTAURANT_QUERY_PROMPT, GENERAL_QUERY_PROMPT, FOOD_RELATED_KEYWORDS
-from src.config.llm_config import generate_response
-from src.database.vector_db import query_database
+import asyncio
+from src.prompts.prompts import RESTAURANT_QUERY_PROMPT, GENERAL_QUERY_PROMPT
+from src.config.llm_config import generate_response, generate_response_stream, generate_response_async
+from src.database.vector_db import query_database, get_restaurant_table, get_query_embedding, collection_version
+from src.models.query_filters import parse_query_filters
+from src.models.intent_router import is_food_related
+from src.models.context_packer import context_item, pack_context
+from src.models.entity_cards import build_entity_cards
+from src.models.response_cache import get_response_cache
 from src.models.conversation_history import (
-    load_conversation_history, 
-    add_message_to_history,
-    get_recent_context,
+    flush_conversation_history,
     generate_session_id
 )
+from src.models.conversation_memory import build_conversation_context, schedule_summary_update
+from src.models.session_registry import get_session_registry
 
-# Global history store
-conversation_history = load_conversation_history()
-session_id = generate_session_id()
+# Session used by callers that don't have their own, e.g. scripts
+default_session_id = generate_session_id()
 
-def process_query(user_query, collection):
+# Background writes started by process_query_async
+_background_tasks = set()
+
+def process_query(user_query, collection, session_id=None):
     # Process user query and generate response using either restaurant-specific 
     # or general knowledge, depending on query type
-    global conversation_history
-    
-    # Add user message to history
-    conversation_history = add_message_to_history(
-        session_id, 
-        "user", 
-        user_query, 
-        conversation_history
-    )
+    session, prompt, cached_response, cache_entry = prepare_query(user_query, collection, session_id)
     
-    # Get recent conversation context (last 4 messages)
-    convo_context = get_recent_context(session_id, conversation_history)
+    # Get response from Gemini unless an equivalent question was already answered
+    response = cached_response if cached_response is not None else generate_response(prompt)
     
-    # First check if the query is restaurant-related
-    is_food_related = any(keyword in user_query.lower() for keyword in FOOD_RELATED_KEYWORDS)
+    complete_query(session, response, cache_entry)
+    return response
+
+def process_query_stream(user_query, collection, session_id=None):
+    """
+    Streaming variant of process_query.
     
-    if is_food_related:
+    Retrieval and prompt building happen before this returns, so callers can
+    show a spinner for that part; the returned generator then yields the
+    response as Gemini produces it and records the full text in the
+    conversation history once it is complete.
+    
+    Args:
+        user_query (str): The user query
+        collection: ChromaDB collection
+        session_id (str): Chat session of the user
+        
+    Returns:
+        generator: Chunks of response text
+    """
+    session, prompt, cached_response, cache_entry = prepare_query(user_query, collection, session_id)
+    return stream_response(session, prompt, cached_response, cache_entry)
+
+def stream_response(session, prompt, cached_response, cache_entry):
+    if cached_response is not None:
+        yield cached_response
+        response = cached_response
+    else:
+        chunks = []
+        for chunk in generate_response_stream(prompt):
+            chunks.append(chunk)
+            yield chunk
+        response = "".join(chunks)
+    
+    complete_query(session, response, cache_entry)
+
+def prepare_query(user_query, collection, session_id=None):
+    """
+    Record the user message and build the prompt for the response.
+    
+    Args:
+        user_query (str): The user query
+        collection: ChromaDB collection
+        session_id (str): Chat session of the user
+        
+    Returns:
+        tuple: (session, prompt, cached response or None, response cache entry or None)
+    """
+    session, convo_context, is_first_turn = start_turn(user_query, session_id)
+    return (session, *build_prompt(user_query, collection, convo_context, is_first_turn))
+
+def start_turn(user_query, session_id=None):
+    """
+    Add the user message to its session and read the conversation context.
+    
+    Args:
+        user_query (str): The user query
+        session_id (str): Chat session of the user
+        
+    Returns:
+        tuple: (session, recent conversation context, whether this is the first turn)
+    """
+    session = get_session_registry().get(session_id or default_session_id)
+    with session.lock:
+        # Add user message to history
+        session.add_message("user", user_query)
+        
+        # Get recent conversation context (last messages or rolling summary)
+        convo_context = build_conversation_context(session)
+        is_first_turn = len(session.messages) == 1
+    return session, convo_context, is_first_turn
+
+def build_prompt(user_query, collection, convo_context, is_first_turn):
+    """
+    Retrieve documents for the query and format the prompt.
+    
+    Args:
+        user_query (str): The user query
+        collection: ChromaDB collection
+        convo_context (str): Recent conversation formatted for the prompt
+        is_first_turn (bool): Whether this is the first message of the session
+        
+    Returns:
+        tuple: (prompt, cached response or None, response cache entry or None)
+    """
+    # First check if the query is restaurant-related; queries without food
+    # keywords fall back to comparing their embedding with example centroids
+    if is_food_related(user_query, embed=get_query_embedding, restaurant_table=get_restaurant_table()):
+        # Push constraints like "veg", "under ₹500" or "in Bandra" down into
+        # the vector search so it only ranks matching documents
+        where = parse_query_filters(user_query, get_restaurant_table())
+        
         # Query the vector database with increased results for more options
-        results = query_database(user_query, collection, n_results=20)
+        results = query_database(user_query, collection, n_results=20, where=where)
+        
+        # Fall back to an unfiltered search if nothing matches the constraints
+        if where and not results['documents'][0]:
+            results = query_database(user_query, collection, n_results=20)
         
         if results and results['documents'][0]:
+            # Only first turns are cached; later answers depend on the conversation
+            response_cache = get_response_cache()
+            cache_entry = None
+            if response_cache and is_first_turn:
+                cache_entry = {
+                    "query": user_query,
+                    "query_embedding": get_query_embedding(user_query),
+                    "doc_ids": results['ids'][0],
+                    "index_version": list(collection_version(collection))
+                }
+                cached_response = response_cache.lookup(
+                    cache_entry["query_embedding"],
+                    cache_entry["doc_ids"],
+                    cache_entry["index_version"]
+                )
+                if cached_response is not None:
+                    return None, cached_response, None
+            
             # Enhanced context building with metadata awareness
             db_context = build_enhanced_context(results, user_query)
             
@@ -45,42 +155,90 @@ def process_query(user_query, collection):
                 conversation_history=convo_context,
                 user_query=user_query
             )
-            
-            # Get response from Gemini with context
-            response = generate_response(prompt)
-            
-            # Add assistant response to history
-            conversation_history = add_message_to_history(
-                session_id,
-                "assistant",
-                response,
-                conversation_history
-            )
-            
-            return response
+            return prompt, None, cache_entry
     
     # For general queries or if no relevant results found
     prompt = GENERAL_QUERY_PROMPT.format(
         conversation_history=convo_context,
         user_query=user_query
     )
+    return prompt, None, None
+
+def complete_query(session, response, cache_entry=None):
+    """
+    Record the assistant response and cache it if it answers a first turn.
     
-    response = generate_response(prompt)
-    
+    Args:
+        session: Session the response belongs to
+        response (str): The complete assistant response
+        cache_entry (dict): Response cache key from prepare_query, if any
+    """
     # Add assistant response to history
-    conversation_history = add_message_to_history(
-        session_id,
-        "assistant",
-        response,
-        conversation_history
+    session.add_message("assistant", response)
+    schedule_summary_update(session)
+    
+    if cache_entry:
+        get_response_cache().store(response=response, **cache_entry)
+
+async def process_query_async(user_query, collection, session_id=None):
+    """
+    Async variant of process_query for serving many turns from one process.
+    
+    The history store writes messages in the background, retrieval runs in
+    a worker thread while the user message is being written, and
+    Gemini is called through its async client. Only retrieval and generation
+    are on the critical path.
+    
+    Args:
+        user_query (str): The user query
+        collection: ChromaDB collection
+        session_id (str): Chat session of the user
+        
+    Returns:
+        str: The assistant response
+    """
+    # Loading an evicted session reads the history store, so it runs in a worker thread
+    session, convo_context, is_first_turn = await asyncio.to_thread(start_turn, user_query, session_id)
+    
+    # Vector search and embedding are blocking, so they run in a worker thread
+    prompt, cached_response, cache_entry = await asyncio.to_thread(
+        build_prompt, user_query, collection, convo_context, is_first_turn
     )
     
+    # Get response from Gemini unless an equivalent question was already answered
+    response = cached_response if cached_response is not None else await generate_response_async(prompt)
+    
+    # Add assistant response to history; the history store writes it in the background
+    session.add_message("assistant", response)
+    schedule_summary_update(session)
+    if cache_entry:
+        run_in_background(get_response_cache().store, response=response, **cache_entry)
+    
     return response
 
+def run_in_background(func, *args, **kwargs):
+    """Run a blocking function in a worker thread without awaiting it"""
+    task = asyncio.create_task(asyncio.to_thread(func, *args, **kwargs))
+    # Keep a reference so the task is not garbage collected before it finishes
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+    return task
+
+async def flush_background_writes():
+    """Wait for pending history and cache writes, e.g. before the event loop closes"""
+    if _background_tasks:
+        await asyncio.gather(*_background_tasks, return_exceptions=True)
+    await asyncio.to_thread(flush_conversation_history)
+
 def build_enhanced_context(results, user_query):
     """
     Build an enhanced context from query results, using metadata to organize information.
     
+    Results are merged into one card per restaurant, holding its details once
+    and the dishes that matched, ranked by the combined relevance of all of
+    the restaurant's matching documents. Cards are packed into
+    CONTEXT_TOKEN_BUDGET tokens by relevance per token.
+    
     Args:
         results: Results from ChromaDB query
         user_query: The original user query to prioritize relevant info
@@ -91,96 +249,19 @@ def build_enhanced_context(results, user_query):
     if not results or not results['documents'][0]:
         return ""
     
-    # Get documents and their metadata
-    documents = results['documents'][0]
-    metadatas = results['metadatas'][0]
-    distances = results['distances'][0]
-    
-    # Create a list of (document, metadata, distance) tuples for easier sorting and processing
-    result_items = list(zip(documents, metadatas, distances))
-    
-    # Track restaurants to avoid duplicates
-    seen_restaurants = set()
-    
-    # Organize documents by type
-    restaurants_info = []
-    cuisine_info = []
-    location_info = []
-    menu_sections = []
-    menu_items = []
-    
-    # Sort restaurant info by relevance first
-    restaurant_items = [item for item in result_items if item[1].get('type', '') == 'restaurant_info']
-    
-    # Sort by distance (lower is better)
-    restaurant_items.sort(key=lambda x: x[2])
-    
-    # Create prioritized restaurant info
-    for doc, meta, _ in restaurant_items:
-        restaurant_name = meta.get('restaurant', meta.get('name', ''))
-        if restaurant_name not in seen_restaurants:
-            restaurants_info.append(doc)
-            seen_restaurants.add(restaurant_name)
-    
-    # Process other document types
-    for doc, meta, _ in result_items:
-        doc_type = meta.get('type', '')
-        restaurant_name = meta.get('restaurant', meta.get('name', ''))
-        
-        # Add unique restaurant information
-        if doc_type == 'restaurant_info':
-            # Already processed above
-            pass
-        # Add cuisine-specific information
-        elif doc_type == 'cuisine_info':
-            cuisine_info.append(doc)
-        # Add location-specific information
-        elif doc_type == 'location_info':
-            location_info.append(doc)
-        # Add menu sections
-        elif doc_type == 'menu_section':
-            menu_sections.append(doc)
-        # Add menu items
-        elif doc_type == 'menu_item':
-            menu_items.append(doc)
-    
-    # Build context with sections and ensure we include enough restaurants
-    context_parts = []
-    
-    # Add restaurant information first (most important)
-    if restaurants_info:
-        context_parts.append("RESTAURANT INFORMATION:")
-        # Ensure we include at least 5 restaurant info blocks if available
-        for i, info in enumerate(restaurants_info[:min(8, len(restaurants_info))]):
-            context_parts.append(f"Restaurant Option #{i+1}:")
-            context_parts.append(info)
-    
-    # Add cuisine information
-    if cuisine_info:
-        context_parts.append("\nCUISINE INFORMATION:")
-        context_parts.extend(cuisine_info[:min(5, len(cuisine_info))])
-    
-    # Add location information
-    if location_info:
-        context_parts.append("\nLOCATION INFORMATION:")
-        context_parts.extend(location_info[:min(5, len(location_info))])
-    
-    # Add menu sections
-    if menu_sections:
-        context_parts.append("\nMENU SECTIONS:")
-        context_parts.extend(menu_sections[:min(8, len(menu_sections))])
-    
-    # Add individual menu items
-    if menu_items:
-        context_parts.append("\nMENU ITEMS:")
-        context_parts.extend(menu_items[:min(12, len(menu_items))])
-    
-    # Join all parts
-    context = "\n\n".join(context_parts)
-    
-    # Limit context size if extremely large
-    max_chars = 16000
-    if len(context) > max_chars:
-        context = context[:max_chars] + "...\n[Context truncated due to size]"
-    
-    return context 
\ No newline at end of file
+    cards = build_entity_cards(results, get_restaurant_table())
+    items = [
+        context_item("RESTAURANTS", card["text"], card["score"], key=card["restaurant_id"])
+        for card in cards
+    ]
+    selected = pack_context(items)
+    if not selected:
+        return ""
+    
+    # Most relevant restaurants first
+    context_parts = ["RESTAURANTS:"]
+    for i, item in enumerate(selected):
+        context_parts.append(f"Restaurant Option #{i+1}:")
+        context_parts.append(item["text"])
+    
+    return "\n\n".join(context_parts)
@@ -0,0 +1,169 @@
+"""
+This module provides an opt-in semantic cache of LLM responses, so that
+paraphrases of an already answered question can skip the Gemini call.
+"""
+import os
+import json
+import logging
+import threading
+import numpy as np
+from src.config.paths import CHROMA_PERSIST_DIR
+
+logger = logging.getLogger(__name__)
+
+# Response cache settings
+RESPONSE_CACHE_ENABLED = os.getenv("RESPONSE_CACHE_ENABLED", "false").lower() == "true"
+RESPONSE_CACHE_FILE = os.path.join(CHROMA_PERSIST_DIR, "response_cache.json")
+# Minimum cosine similarity between query embeddings to reuse a response
+RESPONSE_CACHE_THRESHOLD = float(os.getenv("RESPONSE_CACHE_THRESHOLD", "0.92"))
+# Minimum overlap (Jaccard) between the retrieved document sets; 1.0 = identical
+RESPONSE_CACHE_MIN_OVERLAP = float(os.getenv("RESPONSE_CACHE_MIN_OVERLAP", "1.0"))
+RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "2000"))
+
+class ResponseCache:
+    """
+    Stores (query embedding, retrieved document IDs, response) triples.
+
+    A lookup hits when a stored query is similar enough to the new one and
+    was answered from the same retrieved documents. Entries are tied to an
+    index version and the whole cache is dropped when the index changes.
+    """
+
+    def __init__(self, path=RESPONSE_CACHE_FILE, threshold=RESPONSE_CACHE_THRESHOLD,
+                 min_overlap=RESPONSE_CACHE_MIN_OVERLAP, max_entries=RESPONSE_CACHE_MAX_ENTRIES):
+        self.path = path
+        self.threshold = threshold
+        self.min_overlap = min_overlap
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._index_version = None
+        self._entries = []
+        self._matrix = None
+        self._load()
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            self._index_version = data["index_version"]
+            self._entries = data["entries"]
+            self._rebuild_matrix()
+            logger.info(f"Loaded {len(self._entries)} cached responses")
+        except Exception as e:
+            logger.error(f"Error loading response cache: {str(e)}")
+
+    def _save(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_file = f"{self.path}.tmp"
+        with open(tmp_file, "w", encoding="utf-8") as f:
+            json.dump({"index_version": self._index_version, "entries": self._entries}, f, ensure_ascii=False)
+        os.replace(tmp_file, self.path)
+
+    def _rebuild_matrix(self):
+        if self._entries:
+            self._matrix = np.asarray([entry["embedding"] for entry in self._entries], dtype=np.float32)
+        else:
+            self._matrix = None
+
+    def _check_version(self, index_version):
+        # Responses were generated from the old index; none of them can be trusted
+        if index_version != self._index_version:
+            if self._entries:
+                logger.info("Index changed, clearing response cache")
+            self._index_version = index_version
+            self._entries = []
+            self._matrix = None
+
+    def lookup(self, query_embedding, doc_ids, index_version):
+        """
+        Find a cached response for a similar query over the same documents.
+
+        Args:
+            query_embedding (list): Embedding of the new query
+            doc_ids (list): IDs of the documents retrieved for the new query
+            index_version: Current index version
+
+        Returns:
+            str: Cached response, or None on a miss
+        """
+        with self._lock:
+            self._check_version(index_version)
+            if self._matrix is None:
+                self.misses += 1
+                return None
+
+            query = np.asarray(query_embedding, dtype=np.float32)
+            query /= max(np.linalg.norm(query), 1e-12)
+            similarities = self._matrix @ query
+            retrieved = set(doc_ids)
+
+            # Best matches first; stop at the first one below the threshold
+            for row in np.argsort(-similarities):
+                if similarities[row] < self.threshold:
+                    break
+                cached_ids = set(self._entries[row]["doc_ids"])
+                overlap = len(cached_ids & retrieved) / max(len(cached_ids | retrieved), 1)
+                if overlap >= self.min_overlap:
+                    self.hits += 1
+                    return self._entries[row]["response"]
+
+            self.misses += 1
+            return None
+
+    def store(self, query, query_embedding, doc_ids, response, index_version):
+        """
+        Add a response to the cache and persist it.
+
+        Args:
+            query (str): The query that was answered
+            query_embedding (list): Embedding of the query
+            doc_ids (list): IDs of the documents the answer was generated from
+            response (str): The generated response
+            index_version: Index version the documents came from
+        """
+        with self._lock:
+            self._check_version(index_version)
+            embedding = np.asarray(query_embedding, dtype=np.float32)
+            embedding /= max(np.linalg.norm(embedding), 1e-12)
+            self._entries.append({
+                "query": query,
+                "embedding": embedding.tolist(),
+                "doc_ids": list(doc_ids),
+                "response": response
+            })
+            # Drop the oldest entries beyond the size limit
+            del self._entries[:-self.max_entries]
+            self._rebuild_matrix()
+            try:
+                self._save()
+            except Exception as e:
+                logger.error(f"Error saving response cache: {str(e)}")
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0
+        }
+
+_response_cache = None
+
+def get_response_cache():
+    """
+    Return the process-wide response cache, or None if it is disabled.
+
+    Returns:
+        ResponseCache: The shared cache
+    """
+    global _response_cache
+    if not RESPONSE_CACHE_ENABLED:
+        return None
+    if _response_cache is None:
+        _response_cache = ResponseCache()
+    return _response_cache
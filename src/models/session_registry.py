@@ -0,0 +1,155 @@
+"""
+This module keeps the conversation state of active chat sessions in memory,
+one entry per user session, loading history lazily and evicting idle sessions.
+"""
+import os
+import time
+import logging
+import threading
+from datetime import datetime
+from collections import OrderedDict
+from src.models.conversation_history import get_history_store
+
+logger = logging.getLogger(__name__)
+
+# Registry limits
+SESSION_MAX_COUNT = int(os.getenv("SESSION_MAX_COUNT", "1000"))
+# Sessions unused for this many seconds are dropped from memory
+SESSION_IDLE_TTL = float(os.getenv("SESSION_IDLE_TTL", "1800"))
+SESSION_MEMORY_LIMIT = int(os.getenv("SESSION_MEMORY_LIMIT_MB", "64")) * 1024 * 1024
+# Rough per-message overhead of the dict, timestamp and role strings
+MESSAGE_OVERHEAD_BYTES = 300
+
+class Session:
+    """
+    Messages of one chat session plus a lock serializing changes to it.
+    """
+
+    def __init__(self, session_id, messages):
+        self.session_id = session_id
+        self.messages = messages
+        self.lock = threading.RLock()
+        self.last_used = time.monotonic()
+        self.size = sum(message_size(message) for message in messages)
+        # Rolling summary of messages[:summarized_count], see conversation_memory
+        self.summary = ""
+        self.summarized_count = 0
+        self.summary_pending = False
+
+    def add_message(self, role, content):
+        """
+        Append a message and queue it for the history store.
+
+        Args:
+            role (str): "user" or "assistant"
+            content (str): Message text
+
+        Returns:
+            dict: The added message
+        """
+        message = {
+            "role": role,
+            "content": content,
+            "timestamp": datetime.now().isoformat()
+        }
+        with self.lock:
+            self.messages.append(message)
+            self.size += message_size(message)
+            get_history_store().append(self.session_id, message)
+        return message
+
+def message_size(message):
+    return len(message["content"]) + MESSAGE_OVERHEAD_BYTES
+
+class SessionRegistry:
+    """
+    Maps session IDs to Session objects.
+
+    Sessions are read from the history store on first use and evicted least
+    recently used first when the registry holds too many sessions or too much
+    message text, or when they have been idle longer than `ttl` seconds.
+    Evicted sessions are reloaded from the store when they come back.
+    """
+
+    def __init__(self, max_sessions=SESSION_MAX_COUNT, ttl=SESSION_IDLE_TTL, max_bytes=SESSION_MEMORY_LIMIT):
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._sessions = OrderedDict()
+        self._evicted = set()
+        self._lock = threading.Lock()
+
+    def get(self, session_id):
+        """
+        Return the session, loading its history if it is not in memory.
+
+        Args:
+            session_id (str): Chat session ID
+
+        Returns:
+            Session: The session
+        """
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is not None:
+                self._sessions.move_to_end(session_id)
+                session.last_used = time.monotonic()
+                return session
+
+        store = get_history_store()
+        if session_id in self._evicted:
+            # Messages of an evicted session may still be waiting in the write queue
+            store.flush()
+        messages = store.load_session(session_id)
+
+        with self._lock:
+            # Another thread may have loaded the same session meanwhile
+            session = self._sessions.get(session_id)
+            if session is None:
+                session = Session(session_id, messages)
+                self._sessions[session_id] = session
+                self._evicted.discard(session_id)
+            self._sessions.move_to_end(session_id)
+            session.last_used = time.monotonic()
+            self._evict()
+        return session
+
+    def _evict(self):
+        now = time.monotonic()
+        total_size = sum(session.size for session in self._sessions.values())
+        for session_id in list(self._sessions):
+            session = self._sessions[session_id]
+            over_limit = len(self._sessions) > self.max_sessions or total_size > self.max_bytes
+            if not over_limit and now - session.last_used <= self.ttl:
+                # Sessions are in LRU order, so the rest are newer
+                break
+            # Never evict the session just requested or one that is being updated
+            if session_id == next(reversed(self._sessions)) or not session.lock.acquire(blocking=False):
+                continue
+            try:
+                del self._sessions[session_id]
+                self._evicted.add(session_id)
+                total_size -= session.size
+            finally:
+                session.lock.release()
+
+    def __len__(self):
+        return len(self._sessions)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "sessions": len(self._sessions),
+                "bytes": sum(session.size for session in self._sessions.values())
+            }
+
+_registry = None
+_registry_lock = threading.Lock()
+
+def get_session_registry():
+    """Return the process-wide session registry"""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = SessionRegistry()
+        return _registry
@@ -0,0 +1,197 @@
+"""
+This module normalizes text for keyword search. It has no Streamlit
+dependency so ingestion scripts can use it as well as the app.
+
+NLTK is imported on first use. Its data is looked up in NLTK_DATA_DIR first
+(run `python utils/download_nltk_data.py` to vendor it there). Missing data
+is downloaded by the ingestion step, never while answering a query, unless
+NLTK_AUTO_DOWNLOAD is set.
+"""
+import os
+import re
+import logging
+import multiprocessing
+from functools import lru_cache
+from concurrent.futures import ProcessPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+# Vendored NLTK data, searched before the default locations
+NLTK_DATA_DIR = os.getenv("NLTK_DATA_DIR", "nltk_data")
+# Download missing resources on first use too, not only during ingestion;
+# otherwise missing resources are skipped
+NLTK_AUTO_DOWNLOAD = os.getenv("NLTK_AUTO_DOWNLOAD", "false").lower() == "true"
+# Resource name for nltk.download and the path nltk.data.find looks it up by
+NLTK_RESOURCES = {
+    "punkt_tab": "tokenizers/punkt_tab",
+    "stopwords": "corpora/stopwords",
+    "wordnet": "corpora/wordnet",
+}
+# Batches at least this large are split across processes; spawned workers
+# take seconds to start and import NLTK, so smaller batches run faster in-process
+PREPROCESS_PARALLEL_MIN = int(os.getenv("PREPROCESS_PARALLEL_MIN", "50000"))
+PREPROCESS_WORKERS = int(os.getenv("PREPROCESS_WORKERS", str(os.cpu_count() or 1)))
+LEMMA_CACHE_SIZE = 100000
+
+NON_WORD_PATTERN = re.compile(r'[^\w\s]')
+DIGIT_PATTERN = re.compile(r'\d+')
+
+@lru_cache(maxsize=None)
+def get_nltk():
+    """Import NLTK on first use, since importing it takes seconds"""
+    import nltk
+    if os.path.abspath(NLTK_DATA_DIR) not in map(os.path.abspath, nltk.data.path):
+        nltk.data.path.insert(0, NLTK_DATA_DIR)
+    return nltk
+
+# Download required NLTK resources once per process, and only missing ones.
+# Called by ingestion; the query path only downloads with NLTK_AUTO_DOWNLOAD
+@lru_cache(maxsize=None)
+def download_nltk_resources():
+    missing = [name for name, path in NLTK_RESOURCES.items() if not find_nltk_resource(path)]
+    if not missing:
+        return
+    try:
+        os.makedirs(NLTK_DATA_DIR, exist_ok=True)
+        for name in missing:
+            get_nltk().download(name, download_dir=NLTK_DATA_DIR, quiet=True)
+    except Exception as e:
+        logger.warning(f"Error downloading NLTK resources: {e}")
+
+def find_nltk_resource(path):
+    try:
+        get_nltk().data.find(path)
+        return True
+    except LookupError:
+        return False
+
+@lru_cache(maxsize=None)
+def nltk_resource_available(resource):
+    # Looking up a missing resource searches every data path, so remember the answer
+    if NLTK_AUTO_DOWNLOAD:
+        download_nltk_resources()
+    if find_nltk_resource(resource):
+        return True
+    logger.warning(f"NLTK resource {resource} is not available")
+    return False
+
+@lru_cache(maxsize=None)
+def get_stopwords():
+    if not nltk_resource_available('corpora/stopwords'):
+        return frozenset()
+    from nltk.corpus import stopwords
+    return frozenset(stopwords.words('english'))
+
+@lru_cache(maxsize=None)
+def get_lemmatizer():
+    if not nltk_resource_available('corpora/wordnet'):
+        return None
+    from nltk.stem import WordNetLemmatizer
+    return WordNetLemmatizer()
+
+@lru_cache(maxsize=None)
+def get_stemmer():
+    from nltk.stem import PorterStemmer
+    return PorterStemmer()
+
+@lru_cache(maxsize=None)
+def get_word_tokenizer():
+    if not nltk_resource_available('tokenizers/punkt_tab'):
+        return None
+    from nltk.tokenize import word_tokenize
+    return word_tokenize
+
+@lru_cache(maxsize=LEMMA_CACHE_SIZE)
+def lemmatize(token):
+    # Vocabularies are small and repetitive, so most lookups hit the cache
+    lemmatizer = get_lemmatizer()
+    return lemmatizer.lemmatize(token) if lemmatizer else token
+
+@lru_cache(maxsize=LEMMA_CACHE_SIZE)
+def stem(token):
+    return get_stemmer().stem(token)
+
+def tokenize(text):
+    word_tokenize = get_word_tokenizer()
+    if word_tokenize is None:
+        # Punctuation is already stripped, so whitespace splitting is close enough
+        return text.split()
+    return word_tokenize(text)
+
+# Text preprocessing function
+def preprocess_text(text, remove_stopwords=True, stemming=False, lemmatization=True):
+    """
+    Preprocess text by cleaning, normalizing, and optionally removing stopwords and applying stemming/lemmatization
+
+    Resources are loaded once per process and lemmas are memoized. Missing
+    NLTK data does not fail the call: tokenization falls back to whitespace
+    splitting and stopword removal and lemmatization are skipped.
+
+    Args:
+        text (str): Input text to preprocess
+        remove_stopwords (bool): Whether to remove stopwords
+        stemming (bool): Whether to apply stemming
+        lemmatization (bool): Whether to apply lemmatization
+
+    Returns:
+        str: Preprocessed text
+    """
+    # Convert to lowercase
+    text = text.lower()
+
+    # Remove special characters and digits
+    text = NON_WORD_PATTERN.sub('', text)
+    text = DIGIT_PATTERN.sub('', text)
+
+    # Tokenize
+    tokens = tokenize(text)
+
+    # Remove stopwords if requested
+    if remove_stopwords:
+        stop_words = get_stopwords()
+        tokens = [token for token in tokens if token not in stop_words]
+
+    # Apply stemming if requested
+    if stemming:
+        tokens = [stem(token) for token in tokens]
+
+    # Apply lemmatization if requested
+    if lemmatization and get_lemmatizer():
+        tokens = [lemmatize(token) for token in tokens]
+
+    # Join tokens back into text
+    return ' '.join(tokens)
+
+def preprocess_texts(texts, remove_stopwords=True, stemming=False, lemmatization=True,
+                     num_workers=PREPROCESS_WORKERS):
+    """
+    Preprocess a list of texts, in parallel processes for large batches.
+
+    Args:
+        texts (list): Input texts
+        remove_stopwords (bool): Whether to remove stopwords
+        stemming (bool): Whether to apply stemming
+        lemmatization (bool): Whether to apply lemmatization
+        num_workers (int): Maximum number of worker processes
+
+    Returns:
+        list: Preprocessed texts, in input order
+    """
+    options = (remove_stopwords, stemming, lemmatization)
+    if num_workers <= 1 or len(texts) < PREPROCESS_PARALLEL_MIN:
+        return [preprocess_text(text, *options) for text in texts]
+
+    # Download here, if at all, so workers find the data on disk instead of each downloading
+    if NLTK_AUTO_DOWNLOAD:
+        download_nltk_resources()
+    chunk_size = -(-len(texts) // (num_workers * 4))
+    chunks = [texts[i:i + chunk_size] for i in range(0, len(texts), chunk_size)]
+    # Spawned, not forked: this can run from a background thread of a process
+    # that holds torch, Chroma and Streamlit threads, and forking it can deadlock
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=num_workers, mp_context=context) as executor:
+        results = executor.map(_preprocess_chunk, chunks, [options] * len(chunks))
+        return [text for chunk in results for text in chunk]
+
+def _preprocess_chunk(texts, options):
+    return [preprocess_text(text, *options) for text in texts]
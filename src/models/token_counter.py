@@ -0,0 +1,109 @@
+"""
+This module estimates prompt sizes in tokens without calling the model API
+for every block.
+
+Counting each block with Gemini's count_tokens would add a network round
+trip per block to every query, so sizes are estimated from the length in
+characters. The characters-per-token ratio is measured once per model with
+count_tokens on a real context (see calibrate_token_counter in llm_config)
+and cached on disk; until then, or without API access, CHARS_PER_TOKEN is
+used. Counts are therefore estimates calibrated against the real tokenizer,
+not exact counts.
+"""
+import os
+import json
+import logging
+import threading
+from src.config.paths import CHROMA_PERSIST_DIR
+
+logger = logging.getLogger(__name__)
+
+# Average characters per Gemini token for English text, used until calibrated
+CHARS_PER_TOKEN = float(os.getenv("CHARS_PER_TOKEN", "4"))
+# Measured characters per token and the model it was measured for
+TOKEN_CALIBRATION_FILE = os.path.join(CHROMA_PERSIST_DIR, "token_calibration.json")
+
+_calibration = {}
+_calibration_lock = threading.Lock()
+
+def load_calibration():
+    """Read the measured ratio once per process"""
+    if not _calibration:
+        with _calibration_lock:
+            if not _calibration:
+                try:
+                    with open(TOKEN_CALIBRATION_FILE, "r", encoding="utf-8") as f:
+                        _calibration.update(json.load(f))
+                except (OSError, ValueError):
+                    _calibration.update({"model": None, "chars_per_token": CHARS_PER_TOKEN})
+    return _calibration
+
+def is_calibrated(model_name):
+    return load_calibration().get("model") == model_name
+
+def chars_per_token():
+    return load_calibration().get("chars_per_token", CHARS_PER_TOKEN)
+
+def calibrate(model_name, sample, count_tokens):
+    """
+    Measure a model's characters per token on sample text and cache the ratio.
+
+    Args:
+        model_name (str): Model the ratio is measured for
+        sample (str): Representative prompt text
+        count_tokens (callable): Returns the exact token count of a text
+
+    Returns:
+        float: Characters per token
+    """
+    if not sample:
+        return chars_per_token()
+    tokens = count_tokens(sample)
+    if tokens <= 0:
+        return chars_per_token()
+    ratio = len(sample) / tokens
+    calibration = {"model": model_name, "chars_per_token": ratio}
+    os.makedirs(os.path.dirname(TOKEN_CALIBRATION_FILE) or ".", exist_ok=True)
+    tmp_file = f"{TOKEN_CALIBRATION_FILE}.tmp"
+    with open(tmp_file, "w", encoding="utf-8") as f:
+        json.dump(calibration, f)
+    os.replace(tmp_file, TOKEN_CALIBRATION_FILE)
+    load_calibration()
+    _calibration.update(calibration)
+    logger.info(f"Calibrated token estimates for {model_name}: {ratio:.2f} characters per token")
+    return ratio
+
+def estimate_tokens(text):
+    """
+    Estimate the number of tokens in a text.
+
+    Args:
+        text (str): The text
+
+    Returns:
+        int: Estimated token count
+    """
+    if not text:
+        return 0
+    return int(len(text) / chars_per_token()) + 1
+
+def truncate_to_tokens(text, max_tokens, keep="start"):
+    """
+    Cut a text down to roughly max_tokens tokens at a word boundary.
+
+    Args:
+        text (str): The text
+        max_tokens (int): Token budget
+        keep (str): "start" keeps the beginning of the text, "end" the end
+
+    Returns:
+        str: The text, shortened if it was over the budget
+    """
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    max_chars = max(int(max_tokens * chars_per_token()), 0)
+    if keep == "end":
+        cut = text[len(text) - max_chars:]
+        return "..." + cut[cut.find(" ") + 1:] if " " in cut else "..." + cut
+    cut = text[:max_chars]
+    return (cut.rsplit(" ", 1)[0] if " " in cut else cut) + "..."
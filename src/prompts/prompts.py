@@ -5,13 +5,10 @@ This module contains prompt templates for the agentic chatbot.
 RESTAURANT_QUERY_PROMPT = """You are an intelligent restaurant assistant. Answer the user's question based on the following context and conversation history.
 If the user's question cannot be answered from the context, provide a helpful general response.
 
-The context is organized in sections:
-- RESTAURANT INFORMATION: Contains general details about restaurants (name, location, cost, rating, etc.) you should use the ratings to differentiate between the restaurants.
-- CUISINE INFORMATION: Contains details about the cuisines served at restaurants
-- LOCATION INFORMATION: Contains detailed location and address information
-- MENU SECTIONS: Contains menu items grouped by food type (veg/non-veg/etc.)
-- MENU ITEMS: Contains detailed information about specific menu items
-- URL of the Restaurant Website
+The context is organized as one card per restaurant under RESTAURANTS, most relevant first. Each card contains:
+- Restaurant details: name, location, address, cuisines, rating, cost for two, website URL and contact. You should use the ratings to differentiate between the restaurants.
+- Hours and description, when relevant to the query
+- Matching dishes: menu items related to the query with food type (veg/non-veg/etc.), price and description
 
 Database context:
 {context}
@@ -80,6 +77,22 @@ Your response should be:
 If the current query is a follow-up to previous messages, make sure to maintain continuity in your response. If you don't know something for certain, make that clear rather than speculating.
 """
 
+CONVERSATION_SUMMARY_PROMPT = """You maintain a running summary of a conversation between a user and a restaurant assistant.
+Update the summary with the new messages below.
+
+Current summary:
+{summary}
+
+New messages:
+{messages}
+
+Write the updated summary in at most {max_words} words. Keep what later questions may refer to:
+- The user's preferences and constraints (location, budget, dietary needs, cuisines, occasion)
+- Restaurants and dishes that were recommended or discussed, with key facts like area, price and rating
+- Open questions or anything the user asked to follow up on
+Leave out formatting, greetings and details that are no longer relevant. Return only the summary text.
+"""
+
 # Food-related keywords to identify restaurant queries
 FOOD_RELATED_KEYWORDS = [
     "restaurant", "food", "meal", "eat", "dining", "lunch", "dinner", 
@@ -0,0 +1,37 @@
+import chromadb
+from src.database.ingestion import build_restaurant_documents, restaurant_key
+
+RESTAURANT = {
+    "name": "Cafe Test",
+    "url": "https://example.com/cafe-test",
+    "location": "Bandra West, Mumbai",
+    "address": "1 Hill Road, Bandra West, Mumbai",
+    "cuisines": ["Cafe", "Continental"],
+    "rating": "4.2",
+    "cost_for_two": "₹800 for two",
+    "menu_items": [
+        {"name": "Cold Coffee", "price": "₹180", "food_type": "veg"},
+        {"name": "Cold Coffee", "price": "₹180", "food_type": "veg"},
+        {"name": "Club Sandwich", "price": "₹250", "food_type": "veg"}
+    ]
+}
+
+def test_repeated_menu_item_yields_one_document():
+    for compact in (False, True):
+        documents = build_restaurant_documents(RESTAURANT, restaurant_key(RESTAURANT), compact)
+        ids = [doc_id for doc_id, _, _ in documents]
+        assert len(ids) == len(set(ids))
+        assert sum(1 for doc_id in ids if doc_id.startswith("item_")) == 2
+
+def test_repeated_menu_item_upserts():
+    collection = chromadb.EphemeralClient().get_or_create_collection(
+        name="test_repeated_menu_item", embedding_function=None
+    )
+    documents = build_restaurant_documents(RESTAURANT, restaurant_key(RESTAURANT))
+    collection.upsert(
+        ids=[doc_id for doc_id, _, _ in documents],
+        documents=[document for _, document, _ in documents],
+        metadatas=[metadata for _, _, metadata in documents],
+        embeddings=[[float(i), 1.0] for i in range(len(documents))]
+    )
+    assert collection.count() == len(documents)
@@ -0,0 +1,21 @@
+import pytest
+from src.models.intent_router import is_food_related
+
+@pytest.mark.parametrize("query", [
+    "Which places are recommended in Bandra?",
+    "Any recommendations for tonight?",
+    "Where should I go eating with friends?",
+    "Show me restaurants near CP",
+    "Are there good dishes under 300?",
+    "Has anyone reviewed this place?",
+])
+def test_keyword_inflections_match(query):
+    assert is_food_related(query)
+
+@pytest.mark.parametrize("query", [
+    "What is the capital of France?",
+    "How big is our team?",
+    "Explain how a neural network works",
+])
+def test_general_queries_do_not_match(query):
+    assert not is_food_related(query)
@@ -0,0 +1,82 @@
+import json
+import os
+import sys
+import time
+import shutil
+import tempfile
+
+# Add parent directory to path to import from src
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import chromadb
+from src.models.encoding import document_encoder
+from src.database.ingestion import (
+    iter_restaurants,
+    restaurant_key,
+    build_restaurant_documents,
+    BATCH_SIZE
+)
+
+# Current directory
+CURRENT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA_FILE = os.path.join(CURRENT_DIR, "data", "1combined_restaurants.json")
+
+def directory_size(path):
+    """Total size in bytes of all files under a directory"""
+    return sum(
+        os.path.getsize(os.path.join(root, name))
+        for root, _, files in os.walk(path)
+        for name in files
+    )
+
+def build_index(compact):
+    """
+    Build a throwaway index in one document layout and measure it
+    """
+    documents = []
+    ids = []
+    metadatas = []
+    for restaurant in iter_restaurants(DATA_FILE):
+        for doc_id, document, metadata in build_restaurant_documents(restaurant, restaurant_key(restaurant), compact):
+            ids.append(doc_id)
+            documents.append(document)
+            metadatas.append(metadata)
+
+    persist_dir = tempfile.mkdtemp(prefix="bench_index_")
+    try:
+        start_time = time.time()
+        # The embedding cache is bypassed so both layouts pay the full embedding cost
+        with document_encoder(use_cache=False) as encode:
+            embeddings = encode(documents)
+        collection = chromadb.PersistentClient(path=persist_dir).create_collection("bench_restaurants")
+        for i in range(0, len(ids), BATCH_SIZE):
+            collection.add(
+                ids=ids[i:i + BATCH_SIZE],
+                documents=documents[i:i + BATCH_SIZE],
+                metadatas=metadatas[i:i + BATCH_SIZE],
+                embeddings=embeddings[i:i + BATCH_SIZE]
+            )
+        elapsed_time = time.time() - start_time
+
+        return {
+            "documents": len(documents),
+            "document_chars": sum(len(document) for document in documents),
+            "metadata_bytes": sum(len(json.dumps(metadata, ensure_ascii=False)) for metadata in metadatas),
+            "ingest_seconds": elapsed_time,
+            "index_bytes": directory_size(persist_dir)
+        }
+    finally:
+        shutil.rmtree(persist_dir, ignore_errors=True)
+
+def main():
+    """Compare index size and ingestion time of full and compact documents"""
+    full = build_index(compact=False)
+    compact = build_index(compact=True)
+
+    print(f"{'':18}{'full':>14}{'compact':>14}{'change':>10}")
+    for field in full:
+        change = (compact[field] - full[field]) / full[field] if full[field] else 0.0
+        print(f"{field:18}{full[field]:>14.2f}{compact[field]:>14.2f}{change:>10.1%}")
+
+if __name__ == "__main__":
+    main()
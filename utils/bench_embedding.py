@@ -0,0 +1,63 @@
+import json
+import os
+import sys
+import time
+
+# Add parent directory to path to import from src
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.models.encoding import document_encoder, EMBED_BATCH_SIZE
+from src.database.ingestion import (
+    create_restaurant_document,
+    create_menu_item_document,
+    create_cuisine_document,
+    create_location_document
+)
+
+# Current directory
+CURRENT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA_FILE = os.path.join(CURRENT_DIR, "data", "1combined_restaurants.json")
+
+# Repeat the corpus so the pool has enough work to amortize worker startup
+CORPUS_REPEAT = 20
+
+def build_corpus():
+    """
+    Build the ingestion documents for the bundled restaurant data
+    """
+    with open(DATA_FILE, "r", encoding="utf-8") as f:
+        restaurants = json.load(f)
+
+    documents = []
+    for restaurant in restaurants:
+        documents.append(create_restaurant_document(restaurant))
+        documents.append(create_location_document(restaurant))
+        if cuisines := restaurant.get('cuisines', []):
+            documents.append(create_cuisine_document(restaurant, cuisines))
+        for item in restaurant.get('menu_items', []):
+            documents.append(create_menu_item_document(restaurant, item))
+
+    return documents * CORPUS_REPEAT
+
+def main():
+    """Measure encoding throughput for increasing worker counts"""
+    documents = build_corpus()
+    print(f"Benchmarking {len(documents)} documents, batch size {EMBED_BATCH_SIZE}")
+
+    worker_counts = sorted({1, 2, 4, os.cpu_count() or 1})
+    baseline = None
+    for workers in worker_counts:
+        # Bypass the embedding cache, or the timed runs would mostly be cache hits
+        with document_encoder(num_workers=workers, use_cache=False) as encode:
+            # Warm-up call starts the pool so it isn't counted in the timing
+            encode(documents[:2048])
+            start_time = time.time()
+            encode(documents)
+            elapsed_time = time.time() - start_time
+
+        docs_per_sec = len(documents) / elapsed_time
+        baseline = baseline or docs_per_sec
+        print(f"workers={workers:<3} {docs_per_sec:10.1f} docs/sec  speedup x{docs_per_sec / baseline:.2f}")
+
+if __name__ == "__main__":
+    main()
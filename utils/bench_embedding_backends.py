@@ -0,0 +1,88 @@
+import os
+import sys
+import time
+import argparse
+import numpy as np
+
+# Add parent directory to path to import from src
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.models.encoding import EMBEDDING_MODEL_NAME, EMBED_BATCH_SIZE, get_sentence_transformer
+from src.models.embedding_backends import ONNX_MODEL_DIR, ONNX_MODEL_FILE, OnnxSentenceEncoder
+from bench_embedding import build_corpus
+from bench_intent_router import LABELED_QUERIES
+
+# Current directory
+CURRENT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Documents embedded by both backends
+CORPUS_SAMPLE = 2000
+TOP_K = 10
+LATENCY_REPEATS = 5
+# The ONNX backend passes when it agrees with PyTorch at least this well
+PARITY_MIN_COSINE = 0.98
+PARITY_MIN_OVERLAP = 0.9
+
+def measure_latency(model, queries):
+    """Return p50 and p95 single-query latency in milliseconds"""
+    timings = []
+    for _ in range(LATENCY_REPEATS):
+        for query in queries:
+            start_time = time.perf_counter()
+            model.encode([query], show_progress_bar=False)
+            timings.append((time.perf_counter() - start_time) * 1000)
+    return np.percentile(timings, 50), np.percentile(timings, 95)
+
+def measure_throughput(model, documents):
+    """Return documents embedded per second, and the embeddings"""
+    start_time = time.perf_counter()
+    embeddings = model.encode(documents, batch_size=EMBED_BATCH_SIZE, show_progress_bar=False)
+    return len(documents) / (time.perf_counter() - start_time), np.asarray(embeddings, dtype=np.float32)
+
+def top_k_overlap(query_a, query_b, documents_a, documents_b, k=TOP_K):
+    """Average share of each query's top-k documents that both backends retrieve"""
+    top_a = np.argsort(-(query_a @ documents_a.T), axis=1)[:, :k]
+    top_b = np.argsort(-(query_b @ documents_b.T), axis=1)[:, :k]
+    return float(np.mean([len(set(a) & set(b)) / k for a, b in zip(top_a, top_b)]))
+
+def main():
+    """Check the ONNX backend against PyTorch on the corpus and compare their speed"""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("--dir", default=os.path.join(CURRENT_DIR, ONNX_MODEL_DIR),
+                        help="Directory of the exported model")
+    parser.add_argument("--file", default=ONNX_MODEL_FILE, help="ONNX model file to test")
+    args = parser.parse_args()
+
+    documents = list(dict.fromkeys(build_corpus()))[:CORPUS_SAMPLE]
+    queries = [query for query, _ in LABELED_QUERIES]
+    backends = {
+        "torch": get_sentence_transformer(),
+        "onnx": OnnxSentenceEncoder(EMBEDDING_MODEL_NAME, model_dir=args.dir, model_file=args.file)
+    }
+    print(f"Benchmarking {len(documents)} documents and {len(queries)} queries")
+
+    results = {}
+    for name, model in backends.items():
+        # Warm-up call so lazy initialization isn't counted
+        model.encode(queries[:2], show_progress_bar=False)
+        p50, p95 = measure_latency(model, queries)
+        docs_per_sec, document_embeddings = measure_throughput(model, documents)
+        query_embeddings = np.asarray(model.encode(queries, show_progress_bar=False), dtype=np.float32)
+        results[name] = (document_embeddings, query_embeddings)
+        print(f"{name:8}query p50 {p50:7.2f} ms   p95 {p95:7.2f} ms   {docs_per_sec:10.1f} docs/sec")
+
+    (torch_documents, torch_queries), (onnx_documents, onnx_queries) = results["torch"], results["onnx"]
+    cosines = np.sum(torch_documents * onnx_documents, axis=1) / (
+        np.linalg.norm(torch_documents, axis=1) * np.linalg.norm(onnx_documents, axis=1)
+    )
+    overlap = top_k_overlap(torch_queries, onnx_queries, torch_documents, onnx_documents)
+    print(f"cosine agreement: mean {cosines.mean():.4f}, min {cosines.min():.4f}")
+    print(f"top-{TOP_K} overlap: {overlap:.1%}")
+
+    if cosines.min() < PARITY_MIN_COSINE or overlap < PARITY_MIN_OVERLAP:
+        print(f"FAIL: expected min cosine >= {PARITY_MIN_COSINE} and overlap >= {PARITY_MIN_OVERLAP:.0%}")
+        sys.exit(1)
+    print("PASS")
+
+if __name__ == "__main__":
+    main()
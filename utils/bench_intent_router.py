@@ -0,0 +1,118 @@
+import os
+import sys
+import time
+import argparse
+
+# Add parent directory to path to import from src
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.prompts.prompts import FOOD_RELATED_KEYWORDS
+from src.models.intent_router import is_food_related
+from src.database.restaurant_table import RestaurantTable
+from src.database.ingestion import RESTAURANT_TABLE_FILE
+
+# Current directory
+CURRENT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Labeled queries: True = restaurant retrieval, False = general answer
+LABELED_QUERIES = [
+    ("Best restaurants in Bandra", True),
+    ("Where can I get a Zinger burger at KFC", True),
+    ("Show me veg options under 300", True),
+    ("Is Project Hum open on Sunday", True),
+    ("Suggest a romantic dinner place in Delhi", True),
+    ("Which cafe serves the best cheesecake", True),
+    ("I want spicy momos tonight", True),
+    ("Cheap pizzas near Dwarka", True),
+    ("What dishes does Pasta Xpress have", True),
+    ("Any good biryani around Lajpat Nagar", True),
+    ("Where should we go for brunch this weekend", True),
+    ("I'm craving tacos", True),
+    ("What's on the Tim Hortons menu", True),
+    ("Pure veg thali places in Mumbai", True),
+    ("Recommend somewhere for my parents' anniversary dinner", True),
+    ("Places that serve cold coffee", True),
+    ("Where can I eat late at night", True),
+    ("What are the prices at Subway", True),
+    ("Any bakeries with vegan desserts", True),
+    ("Good places for a quick lunch", True),
+    ("What's the rating of Bombay Taco Co", True),
+    ("Find me burritos", True),
+    ("Where do I get paneer tikka", True),
+    ("Suggest eateries with outdoor seating", True),
+    ("What is the capital of Australia", False),
+    ("Help me plan a barbell workout", False),
+    ("Our team needs a name for the hackathon", False),
+    ("Explain how transformers work in machine learning", False),
+    ("What's 15% of 2400", False),
+    ("Write a haiku about the monsoon", False),
+    ("How do I renew my passport", False),
+    ("Who wrote Pride and Prejudice", False),
+    ("What is the distance between Delhi and Mumbai", False),
+    ("Tell me about the history of the Mughal empire", False),
+    ("How do I set up a Python virtual environment", False),
+    ("What is the boiling point of water", False),
+    ("Translate good morning into Hindi", False),
+    ("Give me tips for a job interview", False),
+    ("Why is the sky blue", False),
+    ("What's a good name for a barbershop", False),
+    ("How many steps should I walk daily", False),
+    ("Recommend a book on leadership", False),
+    ("What is a table in a SQL database", False),
+    ("Summarize the plot of Inception", False),
+    ("How do solar panels work", False),
+    ("Teach me to play chess", False),
+    ("Is the stock market open today", False),
+    ("What should I pack for a trip to Goa", False),
+]
+
+def substring_router(query):
+    """The previous router: substring scan over the keyword list"""
+    return any(keyword in query.lower() for keyword in FOOD_RELATED_KEYWORDS)
+
+def evaluate(name, route, repeats=200):
+    """Report accuracy, misrouted queries and per-query latency of a router"""
+    errors = [(query, label) for query, label in LABELED_QUERIES if route(query) != label]
+
+    start_time = time.perf_counter()
+    for _ in range(repeats):
+        for query, _ in LABELED_QUERIES:
+            route(query)
+    elapsed_time = time.perf_counter() - start_time
+
+    accuracy = 1 - len(errors) / len(LABELED_QUERIES)
+    per_query_us = elapsed_time / (repeats * len(LABELED_QUERIES)) * 1e6
+    print(f"{name:28}accuracy {accuracy:6.1%}   {per_query_us:8.1f} us/query")
+    for query, label in errors:
+        print(f"    misrouted ({'food' if label else 'general'}): {query}")
+
+def main():
+    """Compare the substring scan with the compiled router on labeled queries"""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("--centroid", action="store_true",
+                        help="Also measure the embedding centroid fallback (loads the model)")
+    args = parser.parse_args()
+
+    evaluate("substring scan", substring_router)
+    evaluate("compiled keywords", is_food_related)
+
+    # Restaurant names are only known once the index has been built
+    restaurant_table = RestaurantTable(os.path.join(CURRENT_DIR, RESTAURANT_TABLE_FILE)).load()
+    if len(restaurant_table):
+        evaluate("keywords + names", lambda query: is_food_related(query, restaurant_table=restaurant_table))
+
+    if args.centroid:
+        from src.models.encoding import embed_query
+        embed = embed_query
+        # Embeddings are computed once per query, as the query cache does in the app
+        cache = {}
+        def cached_embed(text):
+            if text not in cache:
+                cache[text] = embed(text)
+            return cache[text]
+        evaluate("keywords + names + centroid", lambda query: is_food_related(
+            query, embed=cached_embed, restaurant_table=restaurant_table
+        ), repeats=5)
+
+if __name__ == "__main__":
+    main()
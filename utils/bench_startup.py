@@ -0,0 +1,89 @@
+import os
+import sys
+import json
+import time
+import argparse
+import statistics
+import subprocess
+
+# Add parent directory to path to import from src
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Current directory
+CURRENT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP_FILE = os.path.join(CURRENT_DIR, "app.py")
+
+LOADING_CAPTION = "Loading the restaurant database..."
+POLL_INTERVAL = 0.1
+QUESTION = "Suggest a good place for butter chicken in Delhi"
+
+def measure_once(question, timeout):
+    """
+    Start the app in this process and time its first render, the end of the
+    warm-up and the first answer.
+
+    Returns:
+        dict: Seconds from the start of the script run to each milestone
+    """
+    from streamlit.testing.v1 import AppTest
+
+    start_time = time.perf_counter()
+    app = AppTest.from_file(APP_FILE, default_timeout=timeout)
+    app.run()
+    timings = {"first_paint": time.perf_counter() - start_time}
+
+    # Rerun the script until the sidebar no longer shows the loading caption
+    while any(LOADING_CAPTION in caption.value for caption in app.sidebar.caption):
+        if time.perf_counter() - start_time > timeout:
+            raise TimeoutError("Warm-up did not finish in time")
+        time.sleep(POLL_INTERVAL)
+        app.run()
+    timings["ready"] = time.perf_counter() - start_time
+
+    if not os.getenv("GOOGLE_API_KEY"):
+        return timings
+    app.chat_input[0].set_value(question).run()
+    timings["first_answer"] = time.perf_counter() - start_time
+    if app.error:
+        timings["error"] = app.error[0].value
+    return timings
+
+def main():
+    """Measure cold-start time to first paint, to warm-up end and to the first answer"""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("--runs", type=int, default=3, help="Cold starts to measure")
+    parser.add_argument("--question", default=QUESTION, help="First question to ask")
+    parser.add_argument("--timeout", type=float, default=600, help="Seconds to wait per milestone")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(measure_once(args.question, args.timeout)))
+        return
+
+    # Every run is a fresh interpreter, so imports and model loads are cold
+    runs = []
+    for i in range(args.runs):
+        process = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--child",
+             "--question", args.question, "--timeout", str(args.timeout)],
+            capture_output=True, text=True
+        )
+        if process.returncode != 0:
+            print(process.stderr)
+            sys.exit(f"run {i + 1} failed")
+        runs.append(json.loads(process.stdout.strip().splitlines()[-1]))
+        print(f"run {i + 1}: " + ", ".join(
+            f"{name} {value:.2f}s" if isinstance(value, float) else f"{name}: {value}"
+            for name, value in runs[-1].items()
+        ))
+
+    for name in ("first_paint", "ready", "first_answer"):
+        values = [run[name] for run in runs if name in run]
+        if values:
+            print(f"{name:14}median {statistics.median(values):7.2f}s")
+        else:
+            print(f"{name:14}skipped (set GOOGLE_API_KEY to ask a question)")
+
+if __name__ == "__main__":
+    main()
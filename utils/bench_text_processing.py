@@ -0,0 +1,77 @@
+import re
+import os
+import sys
+import time
+import nltk
+from nltk.corpus import stopwords
+from nltk.tokenize import word_tokenize
+from nltk.stem import WordNetLemmatizer
+
+# Add parent directory to path to import from src
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.models.text_processing import NLTK_DATA_DIR, preprocess_text, preprocess_texts
+from bench_embedding import build_corpus
+
+# Current directory
+CURRENT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# The baseline is slow, so it only runs on a sample
+BASELINE_SAMPLE = 2000
+
+def baseline_preprocess_text(text):
+    """The previous implementation: resources are checked and rebuilt on every call"""
+    for resource in ('punkt', 'stopwords', 'wordnet'):
+        try:
+            nltk.download(resource, download_dir=NLTK_DATA_DIR, quiet=True)
+        except Exception:
+            pass
+    text = text.lower()
+    text = re.sub(r'[^\w\s]', '', text)
+    text = re.sub(r'\d+', '', text)
+    try:
+        tokens = word_tokenize(text)
+    except LookupError:
+        tokens = text.split()
+    try:
+        stop_words = set(stopwords.words('english'))
+        tokens = [token for token in tokens if token not in stop_words]
+    except LookupError:
+        pass
+    try:
+        lemmatizer = WordNetLemmatizer()
+        tokens = [lemmatizer.lemmatize(token) for token in tokens]
+    except LookupError:
+        pass
+    return ' '.join(tokens)
+
+def measure(name, run, documents, baseline=None):
+    """Time one pass over the documents and print throughput"""
+    start_time = time.perf_counter()
+    run(documents)
+    elapsed_time = time.perf_counter() - start_time
+    docs_per_sec = len(documents) / elapsed_time
+    speedup = f"  speedup x{docs_per_sec / baseline:.1f}" if baseline else ""
+    print(f"{name:28}{docs_per_sec:12.1f} docs/sec{speedup}")
+    return docs_per_sec
+
+def main():
+    """Compare per-call normalization with the cached sequential and parallel batch paths"""
+    documents = build_corpus()
+    print(f"Benchmarking {len(documents)} documents")
+
+    baseline = measure("per-call resources", lambda docs: [baseline_preprocess_text(doc) for doc in docs],
+                       documents[:BASELINE_SAMPLE])
+
+    # Warm-up loads the resources once so the cached runs measure steady state
+    preprocess_text(documents[0])
+    measure("cached, sequential", lambda docs: preprocess_texts(docs, num_workers=1), documents, baseline)
+    for workers in sorted({2, 4, os.cpu_count() or 1} - {1}):
+        measure(f"cached, {workers} processes", lambda docs: preprocess_texts(docs, num_workers=workers),
+                documents, baseline)
+
+    # The parallel results must match the sequential ones exactly
+    assert preprocess_texts(documents, num_workers=2) == preprocess_texts(documents, num_workers=1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+import os
+import sys
+import time
+import argparse
+import tempfile
+import numpy as np
+import chromadb
+
+# Add parent directory to path to import from src
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.database.vector_store import ChromaVectorStore, NumpyVectorStore, build_numpy_index
+
+# Embedding size of the default model
+DIMENSION = 384
+DOCUMENT_TYPES = ["restaurant", "location", "cuisine", "menu_section", "menu_item"]
+# Filter of the kind the query parser emits, matching about a fifth of the corpus
+FILTER = {"$and": [{"type": {"$ne": "menu_item"}}, {"rating": {"$gte": 4.0}}]}
+
+def build_corpus(size, dimension, seed=0):
+    """
+    Clustered unit vectors with restaurant-like metadata, so the HNSW graph
+    sees neighbourhoods similar to real embeddings.
+    """
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((max(size // 100, 1), dimension)).astype(np.float32)
+    vectors = centers[rng.integers(len(centers), size=size)]
+    vectors += 0.6 * rng.standard_normal((size, dimension)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    metadatas = [
+        {"type": DOCUMENT_TYPES[i % len(DOCUMENT_TYPES)], "rating": round(float(rating), 1)}
+        for i, rating in enumerate(rng.uniform(3.0, 5.0, size=size))
+    ]
+    return vectors, metadatas
+
+def build_queries(vectors, count, seed=1):
+    # Perturbed corpus vectors, so every query has close neighbours
+    rng = np.random.default_rng(seed)
+    queries = vectors[rng.integers(len(vectors), size=count)]
+    queries = queries + 0.3 * rng.standard_normal(queries.shape).astype(np.float32) / np.sqrt(queries.shape[1])
+    return queries / np.linalg.norm(queries, axis=1, keepdims=True)
+
+def measure(store, queries, k, where=None):
+    """
+    Run every query against a store.
+
+    Returns:
+        tuple: Result IDs per query and latencies in milliseconds
+    """
+    results = []
+    latencies = []
+    for query in queries:
+        start_time = time.perf_counter()
+        hits = store.search(query.tolist(), n_results=k, where=where)
+        latencies.append((time.perf_counter() - start_time) * 1000)
+        results.append(hits['ids'][0])
+    return results, np.array(latencies)
+
+def recall(results, truth):
+    return float(np.mean([len(set(got) & set(expected)) / max(len(expected), 1)
+                          for got, expected in zip(results, truth)]))
+
+def main():
+    """Compare recall@k and query latency of Chroma HNSW and exact NumPy search"""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("--sizes", default="10000,50000", help="Comma-separated corpus sizes")
+    parser.add_argument("--dimension", type=int, default=DIMENSION, help="Vector size")
+    parser.add_argument("--queries", type=int, default=200, help="Queries per configuration")
+    parser.add_argument("--k", type=int, default=20, help="Results per query")
+    args = parser.parse_args()
+
+    print(f"{'size':>8} {'backend':18}{'filter':>8}{'recall@' + str(args.k):>11}"
+          f"{'p50 ms':>9}{'p95 ms':>9}")
+    for size in map(int, args.sizes.split(",")):
+        vectors, metadatas = build_corpus(size, args.dimension)
+        queries = build_queries(vectors, args.queries)
+        ids = [f"doc_{i}" for i in range(size)]
+
+        with tempfile.TemporaryDirectory() as persist_dir:
+            client = chromadb.PersistentClient(path=persist_dir)
+            collection = client.create_collection(
+                name="bench", embedding_function=None, configuration={"hnsw": {"space": "cosine"}}
+            )
+            batch_size = client.get_max_batch_size()
+            start_time = time.perf_counter()
+            for start in range(0, size, batch_size):
+                collection.add(
+                    ids=ids[start:start + batch_size],
+                    embeddings=vectors[start:start + batch_size],
+                    metadatas=metadatas[start:start + batch_size]
+                )
+            print(f"{size:>8} chroma index built in {time.perf_counter() - start_time:.1f}s")
+
+            stores = {"chroma-hnsw": ChromaVectorStore(collection)}
+            for dtype in ("float32", "float16"):
+                path = os.path.join(persist_dir, f"exact_{dtype}")
+                start_time = time.perf_counter()
+                build_numpy_index(collection, path, version="bench", dtype=dtype)
+                stores[f"numpy-{dtype}"] = NumpyVectorStore.load(path)
+                print(f"{size:>8} numpy-{dtype} exported and loaded in "
+                      f"{time.perf_counter() - start_time:.1f}s")
+
+            for where in (None, FILTER):
+                # The float32 matrix search is exact, so it is the ground truth
+                truth, _ = measure(stores["numpy-float32"], queries, args.k, where)
+                for name, store in stores.items():
+                    results, latencies = measure(store, queries, args.k, where)
+                    print(f"{size:>8} {name:18}{'yes' if where else 'no':>8}"
+                          f"{recall(results, truth):>11.3f}"
+                          f"{np.percentile(latencies, 50):>9.2f}{np.percentile(latencies, 95):>9.2f}")
+
+if __name__ == "__main__":
+    main()
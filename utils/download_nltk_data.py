@@ -0,0 +1,30 @@
+import os
+import sys
+import argparse
+import nltk
+
+# Add parent directory to path to import from src
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.models.text_processing import NLTK_DATA_DIR, NLTK_RESOURCES
+
+# Current directory
+CURRENT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def main():
+    """Download the NLTK data used for text normalization into the vendored data directory"""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("--dir", default=os.path.join(CURRENT_DIR, NLTK_DATA_DIR),
+                        help="Directory to download the data into")
+    args = parser.parse_args()
+
+    os.makedirs(args.dir, exist_ok=True)
+    for name in NLTK_RESOURCES:
+        if nltk.download(name, download_dir=args.dir, quiet=True):
+            print(f"Downloaded {name}")
+        else:
+            print(f"Failed to download {name}")
+    print(f"NLTK data is in {args.dir}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+import os
+import sys
+import argparse
+
+# Add parent directory to path to import from src
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.models.encoding import EMBEDDING_MODEL_NAME
+from src.models.embedding_backends import ONNX_MODEL_DIR, ONNX_MODEL_FILE, ONNX_TOKENIZER_FILE
+
+# Current directory
+CURRENT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+FP32_MODEL_FILE = "model.onnx"
+INPUT_NAMES = ["input_ids", "attention_mask", "token_type_ids"]
+
+def export_model(model_name, output_dir, opset=17):
+    """
+    Export the transformer of a SentenceTransformer model to ONNX with its tokenizer.
+
+    Pooling and normalization are not part of the graph; the ONNX backend
+    applies them to the token embeddings.
+
+    Args:
+        model_name (str): Hugging Face model name
+        output_dir (str): Directory to write the model and tokenizer to
+        opset (int): ONNX opset version
+
+    Returns:
+        str: Path of the exported float32 model
+    """
+    import torch
+    from transformers import AutoModel, AutoTokenizer
+
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    model = AutoModel.from_pretrained(model_name).eval()
+
+    os.makedirs(output_dir, exist_ok=True)
+    tokenizer.backend_tokenizer.save(os.path.join(output_dir, ONNX_TOKENIZER_FILE))
+
+    class TokenEmbeddings(torch.nn.Module):
+        # Keyword arguments keep the export independent of the forward() argument order
+        def __init__(self, model):
+            super().__init__()
+            self.model = model
+
+        def forward(self, input_ids, attention_mask, token_type_ids):
+            return self.model(
+                input_ids=input_ids, attention_mask=attention_mask, token_type_ids=token_type_ids
+            )[0]
+
+    sample = tokenizer(["An example sentence", "Another one"], padding=True, return_tensors="pt")
+    sample.setdefault("token_type_ids", torch.zeros_like(sample["input_ids"]))
+    model_path = os.path.join(output_dir, FP32_MODEL_FILE)
+    with torch.no_grad():
+        torch.onnx.export(
+            TokenEmbeddings(model),
+            tuple(sample[name] for name in INPUT_NAMES),
+            model_path,
+            input_names=INPUT_NAMES,
+            output_names=["last_hidden_state"],
+            dynamic_axes={name: {0: "batch", 1: "sequence"} for name in INPUT_NAMES + ["last_hidden_state"]},
+            opset_version=opset,
+            dynamo=False
+        )
+    return model_path
+
+def quantize_model(model_path, output_path):
+    """Quantize the weights of an ONNX model to int8 for faster CPU inference"""
+    from onnxruntime.quantization import quantize_dynamic, QuantType
+    quantize_dynamic(model_path, output_path, weight_type=QuantType.QInt8)
+    return output_path
+
+def main():
+    """Export the embedding model to ONNX and quantize it for EMBEDDING_BACKEND=onnx (requires the onnx package)"""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("--model", default=EMBEDDING_MODEL_NAME, help="Model to export")
+    parser.add_argument("--dir", default=os.path.join(CURRENT_DIR, ONNX_MODEL_DIR),
+                        help="Directory to write the model to")
+    args = parser.parse_args()
+
+    model_path = export_model(args.model, args.dir)
+    print(f"Exported {args.model} to {model_path}")
+    quantized_path = quantize_model(model_path, os.path.join(args.dir, ONNX_MODEL_FILE))
+    for path in (model_path, quantized_path):
+        print(f"{os.path.basename(path):20}{os.path.getsize(path) / 1e6:8.1f} MB")
+    print("Set EMBEDDING_BACKEND=onnx to use the quantized model; "
+          "python utils/bench_embedding_backends.py checks parity and speed")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+import os
+import sys
+import tempfile
+
+# Add parent directory to path to import from src
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.models.encoding import EMBEDDING_BACKEND, embed_query, document_encoder
+from src.models.model_registry import get_model_registry, resident_memory_bytes
+from src.database.ingestion import open_collection
+
+def main():
+    """Embed through every entry point the app uses and report the models loaded"""
+    rss_start = resident_memory_bytes()
+
+    # The restaurant collection, a second collection, query embedding and bulk
+    # encoding all embed text; each used to be able to load its own model copy
+    with tempfile.TemporaryDirectory() as persist_dir:
+        for name in ("restaurants", "documents"):
+            collection = open_collection(persist_dir=persist_dir, collection_name=name)
+            collection.add(ids=["1"], documents=["Butter chicken with garlic naan"])
+        embed_query("spicy paneer near me")
+        with document_encoder(num_workers=1, use_cache=False) as encode:
+            encode(["Veg thali", "Chicken biryani"])
+
+    report = get_model_registry().memory_report()
+    print(f"Backend: {EMBEDDING_BACKEND}")
+    for key, stats in report["models"].items():
+        print(
+            f"{key:50}{stats['weight_bytes'] / 1e6:8.1f} MB weights"
+            f"{stats['rss_delta_bytes'] / 1e6:8.1f} MB resident"
+            f"{stats['load_seconds']:8.2f} s load"
+        )
+    print(f"Process resident memory: {report['resident_bytes'] / 1e6:.1f} MB "
+          f"(+{(report['resident_bytes'] - rss_start) / 1e6:.1f} MB since start)")
+
+    if len(report["models"]) != 1:
+        print(f"FAIL: expected one model copy, found {len(report['models'])}")
+        sys.exit(1)
+    print("PASS: one model copy shared by all entry points")
+
+if __name__ == "__main__":
+    main()